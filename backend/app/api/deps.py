@@ -2,7 +2,6 @@
 from typing import AsyncGenerator, Optional
 from fastapi import Depends, HTTPException, status, Security
 from fastapi.security import OAuth2PasswordBearer, APIKeyHeader
-from jose import jwt
 from pydantic import ValidationError
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -0,0 +1,70 @@
+# app/api/sparse_fields.py
+# Разреженные наборы полей для списковых эндпоинтов: ?fields=id,title,comp_start_at.
+# CRUD выбирает только эти колонки, а ответ сериализуется схемой только из этих полей - прямо из строк БД,
+# без ORM-объектов и без проверки полной модели ответа. Без параметра ответ прежний (полная модель).
+import types
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Tuple, Type, Union, get_args, get_origin
+
+from fastapi import HTTPException, Query, status
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+# Поля, которые возвращаются всегда: без id строку списка не с чем сопоставить
+ALWAYS_INCLUDED = ("id",)
+
+def fields_param(model: Type[BaseModel]) -> Callable[..., Optional[Tuple[str, ...]]]:
+    """
+    Зависимость для параметра fields: кортеж выбранных полей в порядке модели или None, если параметр не передан
+    или пуст (?fields= - как без параметра, а не только id). Неизвестное поле - 400 со списком доступных.
+    """
+    available = tuple(model.model_fields)
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None, description=f"Comma-separated fields to return (id is always included): {','.join(available)}",
+        ),
+    ) -> Optional[Tuple[str, ...]]:
+        if fields is None:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        if not requested:
+            return None
+        unknown = requested.difference(available)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown field(s): {', '.join(sorted(unknown))}. Available: {', '.join(available)}",
+            )
+        requested.update(name for name in ALWAYS_INCLUDED if name in available)
+        return tuple(name for name in available if name in requested)
+
+    return dependency
+
+def _plain_annotation(annotation: Any) -> Any:
+    """ Аннотация поля, в которой вложенные модели заменены на TypedDict: строки из CRUD - словари. """
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _typed_dict(annotation, tuple(annotation.model_fields))
+    args = get_args(annotation)
+    if not args:
+        return annotation
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        return Union[tuple(_plain_annotation(arg) for arg in args)]
+    return origin[tuple(_plain_annotation(arg) for arg in args)]
+
+@lru_cache(maxsize=None)
+def _typed_dict(model: Type[BaseModel], fields: Tuple[str, ...]) -> type:
+    return TypedDict(f"{model.__name__}Fields", {
+        name: _plain_annotation(info.annotation) for name, info in model.model_fields.items() if name in fields
+    })
+
+@lru_cache(maxsize=256)
+def _list_adapter(model: Type[BaseModel], fields: Tuple[str, ...]) -> TypeAdapter:
+    # Схема и сериализатор строятся один раз на набор полей
+    return TypeAdapter(List[_typed_dict(model, fields)])
+
+def sparse_response(model: Type[BaseModel], fields: Tuple[str, ...], rows: Iterable[Mapping[str, Any]]) -> Response:
+    """ JSON-список только с полями fields. Значения сериализуются по типам полей модели, как и полный ответ. """
+    return Response(content=_list_adapter(model, fields).dump_json(list(rows)), media_type="application/json")
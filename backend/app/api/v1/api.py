@@ -1,7 +1,7 @@
 # app/api/v1/api.py
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, competitions, organizer, bot
+from app.api.v1.endpoints import auth, users, competitions, organizer, bot, debug, changes
 
 api_router = APIRouter()
 
@@ -10,4 +10,6 @@ api_router.include_router(auth.router, tags=["Authentication"])
 api_router.include_router(users.router, tags=["Users"])
 api_router.include_router(competitions.router, tags=["Competitions (Public)"])
 api_router.include_router(organizer.router, tags=["Organizer Actions"])
-api_router.include_router(bot.router, prefix="/bot", tags=["Telegram Bot Interaction"]) # Добавляем префикс /bot
\ No newline at end of file
+api_router.include_router(bot.router, prefix="/bot", tags=["Telegram Bot Interaction"]) # Добавляем префикс /bot
+api_router.include_router(changes.router, tags=["Change Feed"])
+api_router.include_router(debug.router, tags=["Debug"])
@@ -1,9 +1,9 @@
 # app/api/v1/endpoints/auth.py
+import logging
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import SQLModel
-import httpx # Для запросов к Telegram API
 
 from app.api import deps
 from app.core.config import settings
@@ -13,6 +13,7 @@ from app.models.user import User # Для type hint
 from app.crud import crud_user
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # ПРИМЕР: Структура данных, ожидаемая от Telegram OAuth Widget
 # Уточни реальную структуру по документации Telegram!
@@ -27,20 +28,16 @@ class TelegramLoginData(SQLModel):
 
 async def verify_telegram_hash(data: dict) -> bool:
     """
-    Проверяет хеш данных от Telegram Widget.
-    ВНИМАНИЕ: Это критически важная функция для безопасности!
-    Реализация зависит от способа получения данных (Widget, OAuth Flow).
-    Нужно реализовать проверку подписи с использованием твоего BOT_TOKEN.
+    Проверяет хеш данных от Telegram Widget: HMAC-SHA256 строки проверки с ключом SHA-256(BOT_TOKEN),
+    в пуле потоков криптографии (см. security.verify_telegram_login).
     См. документацию Telegram: https://core.telegram.org/widgets/login#checking-authorization
     """
-    # --- ПРИМЕРНАЯ ЛОГИКА ПРОВЕРКИ (НЕ РАБОЧАЯ БЕЗ РЕАЛИЗАЦИИ) ---
-    # data_check_string = ... # Собрать строку по правилам Telegram
-    # secret_key = hashlib.sha256(settings.TELEGRAM_BOT_TOKEN.encode()).digest()
-    # hmac_hash = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
-    # return hmac.compare_digest(data['hash'], hmac_hash)
+    if settings.TELEGRAM_LOGIN_VERIFY_HASH:
+        return await security.verify_telegram_login_async(data)
     # --- ЗАГЛУШКА ДЛЯ MVP (НЕ БЕЗОПАСНО!) ---
-    print(f"WARNING: Telegram hash verification is skipped in MVP! Data: {data}")
-    return True # ВРЕМЕННО! Замени на реальную проверку!
+    # Без данных входа: в них персональные данные, а пишется это на каждый логин
+    logger.warning("Telegram hash verification is skipped in MVP!")
+    return True # ВРЕМЕННО! Включи TELEGRAM_LOGIN_VERIFY_HASH, когда будет настоящий BOT_TOKEN
 
 @router.post("/auth/telegram/callback", response_model=Token)
 async def login_telegram_callback(
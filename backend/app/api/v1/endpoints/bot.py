@@ -1,10 +1,10 @@
 # app/api/v1/endpoints/bot.py
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from fastapi import APIRouter, Depends, Query, Security
 from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timedelta
 
-from app.api import deps
+from app.api import deps, sparse_fields
 from app.crud import crud_competition
 from app.models.competition import Competition, CompetitionPublic, CompetitionStatusEnum # Используем CompetitionPublic для ответа
 
@@ -17,6 +17,7 @@ async def get_upcoming_competitions_for_bot(
     # Проверка API ключа бота
     is_valid_key: bool = Security(deps.validate_bot_api_key),
     limit: int = Query(5, ge=1, le=20, description="Max number of competitions to return"),
+    fields: Optional[Tuple[str, ...]] = Depends(sparse_fields.fields_param(CompetitionPublic)),
     # days_ahead: int = Query(7, ge=1, le=30, description="Look ahead period in days") # Можно добавить
 ):
     """
@@ -24,10 +25,12 @@ async def get_upcoming_competitions_for_bot(
     Доступно только для авторизованного бота (по API ключу).
     """
     # Определяем статусы, которые интересны боту
-    relevant_statuses = [CompetitionStatusEnum.upcoming, CompetitionStatusEnum.registration_open, CompetitionStatusEnum.ongoing]
+    relevant_statuses = [CompetitionStatusEnum.UPCOMING, CompetitionStatusEnum.REGISTRATION_OPEN, CompetitionStatusEnum.ONGOING]
 
     # Получаем соревнования с нужными статусами, сортируем по дате начала
-    statement = crud_competition.get_competitions(session, limit=limit)
+    competitions = await crud_competition.get_competitions(session, limit=limit, statuses=relevant_statuses, fields=fields)
+    if fields:
+        return sparse_fields.sparse_response(CompetitionPublic, fields, competitions)
     # statement = (
     #     select(Competition)
     #     .where(Competition.status.in_(relevant_statuses))
@@ -37,8 +40,6 @@ async def get_upcoming_competitions_for_bot(
     #     .order_by(Competition.comp_start_at.asc())
     #     .limit(limit)
     # )
-    result = await session.exec(statement)
-    competitions = result.all()
 
     # Преобразуем в CompetitionPublic для ответа
     return competitions
\ No newline at end of file
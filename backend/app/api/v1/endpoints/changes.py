@@ -0,0 +1,47 @@
+# app/api/v1/endpoints/changes.py
+import time
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api import deps
+from app.core.change_feed import change_notifier
+from app.core.config import settings
+from app.crud import crud_change
+from app.models.change import ChangeFeed
+
+router = APIRouter()
+
+@router.get("/changes", response_model=ChangeFeed)
+async def read_changes(
+    *,
+    session: AsyncSession = Depends(deps.get_async_session),
+    since: int = Query(0, ge=0, description="Return changes with seq greater than this (last_seq of the previous response)"),
+    limit: int = Query(500, ge=1, le=1000),
+    wait: float = Query(0, ge=0, le=settings.CHANGES_MAX_WAIT_SECONDS, description="Long-poll: wait up to this many seconds for new changes"),
+    bot_api_key: Optional[str] = Header(None, alias="X-BOT-API-KEY"),
+):
+    """
+    Журнал изменений соревнований, регистраций и результатов для инкрементальной синхронизации:
+    клиент хранит last_seq и перечитывает только изменившиеся объекты.
+    С wait > 0 запрос, если изменений нет, ждет первого нового (long-poll).
+    user_id регистраций виден только боту (по API-ключу).
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        # Номер уведомления - до чтения: коммит во время чтения или закрытия сессии (до того, как wait()
+        # создаст событие) иначе не разбудил бы запрос, и изменение пришло бы только через интервал опроса
+        generation = change_notifier.generation
+        feed = await crud_change.get_changes_since(session, since=since, limit=limit)
+        remaining = deadline - time.monotonic()
+        if feed.changes or remaining <= 0:
+            break
+        # Соединение не держим, пока ждем: ожидающих клиентов может быть больше, чем соединений в пуле
+        await session.close()
+        if change_notifier.generation == generation:
+            await change_notifier.wait(min(remaining, settings.CHANGES_POLL_INTERVAL_SECONDS))
+
+    if bot_api_key != settings.TELEGRAM_BOT_API_KEY:
+        for change in feed.changes:
+            change.user_id = None
+    return feed
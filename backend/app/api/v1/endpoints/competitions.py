@@ -1,15 +1,18 @@
 # app/api/v1/endpoints/competitions.py
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime
 
-from app.api import deps
+from app.api import deps, sparse_fields
 from app.crud import crud_competition, crud_result, crud_registration, crud_user
 from app.models.registration import RegistrationCreate
 from app.models.message import Message
-from app.models.competition import Competition, CompetitionPublic, CompetitionStatusEnum, CompetitionReadWithOwner
-from app.models.result import ResultReadWithUser, Result # Импорт моделей
+from app.models.competition import Competition, CompetitionBatchItem, CompetitionPublic, CompetitionStatusEnum, CompetitionReadWithOwner
+from app.models.result import ResultReadWithUser, ResultsAroundUser, ResultStats, Result # Импорт моделей
+from app.core.config import settings
+from app.core.ranking import RankValueType
 from app.models.user import User, UserPublic # Импорт моделей
 
 router = APIRouter()
@@ -19,6 +22,7 @@ async def read_competitions(
     session: AsyncSession = Depends(deps.get_async_session),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
+    fields: Optional[Tuple[str, ...]] = Depends(sparse_fields.fields_param(CompetitionPublic)),
     # Для MVP пока без фильтров, но можно добавить:
     # status: Optional[CompetitionStatusEnum] = Query(None),
     # include_past: bool = Query(False)
@@ -26,15 +30,44 @@ async def read_competitions(
     """
     Получение списка актуальных соревнований (сортировка по дате начала).
     MVP: Простой список без фильтров, ближайшие сверху.
+    С fields - только перечисленные поля (например, для карточек списка без описания).
     """
     # TODO: Добавить логику для "актуальных" (предстоящие, идущие, недавно завершенные)
     # Пока просто получаем все по дате начала
     competitions = await crud_competition.get_competitions(
-        session, skip=skip, limit=limit #, status=status, include_past=include_past
+        session, skip=skip, limit=limit, fields=fields #, status=status, include_past=include_past
     )
+    if fields:
+        return sparse_fields.sparse_response(CompetitionPublic, fields, competitions)
     # Pydantic автоматически преобразует List[Competition] в List[CompetitionPublic]
     return competitions
 
+# Объявлен до /competitions/{competition_id}, иначе "batch" разбирался бы как id
+@router.get("/competitions/batch", response_model=Dict[int, CompetitionBatchItem])
+async def read_competition_details_batch(
+    session: AsyncSession = Depends(deps.get_async_session),
+    ids: List[int] = Query(
+        ..., min_length=1, max_length=settings.COMPETITION_BATCH_MAX_IDS,
+        description="Competition ids, repeated: ?ids=1&ids=2",
+    ),
+):
+    """
+    Детали нескольких соревнований одним запросом вместо вызова /competitions/{id} на каждое:
+    один запрос за соревнованиями и один за их организаторами, сколько бы id ни пришло.
+    Ответ - словарь id -> элемент; ненайденное соревнование не ломает запрос, а описано в своем элементе.
+    """
+    competitions = await crud_competition.get_competitions_by_ids(session, ids)
+    items = {}
+    for competition_id in ids:
+        competition = competitions.get(competition_id)
+        if competition is None:
+            items[competition_id] = CompetitionBatchItem(status_code=status.HTTP_404_NOT_FOUND, detail="Competition not found")
+        else:
+            items[competition_id] = CompetitionBatchItem(
+                status_code=status.HTTP_200_OK, competition=_to_competition_read_with_owner(competition),
+            )
+    return items
+
 @router.get("/competitions/{competition_id}", response_model=CompetitionReadWithOwner)
 async def read_competition_details(
     competition_id: int,
@@ -47,6 +80,10 @@ async def read_competition_details(
     if not competition:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Competition not found")
 
+    return _to_competition_read_with_owner(competition)
+
+def _to_competition_read_with_owner(competition: Competition) -> CompetitionReadWithOwner:
+    """ Преобразует Competition (с загруженным organizer) в CompetitionReadWithOwner """
     # Преобразуем данные организатора в UserPublic перед возвратом
     # Если organizer был загружен через selectinload, он уже тут
     organizer_public = None
@@ -56,7 +93,6 @@ async def read_competition_details(
     # Собираем финальный ответ
     response_data = CompetitionReadWithOwner.model_validate(competition)
     response_data.organizer = organizer_public
-
     return response_data
 
 @router.get("/competitions/{competition_id}/results", response_model=List[ResultReadWithUser])
@@ -65,39 +101,125 @@ async def read_competition_results(
     session: AsyncSession = Depends(deps.get_async_session),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500), # Можно увеличить лимит для результатов
+    fields: Optional[Tuple[str, ...]] = Depends(sparse_fields.fields_param(ResultReadWithUser)),
 ):
     """
     Получение опубликованных результатов для соревнования.
     Возвращает пустой список, если результаты не опубликованы или соревнование не найдено.
+    С fields - только перечисленные поля (user - публичные данные участника целиком).
     """
     # 1. Проверяем статус соревнования
     competition = await crud_competition.get_competition(session, competition_id=competition_id)
     if not competition:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Competition not found")
 
-    if competition.status != CompetitionStatusEnum.results_published:
+    if competition.status != CompetitionStatusEnum.RESULTS_PUBLISHED:
          # Согласно MVP, раздел появляется после публикации. Отдаем пустой список.
          # Или можно 403 Forbidden, если нужно явно указать причину.
          # raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Results are not published yet")
          return []
 
+    if fields:
+        rows = await crud_result.get_result_rows_by_competition(
+            session, competition_id=competition_id, fields=fields, skip=skip, limit=limit
+        )
+        return sparse_fields.sparse_response(ResultReadWithUser, fields, rows)
+
     # 2. Получаем результаты с данными пользователей
     results_db = await crud_result.get_results_by_competition(
         session, competition_id=competition_id, skip=skip, limit=limit
     )
 
     # 3. Преобразуем в нужный формат ответа (ResultReadWithUser)
-    results_with_user = []
-    for res in results_db:
-        user_public = None
-        if res.user: # User должен быть загружен через selectinload в CRUD
-            user_public = UserPublic.model_validate(res.user)
+    return [_to_result_read_with_user(res) for res in results_db]
+
+@router.get("/competitions/{competition_id}/results/stream", response_class=StreamingResponse)
+async def stream_competition_results(
+    competition_id: int,
+    session: AsyncSession = Depends(deps.get_async_session),
+):
+    """
+    Живая таблица результатов (Server-Sent Events): при подключении событие snapshot с верхом таблицы,
+    после изменений результатов - update с изменившимися и выбывшими строками.
+    Таблицу читает из БД один общий для соревнования вещатель, а не каждый подписчик (см. core/leaderboard.py).
+    """
+    from app.core.leaderboard import leaderboard_hub # Подсистема загружается с первым потоком, а не при старте
+    competition = await crud_competition.get_competition(session, competition_id=competition_id)
+    if not competition:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Competition not found")
+    if leaderboard_hub.subscribers >= settings.LEADERBOARD_MAX_SUBSCRIBERS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many open result streams",
+            headers={"Retry-After": "30"},
+        )
+    # Соединение с БД потоку не нужно: таблицу читает вещатель
+    await session.close()
+    return StreamingResponse(
+        leaderboard_hub.stream(competition_id),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx не буферизует ответ, события уходят клиенту сразу
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/competitions/{competition_id}/results/stats", response_model=ResultStats)
+async def read_competition_results_stats(
+    competition_id: int,
+    session: AsyncSession = Depends(deps.get_async_session),
+    value_type: RankValueType = Query(RankValueType.NUMBER, description="How to parse result_value"),
+    bins: int = Query(20, ge=1, le=100, description="Number of histogram bins"),
+):
+    """
+    Статистика распределения опубликованных результатов: min/max/mean/median, перцентили, гистограмма.
+    Пустая статистика, если результаты не опубликованы.
+    """
+    competition = await crud_competition.get_competition(session, competition_id=competition_id)
+    if not competition:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Competition not found")
+    if competition.status != CompetitionStatusEnum.RESULTS_PUBLISHED:
+        return ResultStats()
+
+    return await crud_result.get_results_stats(
+        session, competition_id=competition_id, value_type=value_type, bins=bins
+    )
+
+@router.get("/competitions/{competition_id}/results/around-me", response_model=ResultsAroundUser)
+async def read_competition_results_around_me(
+    competition_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+    session: AsyncSession = Depends(deps.get_async_session),
+    n: int = Query(5, ge=0, le=50, description="Number of neighbours above and below"),
+):
+    """
+    Место текущего пользователя в опубликованных результатах и n соседей сверху и снизу.
+    """
+    competition = await crud_competition.get_competition(session, competition_id=competition_id)
+    if not competition:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Competition not found")
+    if competition.status != CompetitionStatusEnum.RESULTS_PUBLISHED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Results are not published yet")
+
+    around = await crud_result.get_results_around_user(
+        session, competition_id=competition_id, user_id=current_user.id, n=n
+    )
+    if around is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="You have no result in this competition")
+
+    above, own, below = around
+    return ResultsAroundUser(
+        above=[_to_result_read_with_user(res) for res in above],
+        me=_to_result_read_with_user(own),
+        below=[_to_result_read_with_user(res) for res in below],
+    )
 
-        result_read = ResultReadWithUser.model_validate(res)
-        result_read.user = user_public
-        results_with_user.append(result_read)
+def _to_result_read_with_user(res: Result) -> ResultReadWithUser:
+    """ Преобразует Result (с загруженным user) в ResultReadWithUser """
+    user_public = None
+    if res.user: # User должен быть загружен через selectinload/joinedload в CRUD
+        user_public = UserPublic.model_validate(res.user)
 
-    return results_with_user
+    result_read = ResultReadWithUser.model_validate(res)
+    result_read.user = user_public
+    return result_read
 
 @router.post("/competitions/{competition_id}/register", status_code=status.HTTP_201_CREATED, response_model=Message)
 async def register_for_competition(
@@ -115,7 +237,7 @@ async def register_for_competition(
 
     # 2. Проверить статус и даты регистрации
     now = datetime.utcnow()
-    if competition.status != CompetitionStatusEnum.registration_open:
+    if competition.status != CompetitionStatusEnum.REGISTRATION_OPEN:
          raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Registration is closed for this competition")
     # Дополнительные проверки дат (если нужны поверх статуса)
     # if competition.reg_start_at and now < competition.reg_start_at:
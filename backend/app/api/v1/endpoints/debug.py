@@ -0,0 +1,22 @@
+# app/api/v1/endpoints/debug.py
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+async def require_profiling_access(request: Request) -> None:
+    """ Доступ к профилям - только у организаторов и бота (как и запуск профилирования запроса). """
+    from app.core import profiling # Профилировщик импортируется только при обращении к отладочным эндпоинтам
+    if not await profiling.is_profiling_authorized(request.headers):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Organizer token or bot API key required")
+
+@router.get("/debug/hot-stacks", response_class=PlainTextResponse, dependencies=[Depends(require_profiling_access)])
+async def read_hot_stacks():
+    """
+    Горячие стеки цикла событий, накопленные фоновым сэмплированием (формат folded stacks для flamegraph).
+    Сэмплирование включается настройкой PROFILE_BACKGROUND_HZ.
+    """
+    from app.core import profiling
+    if profiling.background_sampler is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Background sampling is disabled")
+    return PlainTextResponse(profiling.background_sampler.folded())
@@ -1,23 +1,30 @@
 # app/api/v1/endpoints/organizer.py
 import csv
+import hashlib
 import io
-from typing import List, Optional
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, status, UploadFile, File, Form
+import json
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response, status, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import SQLModel
 from sqlmodel import select
-import httpx
-import asyncio
 
-from app.api import deps
-from app.crud import crud_competition, crud_registration, crud_result, crud_user
+from app.api import deps, sparse_fields
+from app.crud import crud_competition, crud_idempotency, crud_registration, crud_result, crud_user
 from app.models.competition import Competition, CompetitionCreate, CompetitionUpdate, CompetitionRead, CompetitionStatusEnum
 from app.models.registration import RegistrationReadWithUser, Registration # Для participant list
-from app.models.result import ResultCreate, ResultRead, Result # Для загрузки и отображения
+from app.models.result import ( # Для загрузки и отображения
+    ResultCreate, ResultRead, ResultRankingSummary, ResultStats, Result, ResultUploadMode, ResultUploadResponse,
+)
+from app.core.ranking import RankValueType, RankDirection, RankMethod
+from app.core.export import ExportFormat, export_response
 from app.models.user import User, UserPublic # Для participant list
 from app.models.message import Message
-from app.core.config import Settings
+from app.core.config import settings
+from app.core.notifications import notification_queue
+from app.core.metrics import idempotent_requests_total
 
 router = APIRouter()
 
@@ -29,13 +36,17 @@ async def read_organizer_competitions(
     session: AsyncSession = Depends(deps.get_async_session),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
+    fields: Optional[Tuple[str, ...]] = Depends(sparse_fields.fields_param(CompetitionRead)),
 ):
     """
     Получение списка соревнований, созданных текущим организатором.
+    С fields - только перечисленные поля.
     """
     competitions = await crud_competition.get_competitions_by_organizer(
-        session, organizer_id=current_user.id, skip=skip, limit=limit
+        session, organizer_id=current_user.id, skip=skip, limit=limit, fields=fields
     )
+    if fields:
+        return sparse_fields.sparse_response(CompetitionRead, fields, competitions)
     # Pydantic преобразует List[Competition] в List[CompetitionRead]
     return competitions
 
@@ -51,7 +62,7 @@ async def create_new_competition(
     """
     # Устанавливаем статус по умолчанию 'upcoming', если не передан
     if not competition_in.status:
-         competition_in.status = CompetitionStatusEnum.upcoming
+         competition_in.status = CompetitionStatusEnum.UPCOMING
 
     competition = await crud_competition.create_competition(
         session, competition_in=competition_in, organizer_id=current_user.id
@@ -116,6 +127,50 @@ async def read_competition_participants(
 
     return participants
 
+@router.get("/organizer/competitions/{competition_id}/participants/export", response_class=StreamingResponse)
+async def export_competition_participants(
+    competition_id: int,
+    current_user: User = Depends(deps.get_current_active_organizer),
+    session: AsyncSession = Depends(deps.get_async_session),
+    format: ExportFormat = Query(ExportFormat.CSV, description="csv or ndjson"),
+    gzip: bool = Query(False, description="Compress the file with gzip"),
+):
+    """
+    Потоковая выгрузка всех участников соревнования (CSV/NDJSON) без ограничения на число строк.
+    """
+    db_competition = await crud_competition.get_competition(session, competition_id=competition_id)
+    if not db_competition:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Competition not found")
+    if db_competition.organizer_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not the owner of this competition")
+
+    return export_response(
+        crud_registration.export_registrations_statement(competition_id=competition_id),
+        format, filename=f"competition_{competition_id}_participants", compress=gzip,
+    )
+
+@router.get("/organizer/competitions/{competition_id}/results/export", response_class=StreamingResponse)
+async def export_competition_results(
+    competition_id: int,
+    current_user: User = Depends(deps.get_current_active_organizer),
+    session: AsyncSession = Depends(deps.get_async_session),
+    format: ExportFormat = Query(ExportFormat.CSV, description="csv or ndjson"),
+    gzip: bool = Query(False, description="Compress the file with gzip"),
+):
+    """
+    Потоковая выгрузка всех результатов соревнования (CSV/NDJSON), сортировка по месту.
+    """
+    db_competition = await crud_competition.get_competition(session, competition_id=competition_id)
+    if not db_competition:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Competition not found")
+    if db_competition.organizer_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not the owner of this competition")
+
+    return export_response(
+        crud_result.export_results_statement(competition_id=competition_id),
+        format, filename=f"competition_{competition_id}_results", compress=gzip,
+    )
+
 
 # --- Загрузка Результатов ---
 
@@ -125,19 +180,44 @@ class ManualResultEntry(SQLModel):
     result_value: Optional[str] = None
     rank: Optional[int] = None
 
-@router.post("/organizer/competitions/{competition_id}/results", response_model=Message)
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+# Ставится на ответ, возвращенный из сохраненного итога, а не выполненный заново
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+
+def _results_upload_scope(competition_id: int) -> str:
+    return f"results_upload:{competition_id}"
+
+# Счетчики diff (inserted, updated, ...) есть только в ответе режима diff - в режиме upsert их нет, а не null
+@router.post("/organizer/competitions/{competition_id}/results", response_model=ResultUploadResponse, response_model_exclude_none=True)
 async def upload_competition_results(
     competition_id: int,
     *,
+    response: Response,
     current_user: User = Depends(deps.get_current_active_organizer),
     session: AsyncSession = Depends(deps.get_async_session),
     # Либо CSV файл, либо JSON список ручных записей
     results_file: Optional[UploadFile] = File(None, description="CSV file with results (columns: telegram_id, result_value, rank)"),
-    manual_results: Optional[List[ManualResultEntry]] = Body(None, description="List of results for manual entry")
+    manual_results: Optional[List[ManualResultEntry]] = Body(None, description="List of results for manual entry"),
+    # Опциональный серверный расчет мест по result_value (тогда колонка rank не нужна)
+    rank_by: Optional[RankValueType] = Query(None, description="Compute ranks on the server by parsing result_value as this type"),
+    rank_direction: RankDirection = Query(RankDirection.ASC, description="asc: lower value is better, desc: higher is better"),
+    rank_method: RankMethod = Query(RankMethod.STANDARD, description="Tie handling: standard (1224) or dense (1223)"),
+    # diff: записываются только новые и изменившиеся строки
+    mode: ResultUploadMode = Query(ResultUploadMode.UPSERT, description="upsert: write every row; diff: write only new and changed rows"),
+    delete_missing: bool = Query(False, description="diff mode only: delete results of users missing from the upload"),
+    idempotency_key: Optional[str] = Header(
+        None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255,
+        description="Retries with the same key return the stored outcome of the first upload",
+    ),
 ):
     """
     Загрузка результатов соревнования (CSV или ручной ввод).
     Обновляет или создает записи результатов. Не публикует их.
+    Если передан rank_by, места всего соревнования пересчитываются на сервере после загрузки.
+    В режиме diff строки сравниваются с сохраненными, и пишутся только вставки, изменения и (при delete_missing)
+    удаления - ответ содержит их число.
+    Загрузка идемпотентна: повтор с тем же Idempotency-Key (или, без заголовка, с тем же содержимым
+    и параметрами) возвращает сохраненный итог первой загрузки, не трогая результаты.
     """
      # Проверка, что соревнование существует и принадлежит организатору
     db_competition = await crud_competition.get_competition(session, competition_id=competition_id)
@@ -148,33 +228,94 @@ async def upload_competition_results(
 
     if results_file and manual_results:
          raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provide either 'results_file' (CSV) or 'manual_results' (JSON), not both.")
+    if delete_missing and mode != ResultUploadMode.DIFF:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="delete_missing is only supported with mode=diff")
 
-    results_to_process: List[ResultCreate] = []
-    errors = []
-
+    # Содержимое читается до разбора: по нему и параметрам считается хеш запроса
     if results_file:
-        # --- Обработка CSV ---
         if results_file.content_type not in ['text/csv', 'application/vnd.ms-excel']: # Проверка типа файла
              raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Invalid file type. Please upload a CSV file.")
+        content = await results_file.read()
+    elif manual_results:
+        content = json.dumps([entry.model_dump() for entry in manual_results], sort_keys=True).encode()
+    else:
+         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No results provided. Use 'results_file' or 'manual_results'.")
+
+    request_hash = hashlib.sha256(
+        f"{'csv' if results_file else 'json'}|{rank_by}|{rank_direction}|{rank_method}|{mode}|{delete_missing}\n".encode() + content
+    ).hexdigest()
+    scope = _results_upload_scope(competition_id)
+    record, claimed = await crud_idempotency.claim(
+        session, user_id=current_user.id, scope=scope,
+        key=idempotency_key or crud_idempotency.CONTENT_KEY_PREFIX + request_hash,
+        request_hash=request_hash, lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+    )
+    if not claimed:
+        if record.request_hash != request_hash:
+            idempotent_requests_total.inc("results_upload", "mismatch")
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Idempotency-Key has already been used with a different request")
+        if record.status_code is None:
+            idempotent_requests_total.inc("results_upload", "in_progress")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="The same upload is still being processed",
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+        idempotent_requests_total.inc("results_upload", "replayed")
+        response.headers[IDEMPOTENT_REPLAYED_HEADER] = "true"
+        return ResultUploadResponse.model_validate_json(record.response_body)
+
+    try:
+        outcome = await _apply_results_upload(
+            session, competition_id=competition_id,
+            csv_content=content if results_file else None, manual_results=manual_results,
+            rank_by=rank_by, rank_direction=rank_direction, rank_method=rank_method,
+            mode=mode, delete_missing=delete_missing,
+        )
+    except Exception:
+        # Ошибка не сохраняется: исправленный повтор с тем же ключом выполнится заново
+        await crud_idempotency.release(session, record=record)
+        raise
+    # Результаты изменились - повтор более ранних файлов должен снова примениться
+    await crud_idempotency.forget_content_keys(session, scope=scope, keep_id=record.id)
+    await crud_idempotency.complete(
+        session, record=record, status_code=status.HTTP_200_OK, response_body=outcome.model_dump_json(),
+        ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    )
+    idempotent_requests_total.inc("results_upload", "processed")
+    return outcome
+
+async def _apply_results_upload(
+    session: AsyncSession,
+    *,
+    competition_id: int,
+    csv_content: Optional[bytes],
+    manual_results: Optional[List[ManualResultEntry]],
+    rank_by: Optional[RankValueType],
+    rank_direction: RankDirection,
+    rank_method: RankMethod,
+    mode: ResultUploadMode,
+    delete_missing: bool,
+) -> ResultUploadResponse:
+    """ Разбор CSV или ручного ввода и запись результатов. """
+    results_to_process: List[ResultCreate] = []
+    errors = []
+    # Разобранные записи: (метка строки для ошибок, telegram_id, result_value, rank)
+    entries: List[tuple] = []
 
+    if csv_content is not None:
+        # --- Обработка CSV ---
         try:
-            content = await results_file.read()
-            stream = io.StringIO(content.decode("utf-8")) # Предполагаем UTF-8
+            stream = io.StringIO(csv_content.decode("utf-8")) # Предполагаем UTF-8
             # Используем DictReader для удобства доступа по именам колонок
             csv_reader = csv.DictReader(stream)
 
-            required_columns = {'telegram_id', 'result_value', 'rank'}
+            required_columns = {'telegram_id', 'result_value'} if rank_by else {'telegram_id', 'result_value', 'rank'}
             if not required_columns.issubset(csv_reader.fieldnames or []):
                  raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"CSV must contain columns: {', '.join(required_columns)}")
 
             for row_num, row in enumerate(csv_reader, start=2): # start=2 т.к. 1-я строка - заголовки
                 try:
                     telegram_id = int(row['telegram_id'].strip())
-                    # Ищем пользователя по telegram_id
-                    user = await crud_user.get_user_by_telegram_id(session, telegram_id=telegram_id)
-                    if not user:
-                         errors.append(f"Row {row_num}: User with telegram_id {telegram_id} not found in the platform.")
-                         continue # Пропускаем строку, если юзер не найден
 
                     # Преобразуем ранк в int, если он есть
                     rank_val = None
@@ -185,13 +326,8 @@ async def upload_competition_results(
                             errors.append(f"Row {row_num}: Invalid rank value '{row['rank']}' for user {telegram_id}. Must be an integer.")
                             continue
 
-                    result_in = ResultCreate(
-                        user_id=user.id,
-                        competition_id=competition_id,
-                        result_value=row.get('result_value', '').strip() or None, # Пустую строку считаем None
-                        rank=rank_val
-                    )
-                    results_to_process.append(result_in)
+                    # Пользователей ищем одним запросом после разбора всего файла
+                    entries.append((f"Row {row_num}", telegram_id, row.get('result_value', '').strip() or None, rank_val)) # Пустую строку считаем None
 
                 except KeyError as e:
                      errors.append(f"Row {row_num}: Missing column {e}.")
@@ -204,39 +340,128 @@ async def upload_competition_results(
              # Ловим общие ошибки чтения/парсинга файла
              raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Error processing CSV file: {e}")
 
-    elif manual_results:
+    else:
          # --- Обработка ручного ввода ---
          for entry_num, entry in enumerate(manual_results, start=1):
-             user = await crud_user.get_user_by_telegram_id(session, telegram_id=entry.telegram_id)
-             if not user:
-                  errors.append(f"Entry {entry_num}: User with telegram_id {entry.telegram_id} not found.")
-                  continue
-
-             result_in = ResultCreate(
-                 user_id=user.id,
-                 competition_id=competition_id,
-                 result_value=entry.result_value,
-                 rank=entry.rank
-             )
-             results_to_process.append(result_in)
+             entries.append((f"Entry {entry_num}", entry.telegram_id, entry.result_value, entry.rank))
+
+    # Все пользователи файла - одним IN-запросом вместо запроса на строку
+    users = await crud_user.get_users_by_telegram_ids(session, (entry[1] for entry in entries))
+    for label, telegram_id, result_value, rank_val in entries:
+        user = users.get(telegram_id)
+        if not user:
+            errors.append(f"{label}: User with telegram_id {telegram_id} not found in the platform.")
+            continue # Пропускаем запись, если юзер не найден
+        results_to_process.append(ResultCreate(
+            user_id=user.id,
+            competition_id=competition_id,
+            result_value=result_value,
+            rank=rank_val,
+        ))
+
+    # Запись результатов и пересчет мест - одна транзакция, один коммит и одна запись журнала изменений
+    changed = False
+    if mode == ResultUploadMode.DIFF:
+        if delete_missing and errors:
+            # Строка с ошибкой не попала в загрузку - ее результат был бы удален как отсутствующий
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"delete_missing requires an upload without errors; found {len(errors)}: {'; '.join(errors[:5])}",
+            )
+        # С rank_by места считает сервер - отпечаток строки только по значению
+        diff = await crud_result.apply_results_diff(
+            session, results_in=results_to_process, competition_id=competition_id,
+            compare=("result_value",) if rank_by else ("result_value", "rank"), delete_missing=delete_missing,
+            commit=False,
+        )
+        changed = bool(diff.inserted or diff.updated or diff.deleted)
+        processed_count = diff.inserted + diff.updated + diff.unchanged
+        message = (
+            f"Successfully processed {processed_count} result(s): {diff.inserted} inserted, {diff.updated} updated, "
+            f"{diff.unchanged} unchanged, {diff.deleted} deleted."
+        )
     else:
-         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No results provided. Use 'results_file' or 'manual_results'.")
-
-    # Массовое создание/обновление результатов
-    if results_to_process:
-        processed_results = await crud_result.bulk_create_results(session, results_in=results_to_process, competition_id=competition_id)
-        processed_count = len(processed_results)
-    else:
-        processed_count = 0
+        diff = None
+        # Массовое создание/обновление результатов
+        if results_to_process:
+            processed_count = await crud_result.bulk_create_results(
+                session, results_in=results_to_process, competition_id=competition_id, commit=False,
+            )
+            changed = processed_count > 0
+        else:
+            processed_count = 0
+        message = f"Successfully processed {processed_count} result(s)."
 
     # Формируем сообщение об успехе/ошибках
-    message = f"Successfully processed {processed_count} result(s)."
+    if rank_by:
+        ranking = await crud_result.rerank_results(
+            session, competition_id=competition_id, value_type=rank_by, direction=rank_direction, method=rank_method,
+            commit=False,
+        )
+        changed = changed or ranking.updated > 0
+        message += f" Ranked {ranking.ranked} result(s), {ranking.unranked} without a parsable value."
+    if changed:
+        await crud_result.commit_results_change(session, competition_id=competition_id)
     if errors:
          message += f" Encountered {len(errors)} error(s): {'; '.join(errors[:5])}" # Показываем первые 5 ошибок
          # Возможно, стоит вернуть 207 Multi-Status или другой код, если были ошибки
          # но для MVP оставим 200 OK с сообщением
 
-    return Message(message=message)
+    return ResultUploadResponse(
+        message=message, processed=processed_count, errors=len(errors),
+        **(diff.model_dump() if diff is not None else {}),
+    )
+
+
+@router.post("/organizer/competitions/{competition_id}/results/rerank", response_model=ResultRankingSummary)
+async def rerank_competition_results(
+    competition_id: int,
+    *,
+    current_user: User = Depends(deps.get_current_active_organizer),
+    session: AsyncSession = Depends(deps.get_async_session),
+    rank_by: RankValueType = Query(..., description="Parse result_value as this type"),
+    rank_direction: RankDirection = Query(RankDirection.ASC, description="asc: lower value is better, desc: higher is better"),
+    rank_method: RankMethod = Query(RankMethod.STANDARD, description="Tie handling: standard (1224) or dense (1223)"),
+):
+    """
+    Пересчет мест всех результатов соревнования по result_value (например, после исправления значения).
+    """
+    db_competition = await crud_competition.get_competition(session, competition_id=competition_id)
+    if not db_competition:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Competition not found")
+    if db_competition.organizer_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not the owner of this competition")
+
+    summary = await crud_result.rerank_results(
+        session, competition_id=competition_id, value_type=rank_by, direction=rank_direction, method=rank_method
+    )
+    # Места изменились - повтор прежнего файла результатов должен снова примениться
+    await crud_idempotency.forget_content_keys(session, scope=_results_upload_scope(competition_id))
+    await session.commit()
+    return summary
+
+
+@router.get("/organizer/competitions/{competition_id}/results/stats", response_model=ResultStats)
+async def read_competition_results_stats_for_organizer(
+    competition_id: int,
+    *,
+    current_user: User = Depends(deps.get_current_active_organizer),
+    session: AsyncSession = Depends(deps.get_async_session),
+    value_type: RankValueType = Query(RankValueType.NUMBER, description="How to parse result_value"),
+    bins: int = Query(20, ge=1, le=100, description="Number of histogram bins"),
+):
+    """
+    Статистика распределения результатов для организатора (в том числе до публикации).
+    """
+    db_competition = await crud_competition.get_competition(session, competition_id=competition_id)
+    if not db_competition:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Competition not found")
+    if db_competition.organizer_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not the owner of this competition")
+
+    return await crud_result.get_results_stats(
+        session, competition_id=competition_id, value_type=value_type, bins=bins
+    )
 
 
 @router.post("/organizer/competitions/{competition_id}/results/publish", response_model=Message)
@@ -245,8 +470,6 @@ async def publish_competition_results(
     *,
     current_user: User = Depends(deps.get_current_active_organizer),
     session: AsyncSession = Depends(deps.get_async_session),
-    # TODO: Добавить зависимость для фоновых задач (BackgroundTasks) для отправки уведомлений
-    # background_tasks: BackgroundTasks = Depends()
 ):
     """
     Публикация результатов соревнования и инициирование отправки уведомлений.
@@ -260,12 +483,12 @@ async def publish_competition_results(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not the owner of this competition")
 
     # Проверка, что соревнование завершено (логически)
-    # if db_competition.status not in [CompetitionStatusEnum.finished, CompetitionStatusEnum.closed]:
+    # if db_competition.status not in [CompetitionStatusEnum.FINISHED, CompetitionStatusEnum.CLOSED]:
         # raise HTTPException(status_code=400, detail="Cannot publish results until the competition is finished or closed.")
 
     # Меняем статус
     updated_competition = await crud_competition.update_competition_status(
-        session, competition_id=competition_id, status=CompetitionStatusEnum.results_published
+        session, competition_id=competition_id, status=CompetitionStatusEnum.RESULTS_PUBLISHED
     )
 
     if not updated_competition:
@@ -273,50 +496,19 @@ async def publish_competition_results(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update competition status")
 
     # --- Логика отправки уведомлений ---
-    # Получаем список зарегистрированных пользователей (только telegram_id)
-    registrations = await session.exec(
-         select(Registration.user_id).where(Registration.competition_id == competition_id)
+    # telegram_id всех зарегистрированных пользователей одним запросом
+    registrations = await session.execute(
+        select(User.telegram_id).join(Registration, Registration.user_id == User.id).where(Registration.competition_id == competition_id)
     )
-    user_ids_to_notify = registrations.all()
-
-    if user_ids_to_notify:
-         users_to_notify = await session.exec(
-             select(User.telegram_id).where(User.id.in_(user_ids_to_notify))
-         )
-         telegram_ids = users_to_notify.all()
+    telegram_ids = registrations.scalars().all()
 
+    if telegram_ids:
          # Формируем сообщение
          message_text = (
              f"🎉 Результаты соревнования '{db_competition.title}' опубликованы!\n"
-             f"Посмотреть их можно на платформе: {Settings.FRONTEND_HOST}/competitions/{competition_id}" # Пример ссылки
+             f"Посмотреть их можно на платформе: {settings.FRONTEND_HOST}/competitions/{competition_id}" # Пример ссылки
          )
-
-         # Ставим задачу отправки в фон (используя BackgroundTasks или Celery/RQ)
-         # background_tasks.add_task(send_telegram_notifications, telegram_ids, message_text)
-         print(f"INFO: Would send notification to Telegram IDs: {telegram_ids} with message: '{message_text}'") # Заглушка для MVP
+         # Рассылка идет в фоне, ответ не ждет отправки
+         notification_queue.enqueue(telegram_ids, message_text)
 
     return Message(message="Results published successfully. Notifications are being sent.")
-
-# Функция для отправки уведомлений (вызывается в фоне)
-async def send_telegram_notifications(telegram_ids: List[int], message: str):
-     """ Отправляет сообщение указанным пользователям Telegram. """
-     # Используем httpx для асинхронных запросов к Telegram Bot API
-     bot_token = Settings.TELEGRAM_BOT_TOKEN
-     tg_api_url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-
-     async with httpx.AsyncClient() as client:
-         for tg_id in telegram_ids:
-             try:
-                 # chat_id для личного сообщения совпадает с telegram_id пользователя
-                 response = await client.post(tg_api_url, json={
-                     "chat_id": tg_id,
-                     "text": message,
-                     "parse_mode": "HTML" # Или Markdown, если нужно форматирование
-                 })
-                 response.raise_for_status() # Проверка на HTTP ошибки
-                 print(f"Successfully sent notification to {tg_id}")
-             except httpx.HTTPStatusError as e:
-                 print(f"Error sending notification to {tg_id}: {e.response.status_code} - {e.response.text}")
-             except Exception as e:
-                 print(f"Unexpected error sending notification to {tg_id}: {e}")
-             await asyncio.sleep(0.1) # Небольшая пауза, чтобы не перегружать API Telegram
\ No newline at end of file
@@ -0,0 +1,398 @@
+# app/benchmark.py
+# Сквозные бенчмарки API: реальное приложение app.main:app в том же процессе через ASGI-транспорт httpx
+# поверх засеянной SQLite-базы (см. app/seed_db.py). Telegram Bot API подменяется заглушкой.
+# Для каждого сценария считаются p50/p95/p99 и пропускная способность; результаты можно сохранить
+# как baseline (JSON) и сравнивать с ним - при регрессии больше порога команда завершается с кодом 1.
+#
+# Запуск:
+#   python -m app.benchmark --db /tmp/bench.db --save-baseline benchmarks/baseline.json
+#   python -m app.benchmark --db /tmp/bench.db --baseline benchmarks/baseline.json --threshold 0.2
+#   python -m app.benchmark --db /tmp/bench.db --scenario results_stats_cold --scenario results_stats_cached
+# Сценарии results_stats_* запускаются только явно: при первом запуске они досоздают в базе
+# соревнование на --large-results результатов (и недостающих пользователей).
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Настройки приложения читаются при импорте, поэтому модули app.* импортируются только после
+# того, как CLI выставит SQLITE_DB_FILE и прочие переменные окружения (см. main()).
+
+BOT_API_KEY = "benchmark-bot-key"
+API = "/api/v1"
+
+@dataclass
+class BenchContext:
+    client: Any # httpx.AsyncClient
+    telegram_requests: List[int] = field(default_factory=lambda: [0])
+    # Данные засеянной БД, которые нужны сценариям
+    competition_ids: List[int] = field(default_factory=list)
+    published_ids: List[int] = field(default_factory=list)
+    # competition_id -> (telegram_id владельца, список telegram_id участников)
+    upload_targets: Dict[int, tuple] = field(default_factory=dict)
+    publish_targets: Dict[int, int] = field(default_factory=dict)
+    registration_target: Optional[int] = None
+    registration_users: List[int] = field(default_factory=list)
+    # Вход через Telegram: первый свободный telegram_id для новых пользователей и существующие пользователи
+    login_base: int = 0
+    login_existing: List[int] = field(default_factory=list)
+    # Соревнование на large_results результатов для сценариев статистики (создается их подготовкой)
+    large_results: int = 1_000_000
+    large_competition_id: Optional[int] = None
+
+@dataclass
+class Scenario:
+    name: str
+    # Один запрос сценария: (контекст, номер итерации) -> ответ
+    request: Callable[[BenchContext, int], Awaitable[Any]]
+    expected_status: Sequence[int] = (200,)
+    # Сценарии с побочными эффектами ограничивают число запросов сами
+    max_requests: Optional[int] = None
+    # Дождаться фоновой работы (например, рассылки) после сценария - входит в общее время
+    drain: Optional[Callable[[BenchContext], Awaitable[None]]] = None
+    # Подготовка перед сценарием - не входит в измерения
+    prepare: Optional[Callable[[BenchContext], Awaitable[None]]] = None
+    # Ограничение конкурентности сценария (None - общая --concurrency)
+    concurrency: Optional[int] = None
+    # Входит ли в прогон без --scenario (тяжелые сценарии запускаются только явно)
+    default: bool = True
+
+def _auth(telegram_id: int) -> Dict[str, str]:
+    from app.core import security
+    return {"Authorization": f"Bearer {security.create_access_token(subject=telegram_id)}"}
+
+# --- Сценарии ---
+
+async def _competitions_list(ctx: BenchContext, i: int):
+    return await ctx.client.get(f"{API}/competitions", params={"skip": (i * 100) % max(len(ctx.competition_ids), 1), "limit": 100})
+
+async def _competition_detail(ctx: BenchContext, i: int):
+    return await ctx.client.get(f"{API}/competitions/{ctx.competition_ids[i % len(ctx.competition_ids)]}")
+
+async def _results_page(ctx: BenchContext, i: int):
+    competition_id = ctx.published_ids[i % len(ctx.published_ids)]
+    return await ctx.client.get(f"{API}/competitions/{competition_id}/results", params={"skip": (i // len(ctx.published_ids)) * 100 % 1000, "limit": 100})
+
+async def _registration_burst(ctx: BenchContext, i: int):
+    return await ctx.client.post(
+        f"{API}/competitions/{ctx.registration_target}/register", headers=_auth(ctx.registration_users[i]),
+    )
+
+UPLOAD_ROWS = 200
+
+async def _results_upload(ctx: BenchContext, i: int):
+    competition_ids = list(ctx.upload_targets)
+    competition_id = competition_ids[i % len(competition_ids)]
+    owner_telegram_id, participants = ctx.upload_targets[competition_id]
+    rows = ["telegram_id,result_value"] + [f"{tg_id},{(i * 7 + n) % 1000 / 10:.1f}" for n, tg_id in enumerate(participants)]
+    return await ctx.client.post(
+        f"{API}/organizer/competitions/{competition_id}/results",
+        params={"rank_by": "number", "rank_direction": "desc"},
+        files={"results_file": ("results.csv", "\n".join(rows).encode(), "text/csv")},
+        headers=_auth(owner_telegram_id),
+    )
+
+async def _results_upload_retry(ctx: BenchContext, i: int):
+    # Клиент повторяет одну и ту же загрузку (например, после таймаута) с тем же Idempotency-Key:
+    # первая загрузка на соревнование выполняется, остальные возвращают сохраненный итог
+    competition_ids = list(ctx.upload_targets)
+    competition_id = competition_ids[i % len(competition_ids)]
+    owner_telegram_id, participants = ctx.upload_targets[competition_id]
+    rows = ["telegram_id,result_value"] + [f"{tg_id},{n % 1000 / 10:.1f}" for n, tg_id in enumerate(participants)]
+    return await ctx.client.post(
+        f"{API}/organizer/competitions/{competition_id}/results",
+        params={"rank_by": "number", "rank_direction": "desc"},
+        files={"results_file": ("results.csv", "\n".join(rows).encode(), "text/csv")},
+        headers={**_auth(owner_telegram_id), "Idempotency-Key": f"benchmark-{competition_id}"},
+    )
+
+async def _publish_and_notify(ctx: BenchContext, i: int):
+    competition_ids = list(ctx.publish_targets)
+    competition_id = competition_ids[i % len(competition_ids)]
+    return await ctx.client.post(
+        f"{API}/organizer/competitions/{competition_id}/results/publish", headers=_auth(ctx.publish_targets[competition_id]),
+    )
+
+async def _drain_notifications(ctx: BenchContext) -> None:
+    from app.core.notifications import notification_queue
+    await notification_queue.join()
+
+async def _login_burst(ctx: BenchContext, i: int):
+    # Четные запросы - новые пользователи, по два входа на каждого (гонка на уникальном telegram_id),
+    # нечетные - повторный вход существующего пользователя с изменившимся username
+    if i % 2 == 0:
+        telegram_id, username = ctx.login_base + i // 4, None
+    else:
+        telegram_id, username = ctx.login_existing[i // 2 % len(ctx.login_existing)], f"bench_{ctx.login_base}_{i}"
+    from app.core import security
+    payload = {"id": telegram_id, "first_name": "Bench", "auth_date": int(time.time())}
+    if username:
+        payload["username"] = username
+    payload["hash"] = security.telegram_login_hash(payload)
+    return await ctx.client.post(f"{API}/auth/telegram/callback", json=payload)
+
+async def _bot_feed(ctx: BenchContext, i: int):
+    return await ctx.client.get(f"{API}/bot/bot/upcoming_competitions", params={"limit": 20}, headers={"X-BOT-API-KEY": BOT_API_KEY})
+
+async def _prepare_large_competition(ctx: BenchContext) -> None:
+    if ctx.large_competition_id is None:
+        from app.seed_db import seed_large_competition
+        ctx.large_competition_id = await seed_large_competition(results=ctx.large_results)
+
+async def _prepare_stats_cache(ctx: BenchContext) -> None:
+    await _prepare_large_competition(ctx)
+    await ctx.client.get(f"{API}/competitions/{ctx.large_competition_id}/results/stats")
+
+async def _results_stats_cold(ctx: BenchContext, i: int):
+    # Как после изменения результатов: кэш соревнования сброшен, статистика считается по всей колонке
+    from app.core.cache import results_cache
+    results_cache.invalidate_competition(ctx.large_competition_id)
+    return await ctx.client.get(f"{API}/competitions/{ctx.large_competition_id}/results/stats")
+
+async def _results_stats_cached(ctx: BenchContext, i: int):
+    return await ctx.client.get(f"{API}/competitions/{ctx.large_competition_id}/results/stats")
+
+SCENARIOS: Dict[str, Scenario] = {s.name: s for s in [
+    Scenario("competitions_list", _competitions_list),
+    Scenario("competition_detail", _competition_detail),
+    Scenario("results_page", _results_page),
+    Scenario("registration_burst", _registration_burst, expected_status=(201,)),
+    Scenario("results_upload_csv", _results_upload, max_requests=50),
+    # 409 - повтор пришел, пока первая загрузка с тем же ключом еще выполняется
+    Scenario("results_upload_retry", _results_upload_retry, expected_status=(200, 409), max_requests=200),
+    Scenario("publish_and_notify", _publish_and_notify, max_requests=20, drain=_drain_notifications),
+    Scenario("bot_feed", _bot_feed),
+    Scenario("login_burst", _login_burst),
+    # По одному запросу за раз: параллельный запрос заполнил бы кэш для остальных
+    Scenario("results_stats_cold", _results_stats_cold, max_requests=20, prepare=_prepare_large_competition,
+             concurrency=1, default=False),
+    Scenario("results_stats_cached", _results_stats_cached, prepare=_prepare_stats_cache, default=False),
+]}
+
+# --- Подготовка данных ---
+
+async def _load_context(ctx: BenchContext, requests: int) -> None:
+    """ Выбирает из засеянной БД соревнования и пользователей для сценариев. """
+    from sqlalchemy import func, select
+    from app.core.db import AsyncSessionFactory
+    from app.models.competition import Competition, CompetitionStatusEnum
+    from app.models.registration import Registration
+    from app.models.result import Result
+    from app.models.user import User
+
+    async with AsyncSessionFactory() as session:
+        ctx.competition_ids = (await session.execute(select(Competition.id).order_by(Competition.id))).scalars().all()
+        # Самые большие опубликованные таблицы результатов
+        ctx.published_ids = (await session.execute(
+            select(Result.competition_id).join(Competition, Competition.id == Result.competition_id)
+            .where(Competition.status == CompetitionStatusEnum.RESULTS_PUBLISHED)
+            .group_by(Result.competition_id).order_by(func.count().desc()).limit(10)
+        )).scalars().all()
+
+        owner = select(User.telegram_id).where(User.id == Competition.organizer_id).scalar_subquery()
+        finished = (await session.execute(
+            select(Competition.id, owner).where(Competition.status == CompetitionStatusEnum.FINISHED).order_by(Competition.id).limit(20)
+        )).all()
+        for competition_id, owner_telegram_id in finished[:10]:
+            participants = (await session.execute(
+                select(User.telegram_id).join(Registration, Registration.user_id == User.id)
+                .where(Registration.competition_id == competition_id).limit(UPLOAD_ROWS)
+            )).scalars().all()
+            if participants:
+                ctx.upload_targets[competition_id] = (owner_telegram_id, participants)
+        # Публикуем отдельные соревнования, чтобы не смешивать с загрузкой
+        ctx.publish_targets = {competition_id: owner_telegram_id for competition_id, owner_telegram_id in finished[10:]}
+
+        # Самое популярное соревнование с открытой регистрацией и пользователи, еще не зарегистрированные на него
+        ctx.registration_target = (await session.execute(
+            select(Competition.id).join(Registration, Registration.competition_id == Competition.id, isouter=True)
+            .where(Competition.status == CompetitionStatusEnum.REGISTRATION_OPEN)
+            .group_by(Competition.id).order_by(func.count(Registration.user_id).desc()).limit(1)
+        )).scalar_one_or_none()
+        if ctx.registration_target is not None:
+            registered = select(Registration.user_id).where(Registration.competition_id == ctx.registration_target)
+            ctx.registration_users = (await session.execute(
+                select(User.telegram_id).where(User.id.not_in(registered)).order_by(User.id).limit(requests)
+            )).scalars().all()
+
+        ctx.login_base = ((await session.execute(select(func.max(User.telegram_id)))).scalar() or 0) + 1
+        ctx.login_existing = (await session.execute(select(User.telegram_id).order_by(User.id).limit(requests))).scalars().all()
+
+def _applicable(ctx: BenchContext, name: str) -> bool:
+    return {
+        "competition_detail": bool(ctx.competition_ids),
+        "results_page": bool(ctx.published_ids),
+        "registration_burst": bool(ctx.registration_users),
+        "results_upload_csv": bool(ctx.upload_targets),
+        "results_upload_retry": bool(ctx.upload_targets),
+        "publish_and_notify": bool(ctx.publish_targets),
+        "login_burst": bool(ctx.login_existing),
+    }.get(name, True)
+
+# --- Прогон и отчет ---
+
+async def run_scenario(ctx: BenchContext, scenario: Scenario, *, requests: int, concurrency: int) -> Dict[str, Any]:
+    """ Выполняет requests запросов сценария с заданной конкурентностью и возвращает метрики. """
+    if scenario.max_requests is not None:
+        requests = min(requests, scenario.max_requests)
+    if scenario.name == "registration_burst":
+        requests = min(requests, len(ctx.registration_users))
+    if scenario.concurrency is not None:
+        concurrency = min(concurrency, scenario.concurrency)
+    if scenario.prepare is not None:
+        await scenario.prepare(ctx)
+    latencies = np.zeros(requests)
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await scenario.request(ctx, i)
+            latencies[i] = time.perf_counter() - started
+            if response.status_code not in scenario.expected_status:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    if scenario.drain is not None:
+        await scenario.drain(ctx)
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000 if requests else (0.0, 0.0, 0.0)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else 0.0,
+    }
+
+def compare_with_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """ Возвращает список регрессий: p95 выросла или пропускная способность упала больше чем на threshold. """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms")
+        if previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']:.0f} -> {current['throughput_rps']:.0f} req/s")
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: {current['errors']} error(s)")
+    return regressions
+
+def _print_report(results: Dict[str, Dict]) -> None:
+    print(f"{'scenario':<22}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for name, r in results.items():
+        print(f"{name:<22}{r['requests']:>9}{r['errors']:>8}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['throughput_rps']:>10.1f}")
+
+async def run_benchmarks(
+    scenario_names: Sequence[str], *, requests: int, concurrency: int, large_results: int = 1_000_000,
+) -> Dict[str, Dict]:
+    import logging
+    import httpx
+    from app.main import app
+    # Логи клиента бенчмарка (по строке на запрос) не относятся к измеряемому серверу
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from app.core.notifications import notification_queue
+
+    ctx = BenchContext(client=None, large_results=large_results)
+
+    def telegram_api(request: httpx.Request) -> httpx.Response:
+        ctx.telegram_requests[0] += 1
+        return httpx.Response(200, json={"ok": True, "result": {}})
+    # Заглушка Telegram Bot API без паузы между сообщениями: меряем наш код, а не лимиты Telegram
+    notification_queue.configure(send_interval=0.0, transport=httpx.MockTransport(telegram_api))
+
+    await _load_context(ctx, requests)
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+        ctx.client = client
+        for name in scenario_names:
+            scenario = SCENARIOS[name]
+            if not _applicable(ctx, name):
+                print(f"Skipping '{name}': the seeded database has no data for it")
+                continue
+            results[name] = await run_scenario(ctx, scenario, requests=requests, concurrency=concurrency)
+    await notification_queue.stop()
+    print(f"Mocked Telegram API received {ctx.telegram_requests[0]} sendMessage call(s)")
+    return results
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end API benchmarks against a seeded SQLite database")
+    parser.add_argument("--db", default="benchmark.db", help="SQLite file; seeded automatically if it does not exist")
+    parser.add_argument("--reseed", action="store_true", help="Recreate the database even if it exists")
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--competitions", type=int, default=300)
+    parser.add_argument("--results", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--large-results", type=int, default=1_000_000, help="Results in the competition of the results_stats_* scenarios")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Run only these scenarios (repeatable)")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--baseline", help="Compare with this baseline JSON and fail on regression")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    os.environ["SQLITE_DB_FILE"] = os.path.abspath(args.db)
+    os.environ["TELEGRAM_BOT_API_KEY"] = BOT_API_KEY
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-" + "0" * 32)
+    # Меряем сами эндпоинты: при --concurrency выше лимита класса "bulk" контроль допуска
+    # отвечал бы 503 на загрузки и публикации. Включается явно через ADMISSION_CONTROL_ENABLED=true
+    os.environ.setdefault("ADMISSION_CONTROL_ENABLED", "false")
+    # login_burst подписывает данные входа токеном бота, как Telegram - проверяем и подпись
+    os.environ.setdefault("TELEGRAM_LOGIN_VERIFY_HASH", "true")
+
+    scenario_names = args.scenario or [name for name, scenario in SCENARIOS.items() if scenario.default]
+    reseed = args.reseed or not os.path.exists(args.db)
+    if not reseed and any(name in scenario_names for name in ("registration_burst", "publish_and_notify")):
+        print("Note: reusing an existing database; write scenarios modify it, use --reseed for comparable runs")
+
+    async def seed_and_run():
+        # Засев и прогон в одном event loop: пул соединений движка привязан к циклу
+        if reseed:
+            from app.seed_db import seed
+            await seed(
+                users=args.users, organizers=max(1, args.users // 100), competitions=args.competitions,
+                registrations=int(args.results * 1.2), results=args.results, seed=args.seed, reset=True,
+            )
+        else:
+            # Базы, засеянные до появления новых таблиц, дополняются ими (существующие не трогаются)
+            from app.core.db import create_db_and_tables
+            await create_db_and_tables()
+        return await run_benchmarks(
+            scenario_names, requests=args.requests, concurrency=args.concurrency, large_results=args.large_results,
+        )
+
+    results = asyncio.run(seed_and_run())
+    _print_report(results)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print("Performance regressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# app/core/admission.py
+# Контроль допуска запросов к БД: у каждого класса маршрутов (публичное чтение, запись,
+# массовые операции организатора) свой лимит одновременных запросов и своя ограниченная очередь ожидания.
+# Если очередь класса полна или ожидание дольше таймаута - сразу 503 с Retry-After, а не ожидание
+# соединения SQLite до таймаута клиента. Тяжелый импорт результатов занимает только слоты "bulk"
+# и не отнимает их у дешевых публичных чтений.
+import asyncio
+import re
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, registry
+
+PUBLIC_READ = "public_read"
+WRITE = "write"
+BULK = "bulk"
+
+_READ_METHODS = {"GET", "HEAD"}
+# Массовые операции организатора: загрузка, пересчет и публикация результатов, потоковые выгрузки
+_BULK_PATH = re.compile(
+    rf"^{re.escape(settings.API_V1_STR)}/organizer/competitions/[^/]+/"
+    r"(results|results/rerank|results/publish|results/export|participants/export)/?$"
+)
+
+# Долгие запросы, которые ждут событий без соединения с БД (long-poll журнала изменений, SSE-поток таблицы
+# результатов): слот лимитера они занимали бы все время ожидания
+_UNLIMITED_PATH = re.compile(rf"^{re.escape(settings.API_V1_STR)}/(changes|competitions/[^/]+/results/stream)/?$")
+
+def route_class(scope) -> Optional[str]:
+    """ Класс маршрута по методу и пути; None - запрос не ограничивается (не API, preflight CORS, long-poll, SSE). """
+    path = scope["path"]
+    method = scope["method"]
+    if not path.startswith(settings.API_V1_STR) or method == "OPTIONS" or _UNLIMITED_PATH.match(path):
+        return None
+    if _BULK_PATH.match(path):
+        return BULK
+    return PUBLIC_READ if method in _READ_METHODS else WRITE
+
+class ConcurrencyLimiter:
+    """
+    Не больше limit запросов одновременно и не больше queue_size ожидающих (FIFO).
+    Освободившийся слот передается первому ожидающему напрямую, без гонки с новыми запросами.
+    """
+    def __init__(self, name: str, *, limit: int, queue_size: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[str]:
+        """ Занимает слот. Возвращает None при успехе или причину отказа ("queue_full", "timeout"). """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+            return None
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Слот уже был передан нам, но дождаться не успели - передаем следующему
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                return "timeout"
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None) # Слот переходит ожидающему, active не меняется
+                return
+        self.active -= 1
+
+def _build_limiters() -> Dict[str, ConcurrencyLimiter]:
+    return {
+        name: ConcurrencyLimiter(
+            name,
+            limit=settings.ADMISSION_LIMITS[name],
+            queue_size=settings.ADMISSION_QUEUE_SIZES[name],
+            timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        )
+        for name in (PUBLIC_READ, WRITE, BULK)
+    }
+
+limiters = _build_limiters()
+
+admission_shed_total = registry.register(Counter(
+    "admission_shed_total", "Requests rejected with 503 by admission control", ("route_class", "reason")))
+registry.register(Gauge("admission_in_flight", "Admitted requests in progress by route class", ("route_class",),
+                        collect=lambda: {(name,): float(limiter.active) for name, limiter in limiters.items()}))
+registry.register(Gauge("admission_queue_depth", "Requests waiting for admission by route class", ("route_class",),
+                        collect=lambda: {(name,): float(limiter.waiting) for name, limiter in limiters.items()}))
+
+class AdmissionControlMiddleware:
+    """ ASGI middleware: пропускает запрос через лимитер его класса или отвечает 503 с Retry-After. """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (name := route_class(scope)) is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = limiters[name]
+        reason = await limiter.acquire()
+        if reason is not None:
+            admission_shed_total.inc(name, reason)
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry later"},
+                status_code=503,
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
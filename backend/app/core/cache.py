@@ -0,0 +1,47 @@
+# app/core/cache.py
+# Простой in-process кэш с TTL для данных, производных от БД (статистика, таблицы результатов).
+# Ключи - кортежи, первым элементом которых идет competition_id, чтобы можно было
+# сбросить все записи соревнования при изменении его результатов.
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+class TTLCache:
+    def __init__(self, name: str, *, ttl_seconds: float = 300.0, max_entries: int = 1024):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[Hashable, ...], Tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[Hashable, ...], default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return default
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Tuple[Hashable, ...], value: Any, ttl_seconds: Optional[float] = None) -> None:
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            # Вытесняем самую старую запись (dict сохраняет порядок вставки)
+            self._entries.pop(next(iter(self._entries)))
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        self._entries[key] = (expires_at, value)
+
+    def invalidate_competition(self, competition_id: int) -> None:
+        """ Сбрасывает все записи, относящиеся к соревнованию. """
+        for key in [key for key in self._entries if key[0] == competition_id]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Кэш данных, вычисляемых из результатов соревнования. Сбрасывается в crud_result при любой записи результатов;
+# записи хранят версию (номер записи журнала изменений), чтобы не отдавать данные, измененные другим процессом.
+results_cache = TTLCache("results")
@@ -0,0 +1,57 @@
+# app/core/change_feed.py
+# Пробуждение long-poll запросов /changes после коммита транзакции, записавшей журнал изменений.
+# CRUD-функции помечают сессию (crud_change.record), а слушатель after_commit будит ожидающих.
+# Уведомление только внутри процесса: ожидающий запрос все равно перечитывает журнал раз в
+# CHANGES_POLL_INTERVAL_SECONDS, так что изменения из других процессов тоже доходят.
+import asyncio
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.metrics import Gauge, registry
+
+# Ключ в Session.info: транзакция записала журнал изменений
+CHANGES_PENDING = "change_log_pending"
+
+class ChangeNotifier:
+    def __init__(self):
+        self._event: Optional[asyncio.Event] = None
+        self.waiters = 0
+        # Растет на каждом уведомлении: фоновый читатель журнала сверяет его, чтобы не пропустить
+        # коммит, случившийся, пока он сам читал журнал, а не ждал
+        self.generation = 0
+
+    def notify(self) -> None:
+        self.generation += 1
+        event, self._event = self._event, None
+        if event is not None:
+            event.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """ Ждет следующего коммита с изменениями не дольше timeout; False - по таймауту. """
+        if self._event is None:
+            self._event = asyncio.Event()
+        event = self._event
+        self.waiters += 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiters -= 1
+
+change_notifier = ChangeNotifier()
+
+registry.register(Gauge("change_feed_waiters", "Long-poll /changes requests waiting for new entries",
+                        collect=lambda: {(): float(change_notifier.waiters)}))
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session: Session) -> None:
+    if session.info.pop(CHANGES_PENDING, False):
+        change_notifier.notify()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session) -> None:
+    session.info.pop(CHANGES_PENDING, None)
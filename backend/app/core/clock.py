@@ -0,0 +1,7 @@
+# app/core/clock.py
+# Единый источник текущего времени для моделей (default_factory/onupdate) и CRUD.
+from datetime import datetime, timezone
+
+def utcnow() -> datetime:
+    """ Текущее время в UTC с таймзоной: SQLModel не принимает naive datetime. """
+    return datetime.now(timezone.utc)
@@ -0,0 +1,106 @@
+# app/core/compression.py
+# Сжатие ответов brotli (если установлен пакет brotli) или gzip - что клиент предпочитает в заголовке
+# Accept-Encoding с учетом q-весов. Ответы меньше COMPRESSION_MINIMUM_SIZE, SSE-потоки и уже сжатые ответы
+# (выгрузки с gzip=true) уходят как есть: это, как и заголовки Vary/Content-Length и потоковые ответы,
+# берут на себя респондеры Starlette (IdentityResponder не документирован - версия starlette зафиксирована
+# в requirements.txt). Большие тела сжимаются в пуле потоков, как у GZipResponder, чтобы не держать цикл событий.
+from typing import Optional
+
+import anyio
+import anyio.lowlevel
+import anyio.to_thread
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+
+try:
+    import brotli
+except ImportError: # Необязательная зависимость: без нее клиенты получают gzip
+    brotli = None
+
+def supported_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """ Кодировка с наибольшим q из поддерживаемых; при равных весах br лучше gzip. None - без сжатия. """
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for coding in supported_encodings():
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+# Ограничение одновременных сжатий в потоках - отдельное от общего лимитера anyio (как у gzip в Starlette).
+# RunVar: лимитер привязан к циклу событий, у каждого цикла свой
+_brotli_limiter: anyio.lowlevel.RunVar = anyio.lowlevel.RunVar("brotli_capacity_limiter")
+
+def _get_brotli_limiter() -> anyio.CapacityLimiter:
+    try:
+        return _brotli_limiter.get()
+    except LookupError:
+        limiter = anyio.CapacityLimiter(40)
+        _brotli_limiter.set(limiter)
+        return limiter
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, *, quality: int, thread_minimum_size: int = 128 * 1024):
+        super().__init__(app, minimum_size)
+        self.quality = quality
+        self.thread_minimum_size = thread_minimum_size
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if len(body) >= self.thread_minimum_size:
+            # Brotli отпускает GIL: большое тело сжимается в потоке, цикл событий тем временем обслуживает других
+            return await anyio.to_thread.run_sync(self._compress_body, body, more_body, limiter=_get_brotli_limiter())
+        return self._compress_body(body, more_body)
+
+    def _compress_body(self, body: bytes, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        if more_body:
+            # Потоковый ответ: каждый кусок должен дойти до клиента сразу, а не после следующего
+            return self._compressor.process(body) + self._compressor.flush()
+        return self._compressor.process(body) + self._compressor.finish()
+
+class CompressionMiddleware:
+    def __init__(
+        self, app, *, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4,
+        thread_minimum_size: int = 128 * 1024,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.thread_minimum_size = thread_minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding == "br":
+            responder = BrotliResponder(
+                self.app, self.minimum_size, quality=self.brotli_quality, thread_minimum_size=self.thread_minimum_size,
+            )
+        elif encoding == "gzip":
+            responder = GZipResponder(
+                self.app, self.minimum_size, compresslevel=self.gzip_level, thread_minimum_size=self.thread_minimum_size,
+            )
+        else:
+            # Без сжатия, но с Vary: Accept-Encoding у больших ответов - чтобы кэши не отдали их сжимающим клиентам
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -1,6 +1,6 @@
 # app/core/config.py
 import secrets
-from typing import Annotated, Any, Literal, Optional
+from typing import Annotated, Any, Dict, Literal, Optional
 
 from pydantic import AnyUrl, BeforeValidator, computed_field, HttpUrl, EmailStr
 from pydantic_core import MultiHostUrl
@@ -32,6 +32,94 @@ class Settings(BaseSettings):
 
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
+    # Сколько id можно запросить за раз в /competitions/batch
+    COMPETITION_BATCH_MAX_IDS: int = 100
+
+    # --- Логирование ---
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    # Уровни отдельных логгеров, например LOG_LEVELS='{"app.slow_query": "WARNING"}'
+    LOG_LEVELS: Dict[str, str] = {}
+
+    # Сколько раз одна форма SQL-запроса может выполниться за HTTP-запрос, прежде чем это считается N+1
+    QUERY_REPEAT_THRESHOLD: int = 10
+    # Журнал медленных запросов: порог в миллисекундах (0 - выключен) и снятие EXPLAIN QUERY PLAN
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_EXPLAIN: bool = True
+
+    # --- Профилирование (X-Profile: 1 или ?profile=1 от организатора или бота) ---
+    # Выключено - ProfilingMiddleware не подключается и модуль профилировщика не импортируется
+    PROFILING_ENABLED: bool = True
+    PROFILE_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "profiles")
+    PROFILE_SAMPLE_INTERVAL_MS: float = 1.0
+    # Частота фонового сэмплирования всех запросов (0 - выключено)
+    PROFILE_BACKGROUND_HZ: float = 0.0
+
+    # --- Старт и остановка (lifespan в main.py) ---
+    # Досоздать таблицы и индексы моделей, которых нет в БД (create_db_and_tables; существующие не меняются)
+    STARTUP_CREATE_MISSING: bool = True
+    # Проверить, что таблицы, колонки и индексы в БД совпадают с моделями, и не стартовать при расхождении
+    STARTUP_VERIFY_SCHEMA: bool = True
+    # Открыть соединения пула и прогреть кэши до первого запроса
+    STARTUP_WARMUP: bool = True
+    # Для скольких последних опубликованных соревнований заранее посчитать статистику результатов (results_cache)
+    STARTUP_WARM_STATS: int = 3
+    # Сколько ждать отправки поставленных в очередь уведомлений при остановке
+    SHUTDOWN_DRAIN_TIMEOUT_SECONDS: float = 10.0
+
+    # Период фоновой очистки (просроченные записи идемпотентности, уплотнение журнала изменений); 0 - выключена
+    MAINTENANCE_INTERVAL_SECONDS: float = 600.0
+
+    # --- Идемпотентность загрузки результатов (заголовок Idempotency-Key или хеш содержимого) ---
+    # Сколько хранится ответ выполненного запроса
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    # Через сколько незавершенный запрос (например, упавший процесс) перестает блокировать ключ
+    IDEMPOTENCY_LOCK_SECONDS: int = 5 * 60
+
+    # --- Журнал изменений (/changes) ---
+    # Максимальное ожидание long-poll запроса и период перечитывания журнала во время ожидания
+    # (изменения из других процессов приложения не будят ожидающих, их находит перечитывание)
+    CHANGES_MAX_WAIT_SECONDS: float = 30.0
+    CHANGES_POLL_INTERVAL_SECONDS: float = 2.0
+    # Записи старше этого срока уплотняются: у каждого объекта остается только последняя
+    CHANGE_LOG_RETENTION_SECONDS: int = 7 * 24 * 60 * 60
+
+    # --- Живая таблица результатов по SSE (app/core/leaderboard.py) ---
+    # Сколько верхних строк таблицы получают подписчики
+    LEADERBOARD_STREAM_SIZE: int = 100
+    # Кадров в очереди одного подписчика: если он не успевает читать, накопленные обновления заменяются снимком
+    LEADERBOARD_SUBSCRIBER_QUEUE_SIZE: int = 8
+    # Не чаще одного чтения таблицы соревнования за этот интервал: серия записей дает одно чтение
+    LEADERBOARD_MIN_REFRESH_INTERVAL_SECONDS: float = 0.5
+    # Комментарий-heartbeat в простаивающем потоке, чтобы прокси не закрывали соединение
+    LEADERBOARD_HEARTBEAT_SECONDS: float = 15.0
+    # Сверх этого числа открытых потоков новые подключения получают 503
+    LEADERBOARD_MAX_SUBSCRIBERS: int = 10_000
+
+    # --- Сжатие ответов (app/core/compression.py) ---
+    # Выключить, если ответы сжимает обратный прокси
+    COMPRESSION_ENABLED: bool = True
+    # Ответы меньше порога не сжимаются: выигрыш в байтах не окупает сжатие
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    # Качество brotli (0-11) для сжатия на лету: выше 5-6 сжатие резко дорожает при небольшом выигрыше
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    # Тела (или куски потока) от этого размера сжимаются в пуле потоков, а не в цикле событий
+    COMPRESSION_THREAD_MINIMUM_SIZE: int = 128 * 1024
+
+    # --- Контроль допуска (app/core/admission.py) ---
+    ADMISSION_CONTROL_ENABLED: bool = True
+    # Одновременные запросы и длина очереди ожидания по классам маршрутов
+    ADMISSION_LIMITS: Dict[str, int] = {"public_read": 16, "write": 8, "bulk": 2}
+    ADMISSION_QUEUE_SIZES: Dict[str, int] = {"public_read": 64, "write": 32, "bulk": 4}
+    # Сколько запрос может ждать в очереди, прежде чем получить 503
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # --- Криптография (app/core/security.py) ---
+    # Потоков в пуле для bcrypt и проверки подписи Telegram (JWT проверяется без пула): столько вызовов выполняется одновременно
+    CRYPTO_MAX_WORKERS: int = 4
+
     # CORS Origins - разрешаем фронтенд по умолчанию
     BACKEND_CORS_ORIGINS: Annotated[
         list[AnyUrl] | str, BeforeValidator(parse_cors)
@@ -53,6 +141,9 @@ class Settings(BaseSettings):
     # SQLITE_DB_FILE: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'sqlitedb', 'database.db')
     # Поднимаемся на ТРИ уровня от backend/app/core/ чтобы попасть в корень Course_1
     SQLITE_DB_FILE: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "users.db")
+    # Кэш страниц на соединение (PRAGMA cache_size, КиБ). Стандартных 2 МБ мало для пересчета мест на 100k строк:
+    # обновление индекса (competition_id, rank, submitted_at) начинает читать страницы с диска повторно
+    SQLITE_CACHE_SIZE_KIB: int = 16384
 
     @computed_field # type: ignore[prop-decorator]
     @property
@@ -63,6 +154,13 @@ class Settings(BaseSettings):
     # --- Настройки Telegram ---
     TELEGRAM_BOT_TOKEN: str = "YOUR_TELEGRAM_BOT_TOKEN" # !!! ЗАМЕНИ НА СВОЙ ТОКЕН !!!
     TELEGRAM_BOT_API_KEY: str = secrets.token_urlsafe(32) # Ключ для защиты эндпоинта бота
+    TELEGRAM_API_URL: str = "https://api.telegram.org"
+    # Проверять подпись данных входа (HMAC-SHA256 с ключом SHA-256(TELEGRAM_BOT_TOKEN)); в MVP выключено
+    TELEGRAM_LOGIN_VERIFY_HASH: bool = False
+    # Максимальный возраст данных входа (auth_date) при проверке подписи; 0 - не ограничивать
+    TELEGRAM_LOGIN_MAX_AGE_SECONDS: int = 86400
+    # Пауза между сообщениями при рассылке уведомлений (лимиты Telegram Bot API)
+    TELEGRAM_SEND_INTERVAL_SECONDS: float = 0.1
 
     # --- Настройки Telegram OAuth (примерные, уточни по документации Telegram) ---
     # Эти значения ты получишь при регистрации приложения в Telegram
@@ -1,53 +1,87 @@
 # app/core/db.py
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel # Убедись, что все модели импортированы где-то до вызова create_all
 
 from .config import settings
-# Важно: импортируй здесь все твои модели, чтобы SQLModel знал о них при создании таблиц
-# Либо убедись, что они импортируются в другом месте до вызова create_db
-from app.models.user import User, UserPublic
-from app.models.competition import Competition, CompetitionPublic
-from app.models.registration import Registration
-from app.models.result import Result, ResultReadWithUser
-
-# --- ВАЖНО: Вызов model_rebuild ПОСЛЕ импорта всех моделей ---
-print("Rebuilding models for forward references...")
-User.model_rebuild()
-Competition.model_rebuild()
-Registration.model_rebuild()
-Result.model_rebuild()
-print("Models rebuilt.")
-
-# Создаем асинхронный движок
-# connect_args нужен для SQLite для корректной работы с FastAPI/asyncio
-async_engine = create_async_engine(
-    settings.SQLALCHEMY_DATABASE_URI,
-    echo=False, # Поставь True для отладки SQL-запросов
-    future=True,
-    connect_args={"check_same_thread": False} # Только для SQLite!
-)
-
-# Создаем фабрику асинхронных сессий
-AsyncSessionFactory = sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False, # Важно для асинхронных задач FastAPI
-    autocommit=False,
-    autoflush=False,
-)
+from .metrics import InstrumentedAsyncPool, instrument_engine
+from . import query_tracker
+from .slow_query import install_slow_query_log
+import app.models # noqa: F401 - все модели в metadata до create_all (см. app/models/__init__.py)
+
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[sessionmaker] = None
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KIB}")
+    cursor.close()
+
+def get_engine() -> AsyncEngine:
+    """ Асинхронный движок создается при первом обращении (старт приложения, скрипт, тест), а не при импорте модуля. """
+    global _engine
+    if _engine is None:
+        # connect_args нужен для SQLite для корректной работы с FastAPI/asyncio
+        engine = create_async_engine(
+            settings.SQLALCHEMY_DATABASE_URI,
+            echo=False, # Поставь True для отладки SQL-запросов
+            future=True,
+            connect_args={"check_same_thread": False}, # Только для SQLite!
+            poolclass=InstrumentedAsyncPool, # Замер ожидания соединения для /metrics
+        )
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+        instrument_engine(engine.sync_engine)
+        query_tracker.instrument_engine(engine.sync_engine) # Число и время SQL-запросов на HTTP-запрос
+        install_slow_query_log(
+            engine.sync_engine, threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS, explain=settings.SLOW_QUERY_EXPLAIN,
+        )
+        _engine = engine
+    return _engine
+
+def get_session_factory() -> sessionmaker:
+    """ Фабрика асинхронных сессий поверх get_engine(). """
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(
+            bind=get_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False, # Важно для асинхронных задач FastAPI
+            autocommit=False,
+            autoflush=False,
+        )
+    return _session_factory
+
+def __getattr__(name: str):
+    # Прежние имена модуля (from app.core.db import async_engine, AsyncSessionFactory) - тоже лениво
+    if name == "async_engine":
+        return get_engine()
+    if name == "AsyncSessionFactory":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Dependency для получения сессии в эндпоинтах FastAPI
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
-    async with AsyncSessionFactory() as session:
+    async with get_session_factory()() as session:
         yield session
 
 # Функция для создания таблиц (вызывать отдельно)
 async def create_db_and_tables():
-    async with async_engine.begin() as conn:
+    async with get_engine().begin() as conn:
         # В SQLModel 0.0.14+ create_all асинхронный по умолчанию не работает с asyncpg/aiosqlite
         # Используем синхронный create_all через run_sync
         # await conn.run_sync(SQLModel.metadata.drop_all) # Раскомментируй для удаления таблиц при перезапуске (для тестов)
-        await conn.run_sync(SQLModel.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
+
+def create_missing_indexes(sync_conn) -> None:
+    """
+    create_all пропускает уже существующие таблицы вместе с их индексами, поэтому индекс, добавленный
+    в модель позже (например, ix_result_competition_rank_submitted), в старой базе сам не появится.
+    Досоздаем недостающие индексы (CREATE INDEX только для тех, которых в базе нет).
+    """
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
\ No newline at end of file
@@ -0,0 +1,81 @@
+# app/core/export.py
+# Потоковая выгрузка строк из БД в CSV/NDJSON (опционально gzip).
+# Строки читаются серверным курсором порциями, поэтому память не зависит от размера выгрузки.
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+
+from app.core.db import get_session_factory
+
+# Сколько строк читать из курсора за раз
+EXPORT_CHUNK_SIZE = 1000
+
+class ExportFormat(str, Enum):
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
+_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _encode_chunk(rows: Sequence[Any], columns: Sequence[str], fmt: ExportFormat) -> bytes:
+    if fmt == ExportFormat.CSV:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+    return "".join(
+        json.dumps({column: _json_value(value) for column, value in zip(columns, row)}, ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+async def stream_rows(statement: Select, fmt: ExportFormat, *, compress: bool = False) -> AsyncIterator[bytes]:
+    """
+    Выполняет statement серверным курсором и отдает закодированные порции строк.
+    Использует собственную сессию: сессия из зависимости закрывается до окончания отправки тела ответа.
+    """
+    columns = [column.name for column in statement.selected_columns]
+    compressor = zlib.compressobj(wbits=31) if compress else None # wbits=31 - формат gzip
+
+    header = b""
+    if fmt == ExportFormat.CSV:
+        header = _encode_chunk([columns], columns, fmt)
+
+    async with get_session_factory()() as session:
+        conn = await session.connection()
+        result = await conn.stream(statement.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        if header:
+            yield compressor.compress(header) if compressor else header
+        async for rows in result.partitions():
+            chunk = _encode_chunk(rows, columns, fmt)
+            if compressor:
+                chunk = compressor.compress(chunk)
+                if not chunk:
+                    continue # zlib копит данные во внутреннем буфере
+            yield chunk
+
+    if compressor:
+        yield compressor.flush()
+
+def export_response(statement: Select, fmt: ExportFormat, *, filename: str, compress: bool = False) -> StreamingResponse:
+    """ Оборачивает stream_rows в StreamingResponse с именем файла для скачивания. """
+    filename = f"{filename}.{fmt.value}"
+    media_type = _MEDIA_TYPES[fmt]
+    if compress:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        stream_rows(statement, fmt, compress=compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,283 @@
+# app/core/leaderboard.py
+# Живая таблица результатов по SSE (GET /competitions/{id}/results/stream).
+# Пока у соревнования есть подписчики, у него один LeaderboardBroadcaster: после каждого изменения результатов
+# он один раз читает верх таблицы из БД и рассылает всем подписчикам одни и те же заранее закодированные кадры -
+# снимок при подключении и разницу с прошлым событием после изменений.
+# Об изменениях узнаем из журнала изменений (crud_change): один фоновый читатель журнала на процесс,
+# его будит change_notifier после коммита, а записи других процессов он находит, перечитывая журнал
+# раз в CHANGES_POLL_INTERVAL_SECONDS.
+# Медленный подписчик не задерживает остальных: у каждого своя ограниченная очередь кадров. Если она
+# переполнена, накопленные обновления выбрасываются и вместо них ставится актуальный снимок.
+import asyncio
+import contextvars
+import logging
+import time
+from typing import AsyncIterator, Dict, Optional, Set
+
+from app.core.change_feed import change_notifier
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, registry
+from app.crud import crud_change, crud_competition, crud_result
+from app.models.change import ChangeEntity
+from app.models.competition import CompetitionStatusEnum
+from app.models.result import LeaderboardSnapshot, LeaderboardUpdate, Result, ResultReadWithUser
+from app.models.user import UserPublic
+
+logger = logging.getLogger(__name__)
+
+# Первый кадр потока: через сколько миллисекунд браузер переподключается после обрыва
+_RETRY_FRAME = b"retry: 5000\n\n"
+_HEARTBEAT_FRAME = b": heartbeat\n\n"
+# Пустой кадр в очереди подписчика - сигнал закрыть поток (остановка приложения)
+_CLOSE = b""
+
+leaderboard_refreshes = registry.register(Counter(
+    "leaderboard_refreshes_total", "Leaderboard reads from the database by broadcasters"))
+leaderboard_frames = registry.register(Counter(
+    "leaderboard_frames_total", "Leaderboard SSE frames queued to subscribers by event", ("event",)))
+leaderboard_resyncs = registry.register(Counter(
+    "leaderboard_resyncs_total", "Slow subscribers whose pending updates were replaced by a fresh snapshot"))
+
+def _frame(event: str, version: int, payload) -> bytes:
+    return f"event: {event}\nid: {version}\ndata: {payload.model_dump_json()}\n\n".encode()
+
+def _to_row(res: Result) -> ResultReadWithUser:
+    row = ResultReadWithUser.model_validate(res)
+    row.user = UserPublic.model_validate(res.user) if res.user else None
+    return row
+
+class LeaderboardSubscriber:
+    """ Одно SSE-соединение: ограниченная очередь готовых кадров. """
+    __slots__ = ("queue", "last_frame_at")
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(max(1, queue_size))
+        # Когда клиенту ушел последний кадр (time.monotonic()): от него отсчитывается heartbeat
+        self.last_frame_at = time.monotonic()
+
+    def offer(self, frame: bytes, snapshot: bytes) -> bool:
+        """ Ставит кадр в очередь; если она полна - заменяет ее содержимое снимком и возвращает False. """
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            # Промежуточные обновления клиенту уже не нужны: снимок содержит итог всех
+            self._clear()
+            self.queue.put_nowait(snapshot)
+            return False
+
+    def close(self) -> None:
+        self._clear()
+        self.queue.put_nowait(_CLOSE)
+
+    def _clear(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+class LeaderboardBroadcaster:
+    """ Таблица одного соревнования: одно чтение из БД на изменение, одни и те же байты всем подписчикам. """
+    def __init__(self, hub: "LeaderboardHub", competition_id: int):
+        self.hub = hub
+        self.competition_id = competition_id
+        self.subscribers: Set[LeaderboardSubscriber] = set()
+        # Номер записи журнала, до которой включительно прочитана таблица
+        self.version = 0
+        self._published: Optional[bool] = None
+        self._rows: Dict[int, ResultReadWithUser] = {}
+        self._snapshot: Optional[bytes] = None
+        self._dirty = asyncio.Event()
+        # Пустой контекст: задача живет дольше запроса первого подписчика (иначе унаследует его request_id)
+        self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    def add(self, subscriber: LeaderboardSubscriber) -> None:
+        self.subscribers.add(subscriber)
+        if self._snapshot is not None:
+            subscriber.offer(self._snapshot, self._snapshot)
+            leaderboard_frames.inc("snapshot")
+
+    def mark_dirty(self, seq: int) -> None:
+        if seq > self.version:
+            self._dirty.set()
+
+    def stop(self) -> None:
+        self._task.cancel()
+
+    async def _run(self) -> None:
+        await self.hub.ready.wait()
+        last_refresh = -settings.LEADERBOARD_MIN_REFRESH_INTERVAL_SECONDS
+        while True:
+            if self._snapshot is not None:
+                try:
+                    await asyncio.wait_for(self._dirty.wait(), self._until_heartbeat())
+                except asyncio.TimeoutError:
+                    self._heartbeat()
+                    continue
+            self._dirty.clear()
+            delay = last_refresh + settings.LEADERBOARD_MIN_REFRESH_INTERVAL_SECONDS - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            last_refresh = time.monotonic()
+            try:
+                await self._refresh()
+            except Exception:
+                # Подписчики остаются на прошлом снимке; следующая попытка - при следующем изменении
+                logger.exception("Leaderboard refresh failed for competition %s", self.competition_id)
+
+    async def _refresh(self) -> None:
+        from app.core.db import AsyncSessionFactory
+
+        # Все, что попало в журнал до этого номера, закоммичено до чтения и в него войдет
+        version = self.version = self.hub.last_seq
+        async with AsyncSessionFactory() as session:
+            status = await crud_competition.get_competition_status(session, self.competition_id)
+            published = status == CompetitionStatusEnum.RESULTS_PUBLISHED
+            results = await crud_result.get_results_by_competition(
+                session, competition_id=self.competition_id, limit=settings.LEADERBOARD_STREAM_SIZE
+            ) if published else []
+            rows = {res.user_id: _to_row(res) for res in results}
+        leaderboard_refreshes.inc()
+
+        snapshot = _frame("snapshot", version, LeaderboardSnapshot(
+            competition_id=self.competition_id, version=version, published=published, results=list(rows.values()),
+        ))
+        if self._snapshot is None or published != self._published:
+            frame, event = snapshot, "snapshot"
+        else:
+            changed = [row for user_id, row in rows.items() if self._rows.get(user_id) != row]
+            removed = [user_id for user_id in self._rows if user_id not in rows]
+            frame, event = None, "update"
+            if changed or removed:
+                frame = _frame(event, version, LeaderboardUpdate(
+                    competition_id=self.competition_id, version=version, changed=changed, removed=removed,
+                ))
+        self._rows, self._published, self._snapshot = rows, published, snapshot
+        if frame is not None:
+            self._broadcast(frame, event)
+
+    def _broadcast(self, frame: bytes, event: str) -> None:
+        resyncs = 0
+        for subscriber in self.subscribers:
+            if not subscriber.offer(frame, self._snapshot):
+                resyncs += 1
+        leaderboard_frames.inc(event, amount=len(self.subscribers))
+        if resyncs:
+            leaderboard_resyncs.inc(amount=resyncs)
+
+    def _until_heartbeat(self) -> float:
+        """ Сколько ждать до ближайшего heartbeat: изменения без новых кадров (не в верху таблицы) его не откладывают. """
+        # Только простаивающим: у остальных в очереди и так есть что отправить
+        idle = [subscriber.last_frame_at for subscriber in self.subscribers if subscriber.queue.empty()]
+        if not idle:
+            return settings.LEADERBOARD_HEARTBEAT_SECONDS
+        return max(0.0, min(idle) + settings.LEADERBOARD_HEARTBEAT_SECONDS - time.monotonic())
+
+    def _heartbeat(self) -> None:
+        due = time.monotonic() - settings.LEADERBOARD_HEARTBEAT_SECONDS
+        idle = [subscriber for subscriber in self.subscribers if subscriber.queue.empty() and subscriber.last_frame_at <= due]
+        for subscriber in idle:
+            subscriber.queue.put_nowait(_HEARTBEAT_FRAME)
+        leaderboard_frames.inc("heartbeat", amount=len(idle))
+
+class LeaderboardHub:
+    """ Вещатели по соревнованиям и общий для них читатель журнала изменений. """
+    def __init__(self):
+        self._broadcasters: Dict[int, LeaderboardBroadcaster] = {}
+        self._watcher: Optional[asyncio.Task] = None
+        # Выставляется, когда читатель журнала узнал номер последней записи: раньше вещатели не читают таблицу,
+        # иначе изменение между их чтением и этим номером потерялось бы
+        self.ready = asyncio.Event()
+        self.last_seq = 0
+        self.subscribers = 0
+
+    @property
+    def broadcasters(self) -> int:
+        return len(self._broadcasters)
+
+    async def stream(self, competition_id: int) -> AsyncIterator[bytes]:
+        """ Кадры SSE для одного подписчика; подписка снимается, когда клиент отключается. """
+        subscriber = self._subscribe(competition_id)
+        try:
+            yield _RETRY_FRAME
+            while True:
+                frame = await subscriber.queue.get()
+                if not frame:
+                    return
+                subscriber.last_frame_at = time.monotonic()
+                yield frame
+        finally:
+            self._unsubscribe(competition_id, subscriber)
+
+    def _subscribe(self, competition_id: int) -> LeaderboardSubscriber:
+        if self._watcher is None or self._watcher.done():
+            self.ready = asyncio.Event()
+            self._watcher = asyncio.create_task(self._watch(self.ready), context=contextvars.Context())
+        broadcaster = self._broadcasters.get(competition_id)
+        if broadcaster is None:
+            broadcaster = self._broadcasters[competition_id] = LeaderboardBroadcaster(self, competition_id)
+        subscriber = LeaderboardSubscriber(settings.LEADERBOARD_SUBSCRIBER_QUEUE_SIZE)
+        broadcaster.add(subscriber)
+        self.subscribers += 1
+        return subscriber
+
+    def _unsubscribe(self, competition_id: int, subscriber: LeaderboardSubscriber) -> None:
+        broadcaster = self._broadcasters.get(competition_id)
+        if broadcaster is None or subscriber not in broadcaster.subscribers:
+            return
+        broadcaster.subscribers.discard(subscriber)
+        self.subscribers -= 1
+        if not broadcaster.subscribers:
+            del self._broadcasters[competition_id]
+            broadcaster.stop()
+
+    async def _watch(self, ready: asyncio.Event) -> None:
+        """ Читает новые записи журнала и помечает вещателей затронутых соревнований; живет, пока они есть. """
+        from app.core.db import AsyncSessionFactory
+
+        while self._broadcasters:
+            generation = change_notifier.generation
+            try:
+                async with AsyncSessionFactory() as session:
+                    if ready.is_set():
+                        await self._dispatch_changes(session)
+                    else:
+                        self.last_seq = await crud_change.get_last_seq(session)
+                        ready.set()
+            except Exception:
+                logger.exception("Leaderboard change watcher failed")
+            if change_notifier.generation == generation:
+                await change_notifier.wait(settings.CHANGES_POLL_INTERVAL_SECONDS)
+
+    async def _dispatch_changes(self, session) -> None:
+        while True:
+            feed = await crud_change.get_changes_since(session, since=self.last_seq, limit=1000)
+            for change in feed.changes:
+                # Регистрации таблицу не меняют; результаты и статус соревнования (публикация) - меняют
+                if change.entity != ChangeEntity.REGISTRATION:
+                    broadcaster = self._broadcasters.get(change.competition_id)
+                    if broadcaster is not None:
+                        broadcaster.mark_dirty(change.seq)
+            self.last_seq = feed.last_seq
+            if not feed.has_more:
+                return
+
+    async def close(self) -> None:
+        """ Закрывает все потоки и останавливает фоновые задачи (при остановке приложения). """
+        tasks = [broadcaster._task for broadcaster in self._broadcasters.values()]
+        for broadcaster in self._broadcasters.values():
+            broadcaster.stop()
+            for subscriber in broadcaster.subscribers:
+                subscriber.close()
+        self._broadcasters.clear()
+        self.subscribers = 0
+        if self._watcher is not None:
+            self._watcher.cancel()
+            tasks.append(self._watcher)
+            self._watcher = None
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+leaderboard_hub = LeaderboardHub()
+
+registry.register(Gauge("leaderboard_subscribers", "Open leaderboard SSE streams",
+                        collect=lambda: {(): float(leaderboard_hub.subscribers)}))
+registry.register(Gauge("leaderboard_broadcasters", "Competitions with at least one leaderboard subscriber",
+                        collect=lambda: {(): float(leaderboard_hub.broadcasters)}))
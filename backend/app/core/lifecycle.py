@@ -0,0 +1,157 @@
+# app/core/lifecycle.py
+# Шаги старта и остановки приложения (вызываются из lifespan в main.py).
+# Старт: досоздание новых таблиц и индексов, проверка схемы БД, заранее открытые соединения пула и посчитанная статистика результатов,
+# чтобы первые запросы после деплоя не платили за открытие SQLite, компиляцию SQL и холодный кэш страниц.
+# Во время работы: периодическая очистка (просроченные записи идемпотентности, уплотнение журнала изменений).
+# Остановка: потоки живой таблицы результатов закрываются, новые рассылки не принимаются, поставленные
+# дожидаются отправки (с дедлайном), движок и пул потоков криптографии закрываются.
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel, select
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def _schema_mismatches(sync_conn: Connection) -> List[str]:
+    inspector = inspect(sync_conn)
+    existing_tables = set(inspector.get_table_names())
+    problems = []
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            problems.append(f"missing table '{table.name}'")
+            continue
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [column.name for column in table.columns if column.name not in existing_columns]
+        if missing:
+            problems.append(f"table '{table.name}' is missing column(s) {', '.join(missing)}")
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing = sorted(index.name for index in table.indexes if index.name not in existing_indexes)
+        if missing:
+            problems.append(f"table '{table.name}' is missing index(es) {', '.join(missing)}")
+    return problems
+
+async def verify_schema(engine: AsyncEngine) -> None:
+    """
+    Сверяет таблицы, колонки и индексы БД с моделями. Миграций в проекте нет, поэтому "версия схемы" -
+    это набор колонок и индексов моделей: при расхождении приложение не стартует, а не падает на первых
+    запросах (или не работает медленно без индекса).
+    """
+    async with engine.connect() as conn:
+        problems = await conn.run_sync(_schema_mismatches)
+    if problems:
+        raise RuntimeError(
+            "Database schema does not match the models (run create_db.py or migrate the database): " + "; ".join(problems)
+        )
+
+async def warm_pool(engine: AsyncEngine) -> int:
+    """ Открывает pool_size соединений (одновременно, чтобы это были разные соединения) и возвращает их в пул. """
+    connections = []
+    try:
+        for _ in range(engine.pool.size()):
+            conn = await engine.connect()
+            connections.append(conn)
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            await conn.close()
+    return len(connections)
+
+async def warm_caches() -> None:
+    """
+    Заранее считает статистику результатов (единственное, что кэшируется в процессе, см. results_cache)
+    для нескольких последних опубликованных соревнований. Остальные запросы не прогреваются:
+    они не кэшируются, а пул соединений уже открыт warm_pool().
+    """
+    if settings.STARTUP_WARM_STATS <= 0:
+        return
+    from app.core.db import AsyncSessionFactory
+    from app.crud import crud_result
+    from app.models.competition import Competition, CompetitionStatusEnum
+
+    async with AsyncSessionFactory() as session:
+        published_ids = (await session.execute(
+            select(Competition.id)
+            .where(Competition.status == CompetitionStatusEnum.RESULTS_PUBLISHED)
+            .order_by(Competition.comp_end_at.desc())
+            .limit(settings.STARTUP_WARM_STATS)
+        )).scalars().all()
+        for competition_id in published_ids:
+            await crud_result.get_results_stats(session, competition_id=competition_id)
+
+async def run_maintenance() -> Dict[str, int]:
+    """ Один проход периодической очистки; возвращает число удаленных записей по видам. """
+    from app.core.db import AsyncSessionFactory
+    from app.crud import crud_change, crud_idempotency
+
+    async with AsyncSessionFactory() as session:
+        return {
+            "idempotency_records": await crud_idempotency.delete_expired(session),
+            "change_log_entries": await crud_change.compact(session, retention_seconds=settings.CHANGE_LOG_RETENTION_SECONDS),
+        }
+
+async def _maintenance_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await run_maintenance()
+        except Exception:
+            logger.exception("Maintenance pass failed")
+            continue
+        if any(removed.values()):
+            logger.info("Maintenance pass removed %d record(s)", sum(removed.values()), extra={"data": removed})
+
+_maintenance_task: Optional[asyncio.Task] = None
+
+async def startup() -> None:
+    global _maintenance_task
+    from app.core.db import async_engine
+    from app.core.notifications import notification_queue
+
+    started = time.perf_counter()
+    if settings.STARTUP_CREATE_MISSING:
+        # Только добавление: новые таблицы (журнал изменений, идемпотентность) и индексы. Новые колонки
+        # в существующих таблицах так не появятся - их поймает проверка схемы ниже
+        from app.core.db import create_db_and_tables
+        await create_db_and_tables()
+    if settings.STARTUP_VERIFY_SCHEMA:
+        await verify_schema(async_engine)
+    if settings.STARTUP_WARMUP:
+        connections = await warm_pool(async_engine)
+        await warm_caches()
+        logger.info(
+            "Warmup finished in %.0fms", (time.perf_counter() - started) * 1000,
+            extra={"data": {"pool_connections": connections}},
+        )
+    notification_queue.open()
+    if settings.MAINTENANCE_INTERVAL_SECONDS > 0:
+        _maintenance_task = asyncio.create_task(_maintenance_loop(settings.MAINTENANCE_INTERVAL_SECONDS))
+
+async def shutdown() -> None:
+    global _maintenance_task
+    from app.core import security
+    from app.core.db import async_engine
+    from app.core.leaderboard import leaderboard_hub
+    from app.core.notifications import notification_queue
+
+    await leaderboard_hub.close()
+    if _maintenance_task is not None:
+        _maintenance_task.cancel()
+        try:
+            await _maintenance_task
+        except asyncio.CancelledError:
+            pass
+        _maintenance_task = None
+    notification_queue.close()
+    pending = notification_queue.enqueued - notification_queue.sent - notification_queue.failed
+    if pending:
+        logger.info("Draining %d queued notification(s)", pending)
+    await notification_queue.drain(settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+    await async_engine.dispose()
+    security.shutdown_crypto_executor()
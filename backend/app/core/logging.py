@@ -0,0 +1,135 @@
+# app/core/logging.py
+# Структурированное логирование без блокировок цикла событий.
+# Обработчики приложения только кладут запись в очередь (QueueHandler), а форматирование
+# и запись в stdout делает фоновый поток QueueListener. Каждая запись несет request_id текущего запроса.
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.config import settings
+
+# Идентификатор текущего HTTP-запроса (выставляется RequestIdMiddleware)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+REQUEST_ID_HEADER = "x-request-id"
+
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Кладет запись в очередь с минимумом работы в вызывающем потоке: подставляет аргументы
+    в сообщение и запоминает request_id (contextvar доступен только здесь). Остальное - в потоке listener'а.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Трейсбек ссылается на кадры, которые к моменту форматирования в другом потоке уже изменятся
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """ Одна JSON-строка на запись. Дополнительные поля передаются через extra={"data": {...}}. """
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        data = getattr(record, "data", None)
+        if data:
+            entry.update(data)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """ Человекочитаемый формат для локальной разработки (LOG_JSON=false). """
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            line += f" request_id={request_id}"
+        data = getattr(record, "data", None)
+        if data:
+            line += " " + json.dumps(data, ensure_ascii=False, default=str)
+        return line
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def _output_handler() -> logging.Handler:
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if settings.LOG_JSON else TextFormatter())
+    return output
+
+def setup_logging() -> None:
+    """
+    Настраивает корневой логгер: очередь + фоновый поток записи, уровни из Settings.
+    Пока поток работает, повторный вызов ничего не делает; после shutdown_logging() запускает его заново.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    root = logging.getLogger()
+    root.handlers = [_ContextQueueHandler(log_queue)]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    # Уровни отдельных модулей, например {"app.slow_query": "WARNING", "sqlalchemy.engine": "INFO"}
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, _output_handler(), respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging() -> None:
+    """
+    Дописывает оставшиеся в очереди записи и останавливает поток. Корневой логгер дальше пишет
+    в stdout напрямую: очередь без потока никто не разбирает, и записи после остановки терялись бы.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logging.getLogger().handlers = [_output_handler()]
+
+class RequestIdMiddleware:
+    """ ASGI middleware: берет X-Request-ID из запроса (или генерирует) и возвращает его в ответе. """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(REQUEST_ID_HEADER.encode(), request_id.encode())]}
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
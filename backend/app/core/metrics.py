@@ -0,0 +1,270 @@
+# app/core/metrics.py
+# Метрики сервиса в текстовом формате Prometheus (эндпоинт /metrics).
+# Без внешних зависимостей: на горячем пути только поиск в словаре и bisect по границам бакетов,
+# а все, что можно посчитать в момент опроса (пул, кэш, очередь уведомлений), считается при рендере.
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS, CACHING_DISABLED, NO_CACHE_KEY, NO_DIALECT_SUPPORT
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+try:
+    from fastapi.routing import iter_route_contexts
+except ImportError: # FastAPI, в котором include_router копирует маршруты вместе с префиксом
+    iter_route_contexts = None
+
+from app.core.query_tracker import track_queries
+
+# Границы бакетов по умолчанию (секунды)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in self._values.items()]
+        return lines
+
+class Gauge:
+    """ Gauge со значением, которое либо выставляется, либо вычисляется функцией при опросе. """
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def render(self) -> List[str]:
+        values = self.collect() if self.collect is not None else self._values
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        lines += [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in values.items()]
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [счетчики по бакетам (последний - +Inf), сумма]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total[0]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# --- HTTP ---
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by method, route and status code", ("method", "route", "status")))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route", ("method", "route")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being processed"))
+
+# --- БД ---
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request", ("route",), buckets=QUERY_COUNT_BUCKETS))
+db_query_seconds_per_request = registry.register(Histogram(
+    "db_query_seconds_per_request", "Total SQL execution time per HTTP request", ("route",), buckets=DB_TIME_BUCKETS))
+db_pool_checkout_wait_seconds = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a connection from the pool", buckets=DB_TIME_BUCKETS))
+
+# --- Идемпотентные запросы ---
+idempotent_requests_total = registry.register(Counter(
+    "idempotent_requests_total", "Idempotent requests by operation and outcome (processed, replayed, in_progress, mismatch)",
+    ("operation", "outcome")))
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """ Пул соединений, замеряющий ожидание свободного соединения. """
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait_seconds.observe(time.perf_counter() - started)
+
+# Исход поиска скомпилированного запроса в кэше движка (ExecutionContext.cache_hit)
+_CACHE_OUTCOMES = {
+    CACHE_HIT: "hit", CACHE_MISS: "miss", CACHING_DISABLED: "disabled",
+    NO_CACHE_KEY: "no_cache_key", NO_DIALECT_SUPPORT: "no_dialect_support",
+}
+
+sqlalchemy_compiled_cache_lookups = registry.register(Counter(
+    "sqlalchemy_compiled_cache_lookups_total", "SQL compilation cache lookups by outcome", ("outcome",)))
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """
+    Состояние пула соединений и кэша скомпилированных запросов движка. Число и время запросов - в query_tracker.
+    miss после прогрева означает запрос, который строится заново с разной структурой (или literal-значениями).
+    """
+    pool = sync_engine.pool
+    def collect_pool() -> Dict[LabelValues, float]:
+        values = {("size",): float(pool.size())} if hasattr(pool, "size") else {}
+        if hasattr(pool, "checkedout"):
+            values[("checked_out",)] = float(pool.checkedout())
+            values[("overflow",)] = float(pool.overflow())
+            values[("checked_in",)] = float(pool.checkedin())
+        return values
+    registry.register(Gauge("db_pool_connections", "SQLAlchemy connection pool state", ("state",), collect=collect_pool))
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _count_cache_lookup(conn, cursor, statement, parameters, context, executemany):
+        outcome = _CACHE_OUTCOMES.get(getattr(context, "cache_hit", None))
+        if outcome is not None:
+            sqlalchemy_compiled_cache_lookups.inc(outcome)
+
+    # Публичного API у кэша нет - LRUCache движка (None, если query_cache_size=0)
+    compiled_cache = sync_engine._compiled_cache
+    registry.register(Gauge(
+        "sqlalchemy_compiled_cache_entries", "Compiled statements held in the engine cache",
+        collect=lambda: {(): float(len(compiled_cache)) if compiled_cache is not None else 0.0},
+    ))
+    registry.register(Gauge(
+        "sqlalchemy_compiled_cache_capacity", "Engine compiled statement cache size (query_cache_size)",
+        collect=lambda: {(): float(compiled_cache.capacity) if compiled_cache is not None else 0.0},
+    ))
+
+def register_app_collectors() -> None:
+    """ Метрики кэша и очереди уведомлений, считываемые в момент опроса. """
+    from app.core.cache import results_cache
+    from app.core.notifications import notification_queue
+
+    registry.register(Gauge("cache_entries", "Entries in in-process caches", ("cache",),
+                            collect=lambda: {(results_cache.name,): float(len(results_cache))}))
+    registry.register(Gauge("cache_lookups", "Cache lookups since start by outcome", ("cache", "outcome"),
+                            collect=lambda: {(results_cache.name, "hit"): float(results_cache.hits),
+                                             (results_cache.name, "miss"): float(results_cache.misses)}))
+    registry.register(Gauge("notification_queue_pending", "Notification jobs waiting in the queue",
+                            collect=lambda: {(): float(notification_queue.pending)}))
+    registry.register(Gauge("notification_messages", "Telegram notifications since start by outcome", ("outcome",),
+                            collect=lambda: {("enqueued",): float(notification_queue.enqueued),
+                                             ("sent",): float(notification_queue.sent),
+                                             ("failed",): float(notification_queue.failed),
+                                             ("rejected",): float(notification_queue.rejected)}))
+
+# Полный шаблон пути по id(маршрута): заполняется при первом запросе, маршруты живут столько же, сколько приложение
+_route_templates: Dict[int, str] = {}
+
+def _route_label(scope) -> str:
+    """
+    Шаблон пути (/api/v1/competitions/{competition_id}) вместо самого пути, чтобы не раздувать число серий.
+    Берется из path_format сработавшего маршрута (scope["route"]). Вложенные роутеры FastAPI не копируют
+    маршруты, и их path_format не содержит префикса - полный шаблон дают контексты маршрутов приложения.
+    """
+    route = scope.get("route")
+    if route is None or "endpoint" not in scope:
+        return "<unmatched>"
+    template = _route_templates.get(id(route))
+    if template is None:
+        if iter_route_contexts is not None and "app" in scope:
+            for context in iter_route_contexts(scope["app"].routes):
+                if context.path_format:
+                    _route_templates.setdefault(id(context.original_route), context.path_format)
+        template = _route_templates.setdefault(id(route), route.path_format)
+    return template
+
+# ASGI scope текущего HTTP-запроса: маршрут известен только после роутинга, поэтому вычисляется по требованию
+_current_scope: ContextVar[Optional[dict]] = ContextVar("current_request_scope", default=None)
+
+def current_route() -> Optional[str]:
+    """ Шаблон маршрута текущего HTTP-запроса (None вне запроса). """
+    scope = _current_scope.get()
+    return _route_label(scope) if scope is not None else None
+
+class MetricsMiddleware:
+    """ ASGI middleware: латентность, статусы и число запросов в работе, плюс SQL-статистика на запрос. """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        scope_token = _current_scope.set(scope)
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            with track_queries() as stats:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            _current_scope.reset(scope_token)
+            route = _route_label(scope)
+            method = scope["method"]
+            http_requests_total.inc(method, route, str(status_code))
+            http_request_duration_seconds.observe(elapsed, method, route)
+            db_queries_per_request.observe(stats.queries, route)
+            db_query_seconds_per_request.observe(stats.seconds, route)
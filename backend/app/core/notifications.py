@@ -0,0 +1,151 @@
+# app/core/notifications.py
+# Отправка уведомлений в Telegram в фоне.
+# Эндпоинты только ставят рассылку в очередь и сразу отвечают; отправляет один фоновый воркер,
+# соблюдая паузу между сообщениями, чтобы не упираться в лимиты Telegram Bot API.
+# httpx импортируется при запуске воркера: большинству процессов (миграции, CLI) он не нужен.
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class NotificationJob:
+    telegram_ids: Sequence[int]
+    message: str
+
+async def send_telegram_notifications(
+    client: httpx.AsyncClient, telegram_ids: Sequence[int], message: str, *, send_interval: float = 0.0,
+) -> int:
+    """ Отправляет сообщение указанным пользователям Telegram. Возвращает число успешно отправленных. """
+    import httpx
+    tg_api_url = f"/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
+    sent = 0
+    for tg_id in telegram_ids:
+        try:
+            # chat_id для личного сообщения совпадает с telegram_id пользователя
+            response = await client.post(tg_api_url, json={
+                "chat_id": tg_id,
+                "text": message,
+                "parse_mode": "HTML" # Или Markdown, если нужно форматирование
+            })
+            response.raise_for_status() # Проверка на HTTP ошибки
+            sent += 1
+        except httpx.HTTPStatusError as e:
+            logger.warning("Error sending notification to %s: %s - %s", tg_id, e.response.status_code, e.response.text)
+        except Exception:
+            logger.exception("Unexpected error sending notification to %s", tg_id)
+        if send_interval:
+            await asyncio.sleep(send_interval) # Небольшая пауза, чтобы не перегружать API Telegram
+    return sent
+
+class NotificationQueue:
+    """
+    Очередь рассылок с одним фоновым воркером. Воркер запускается лениво при первой постановке в очередь.
+    transport позволяет подменить Telegram API (например, httpx.MockTransport в бенчмарках).
+    """
+    def __init__(self, *, send_interval: float, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.send_interval = send_interval
+        self.transport = transport
+        self._queue: Optional[asyncio.Queue[NotificationJob]] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closed = False
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def configure(self, *, send_interval: Optional[float] = None, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        if send_interval is not None:
+            self.send_interval = send_interval
+        if transport is not None:
+            self.transport = transport
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        # Очередь и воркер привязаны к текущему event loop
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            # Пустой контекст: воркер живет дольше запроса, который его запустил (иначе унаследует его request_id)
+            self._worker = asyncio.create_task(self._run(self._queue), context=contextvars.Context())
+        return self._queue
+
+    def enqueue(self, telegram_ids: Sequence[int], message: str) -> bool:
+        """ Ставит рассылку в очередь, не дожидаясь отправки. False - очередь закрыта (приложение останавливается). """
+        if not telegram_ids:
+            return True
+        if self._closed:
+            self.rejected += len(telegram_ids)
+            logger.warning("Notification queue is closed, %d notification(s) rejected", len(telegram_ids))
+            return False
+        self._ensure_worker().put_nowait(NotificationJob(list(telegram_ids), message))
+        self.enqueued += len(telegram_ids)
+        return True
+
+    def open(self) -> None:
+        """ Снова принимать рассылки (при старте приложения). """
+        self._closed = False
+
+    def close(self) -> None:
+        """ Перестать принимать новые рассылки; уже поставленные будут отправлены воркером. """
+        self._closed = True
+
+    @property
+    def pending(self) -> int:
+        """ Сколько рассылок ждет в очереди. """
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def join(self) -> None:
+        """ Ждет, пока все поставленные рассылки будут обработаны. """
+        if self._queue is not None and self._worker is not None and not self._worker.done():
+            await self._queue.join()
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Ждет отправки поставленных рассылок не дольше timeout секунд и останавливает воркер.
+        Возвращает False, если не все успели уйти (остаток логируется и теряется).
+        """
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+            drained = True
+        except asyncio.TimeoutError:
+            dropped = self.enqueued - self.sent - self.failed
+            logger.warning("Notification drain timed out after %.1fs, %d notification(s) dropped", timeout, dropped)
+            drained = False
+        await self.stop()
+        return drained
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._queue = None
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        import httpx
+        async with httpx.AsyncClient(base_url=settings.TELEGRAM_API_URL, transport=self.transport) as client:
+            while True:
+                job = await queue.get()
+                try:
+                    sent = await send_telegram_notifications(
+                        client, job.telegram_ids, job.message, send_interval=self.send_interval
+                    )
+                    self.sent += sent
+                    self.failed += len(job.telegram_ids) - sent
+                    logger.info("Sent %d of %d notification(s)", sent, len(job.telegram_ids))
+                finally:
+                    queue.task_done()
+
+notification_queue = NotificationQueue(send_interval=settings.TELEGRAM_SEND_INTERVAL_SECONDS)
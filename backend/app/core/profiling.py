@@ -0,0 +1,180 @@
+# app/core/profiling.py
+# Сэмплирующий профилировщик для отдельных запросов и фоновый сбор горячих стеков.
+# Отдельный поток раз в интервал снимает стеки всех потоков (цикл событий и потоки aiosqlite)
+# и копит их в формате "folded stacks" (frame;frame;frame count) - его понимают flamegraph.pl и speedscope.
+# Профилируется стенное время процесса, поэтому в профиль попадает и параллельная работа других запросов.
+import asyncio
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core import security
+from app.core.config import settings
+
+# Кадры, в которых поток просто ждет работы: такие сэмплы не несут информации.
+# Файл целиком или файл:функция (воркеры пула потоков и aiosqlite ждут в C-коде очереди).
+_IDLE_FRAMES = {
+    "selectors.py", "threading.py", "queue.py",
+    "thread.py:_worker", "core.py:_connection_worker_thread",
+}
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+def _is_idle(frame) -> bool:
+    filename = os.path.basename(frame.f_code.co_filename)
+    return filename in _IDLE_FRAMES or f"{filename}:{frame.f_code.co_name}" in _IDLE_FRAMES
+
+def _folded_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+class StackSampler:
+    """
+    Снимает стеки потоков раз в interval секунд в отдельном потоке.
+    thread_ids=None - все потоки процесса, кроме самого сэмплера.
+    """
+    def __init__(self, *, interval: float, thread_ids: Optional[set] = None, skip_idle: bool = True):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.skip_idle = skip_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                if self.skip_idle and _is_idle(frame):
+                    continue
+                self.stacks[f"{thread_names.get(thread_id, thread_id)};{_folded_stack(frame)}"] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """ Стеки в формате flamegraph.pl: по строке на стек, число сэмплов в конце. """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+# --- Профилирование отдельного запроса ---
+
+async def is_profiling_authorized(headers: dict) -> bool:
+    """ Профиль может запросить бот (по API-ключу) или организатор (по JWT). """
+    if headers.get("x-bot-api-key") == settings.TELEGRAM_BOT_API_KEY:
+        return True
+    authorization = headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return False
+    payload = security.decode_access_token(authorization[7:])
+    if not payload or payload.get("sub") is None:
+        return False
+
+    from app.core.db import AsyncSessionFactory
+    from app.crud import crud_user
+    try:
+        telegram_id = int(payload["sub"])
+    except (TypeError, ValueError):
+        return False
+    async with AsyncSessionFactory() as session:
+        user = await crud_user.get_user_by_telegram_id(session, telegram_id=telegram_id)
+    return bool(user and user.is_organizer)
+
+def _profile_requested(scope) -> bool:
+    headers = dict(scope["headers"])
+    if headers.get(b"x-profile", b"").lower() in (b"1", b"true"):
+        return True
+    return re.search(rb"(^|&)profile=(1|true)(&|$)", scope.get("query_string", b"")) is not None
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware: запрос с заголовком X-Profile: 1 (или ?profile=1) от авторизованного вызывающего
+    выполняется под сэмплером; профиль сохраняется в PROFILE_DIR, имя файла - в заголовке X-Profile-Id.
+    Одновременно профилируется не больше одного запроса.
+    """
+    def __init__(self, app):
+        self.app = app
+        self._busy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        if self._busy:
+            await self.app(scope, receive, send)
+            return
+        # Флаг занимаем до проверки доступа (она ходит в БД): иначе два запроса успевают пройти ее одновременно
+        self._busy = True
+        try:
+            authorized = await is_profiling_authorized(headers)
+        except BaseException:
+            self._busy = False
+            raise
+        if not authorized:
+            self._busy = False
+            await self.app(scope, receive, send)
+            return
+
+        started_at = datetime.now(timezone.utc)
+        profile_id = f"{started_at:%Y%m%dT%H%M%S%f}-{scope['method']}{re.sub(r'[^A-Za-z0-9]+', '_', scope['path'])}.folded"
+        sampler = StackSampler(interval=settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            try:
+                # Остановка сэмплера ждет его поток, запись на диск блокирует - обе не в цикле событий
+                await asyncio.to_thread(sampler.stop)
+                await asyncio.to_thread(_write_profile, profile_id, sampler)
+            finally:
+                self._busy = False
+
+def _write_profile(profile_id: str, sampler: StackSampler) -> None:
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(settings.PROFILE_DIR, profile_id), "w", encoding="utf-8") as f:
+        f.write(sampler.folded())
+
+# --- Фоновое сэмплирование ---
+
+# Агрегированные горячие стеки цикла событий со всех запросов (None - выключено)
+background_sampler: Optional[StackSampler] = None
+
+def start_background_sampling() -> None:
+    """ Запускает фоновое сэмплирование текущего потока (цикла событий), если оно включено в настройках. """
+    global background_sampler
+    if settings.PROFILE_BACKGROUND_HZ <= 0 or background_sampler is not None:
+        return
+    background_sampler = StackSampler(interval=1 / settings.PROFILE_BACKGROUND_HZ, thread_ids={threading.get_ident()})
+    background_sampler.start()
+
+def stop_background_sampling() -> None:
+    global background_sampler
+    if background_sampler is not None:
+        background_sampler.stop()
+        background_sampler = None
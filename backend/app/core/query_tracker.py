@@ -0,0 +1,130 @@
+# app/core/query_tracker.py
+# Учет SQL-запросов в рамках HTTP-запроса: число, суммарное время и повторы одной и той же формы запроса (N+1).
+# Статистика копится в contextvar через события движка; track_queries() открывает область учета,
+# области вкладываются (запрос внутри assert_max_queries учитывается в обеих).
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# IN (?, ?, ?) разной длины - одна и та же форма запроса
+_PARAM_LIST = re.compile(r"\(\?(?:, \?)+\)")
+
+def statement_shape(statement: str) -> str:
+    """ Нормализованный текст запроса: без лишних пробелов и с одинаковыми списками параметров. """
+    return _PARAM_LIST.sub("(?, ...)", _WHITESPACE.sub(" ", statement).strip())
+
+class QueryStats:
+    __slots__ = ("queries", "seconds", "shapes", "flagged")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        # Формы запросов, превысившие порог повторов (о каждой предупреждаем один раз)
+        self.flagged: List[str] = []
+
+    def record(self, shape: str, seconds: float) -> None:
+        self.queries += 1
+        self.seconds += seconds
+        self.shapes[shape] += 1
+        if self.shapes[shape] == settings.QUERY_REPEAT_THRESHOLD + 1:
+            self.flagged.append(shape)
+
+    def repeated(self) -> Dict[str, int]:
+        """ Формы, выполненные больше QUERY_REPEAT_THRESHOLD раз. """
+        return {shape: self.shapes[shape] for shape in self.flagged}
+
+# Стек активных областей учета
+_active: ContextVar[Tuple[QueryStats, ...]] = ContextVar("query_stats", default=())
+
+def current_query_stats() -> "QueryStats | None":
+    """ Статистика самой внутренней активной области (обычно - текущего HTTP-запроса). """
+    active = _active.get()
+    return active[-1] if active else None
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """ Подписывает учет на события выполнения запросов движка. """
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        active = _active.get()
+        if not active:
+            return
+        elapsed = time.perf_counter() - context._query_started
+        shape = statement_shape(statement)
+        for stats in active:
+            stats.record(shape, elapsed)
+
+def log_repeated_queries(stats: QueryStats, route: str) -> None:
+    for shape, count in stats.repeated().items():
+        logger.warning(
+            "Possible N+1 on %s: statement executed %d times", route, count,
+            extra={"data": {"route": route, "count": count, "statement": shape}},
+        )
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Хелпер для тестов: падает, если внутри блока выполнено больше max_queries запросов.
+        with assert_max_queries(3):
+            await client.get("/api/v1/competitions/1")
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.queries > max_queries:
+        top = "\n".join(f"  {count}x {shape}" for shape, count in stats.shapes.most_common(5))
+        raise AssertionError(f"Expected at most {max_queries} queries, got {stats.queries}:\n{top}")
+
+class QueryStatsHeadersMiddleware:
+    """
+    ASGI middleware для не-production окружений: добавляет в ответ число запросов к БД и их время,
+    а также предупреждает в логе о повторах одной формы запроса (N+1).
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.queries).encode()))
+                    headers.append((b"x-db-query-time-ms", f"{stats.seconds * 1000:.2f}".encode()))
+                    if stats.flagged:
+                        headers.append((b"x-db-repeated-statements", str(len(stats.flagged)).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+        if stats.flagged:
+            # Шаблон маршрута, а не путь: предупреждения одного эндпоинта группируются, id в лог не попадают
+            from app.core.metrics import current_route # metrics сам импортирует этот модуль
+            log_repeated_queries(stats, current_route() or "<unmatched>")
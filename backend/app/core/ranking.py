@@ -0,0 +1,105 @@
+# app/core/ranking.py
+# Серверный расчет мест по result_value. Значения разбираются в числа один раз,
+# а места считаются одной векторной операцией NumPy по всему соревнованию.
+# NumPy импортируется при первом расчете, а не при старте приложения (модуль нужен эндпоинтам ради enum'ов).
+from __future__ import annotations
+
+import math
+import re
+from enum import Enum
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Как интерпретировать текстовое result_value
+class RankValueType(str, Enum):
+    NUMBER = 'number'      # "12.5", "12,5"
+    DURATION = 'duration'  # "1:02:03.5", "02:03", "75.3" (секунды)
+    SCORE = 'score'        # "42", "42/50", "42 pts" - берем набранные баллы
+
+# Какое значение лучше
+class RankDirection(str, Enum):
+    ASC = 'asc'    # меньше - лучше (время)
+    DESC = 'desc'  # больше - лучше (баллы)
+
+# Как делить места при равенстве
+class RankMethod(str, Enum):
+    STANDARD = 'standard'  # "1224": после двух вторых мест идет четвертое
+    DENSE = 'dense'        # "1223": места идут подряд
+
+_SCORE_RE = re.compile(r'\s*([-+]?\d+(?:[.,]\d+)?)')
+
+def _parse_number(value: str) -> float:
+    return float(value.strip().replace(',', '.'))
+
+def _parse_duration(value: str) -> float:
+    parts = value.strip().replace(',', '.').split(':')
+    if len(parts) > 3:
+        raise ValueError(value)
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def _parse_score(value: str) -> float:
+    match = _SCORE_RE.match(value)
+    if not match:
+        raise ValueError(value)
+    return float(match.group(1).replace(',', '.'))
+
+_PARSERS: Dict[RankValueType, Callable[[str], float]] = {
+    RankValueType.NUMBER: _parse_number,
+    RankValueType.DURATION: _parse_duration,
+    RankValueType.SCORE: _parse_score,
+}
+
+def parse_result_value(value: Optional[str], value_type: RankValueType) -> float:
+    """ Разбирает одно значение результата. Возвращает NaN, если значение пустое или не разбирается. """
+    if not value:
+        return math.nan
+    try:
+        parsed = _PARSERS[value_type](value)
+    except ValueError:
+        return math.nan
+    return parsed if math.isfinite(parsed) else math.nan
+
+def parse_result_values(values: Sequence[Optional[str]], value_type: RankValueType) -> np.ndarray:
+    """ Разбирает список значений в массив float64 (NaN для неразобранных). """
+    import numpy as np
+    if value_type == RankValueType.NUMBER:
+        # Быстрый путь: NumPy сам приводит строки к float, если все значения - числа
+        try:
+            parsed = np.array([value.replace(',', '.') if value else 'nan' for value in values], dtype=np.float64)
+        except ValueError:
+            pass # Есть неразбираемые значения - разбираем поштучно ниже
+        else:
+            parsed[~np.isfinite(parsed)] = np.nan
+            return parsed
+    return np.fromiter(
+        (parse_result_value(value, value_type) for value in values),
+        dtype=np.float64,
+        count=len(values),
+    )
+
+def compute_ranks(
+    keys: np.ndarray, *, direction: RankDirection = RankDirection.ASC, method: RankMethod = RankMethod.STANDARD
+) -> np.ndarray:
+    """
+    Считает места для массива значений одной векторной операцией.
+    Возвращает массив int64 той же длины; 0 - у значения нет места (NaN).
+    """
+    import numpy as np
+    ranks = np.zeros(len(keys), dtype=np.int64)
+    valid = ~np.isnan(keys)
+    values = keys[valid]
+    if direction == RankDirection.DESC:
+        values = -values
+
+    if method == RankMethod.DENSE:
+        # Место = номер значения среди уникальных
+        ranks[valid] = np.searchsorted(np.unique(values), values) + 1
+    else:
+        # Место = 1 + количество строго лучших значений
+        ranks[valid] = np.searchsorted(np.sort(values), values, side='left') + 1
+    return ranks
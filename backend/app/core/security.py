@@ -1,18 +1,50 @@
 # app/core/security.py
 # Твой код здесь подходит. Убедись, что SECRET_KEY берется из config.
+import asyncio
+import hashlib
+import hmac
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from functools import lru_cache, partial
+from typing import Any, Callable, Mapping, TypeVar
 
 import jwt # из PyJWT или python-jose, убедись что зависимость верная
-from passlib.context import CryptContext
 
 from app.core.config import settings
 
-# Используем bcrypt как рекомендуемый
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """ Контекст passlib создается при первой проверке пароля: вход по паролю редкий, а импорт passlib небыстрый. """
+    from passlib.context import CryptContext
+    # Используем bcrypt как рекомендуемый
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 ALGORITHM = "HS256"
 
+T = TypeVar("T")
+
+# --- Пул потоков для криптографии ---
+# bcrypt держит поток сотни миллисекунд: вызванный прямо в обработчике, он останавливает цикл событий
+# и все остальные запросы. Async-варианты функций ниже выполняют работу в отдельном ограниченном пуле
+# (bcrypt и hashlib отпускают GIL, так что потоки пула действительно работают параллельно с циклом).
+# Выпуск и проверка JWT (HS256) - десятки микросекунд, их в пул не отправляем: проверка есть в каждом
+# запросе с авторизацией, выпуск - в каждом входе, и во время всплеска входов они стояли бы в очереди за bcrypt.
+
+@lru_cache(maxsize=None)
+def get_crypto_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=settings.CRYPTO_MAX_WORKERS, thread_name_prefix="crypto")
+
+async def run_in_crypto_pool(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """ Выполняет func в пуле криптографии; больше CRYPTO_MAX_WORKERS вызовов сразу ждут в очереди пула. """
+    return await asyncio.get_running_loop().run_in_executor(get_crypto_executor(), partial(func, *args, **kwargs))
+
+def shutdown_crypto_executor() -> None:
+    """ Останавливает пул при остановке приложения (следующий вызов создаст новый). """
+    if get_crypto_executor.cache_info().currsize:
+        get_crypto_executor().shutdown(wait=False, cancel_futures=True)
+        get_crypto_executor.cache_clear()
+
 def create_access_token(subject: str | Any, expires_delta: timedelta | None = None) -> str:
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -29,13 +61,13 @@ def create_access_token(subject: str | Any, expires_delta: timedelta | None = No
 # Эти функции нужны, только если будет альтернативный вход по паролю
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """ Проверяет пароль """
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """ Хэширует пароль """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
-# Функция для декодирования токена (добавим, понадобится в deps.py)
+# Функция для декодирования токена (deps.py); дешевая, вызывается прямо в обработчике
 def decode_access_token(token: str) -> dict[str, Any] | None:
     try:
         payload = jwt.decode(
@@ -47,4 +79,40 @@ def decode_access_token(token: str) -> dict[str, Any] | None:
         return None
     except jwt.InvalidTokenError:
         # Обработка невалидного токена
-        return None
\ No newline at end of file
+        return None
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_in_crypto_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await run_in_crypto_pool(get_password_hash, password)
+
+# --- Подпись данных входа через Telegram ---
+# https://core.telegram.org/widgets/login#checking-authorization
+
+@lru_cache(maxsize=None)
+def get_telegram_login_secret() -> bytes:
+    """ Ключ проверки - SHA-256 от токена бота; считается один раз. """
+    return hashlib.sha256(settings.TELEGRAM_BOT_TOKEN.encode()).digest()
+
+def telegram_login_hash(data: Mapping[str, Any]) -> str:
+    """ HMAC-SHA256 строки проверки: все поля, кроме hash, как "key=value" по алфавиту через перевод строки. """
+    data_check_string = "\n".join(f"{key}={data[key]}" for key in sorted(data) if key != "hash")
+    return hmac.new(get_telegram_login_secret(), data_check_string.encode(), hashlib.sha256).hexdigest()
+
+def verify_telegram_login(data: Mapping[str, Any]) -> bool:
+    """ Подпись верна и данные входа не старше TELEGRAM_LOGIN_MAX_AGE_SECONDS (защита от повтора старых данных). """
+    received = data.get("hash")
+    if not isinstance(received, str):
+        return False
+    if settings.TELEGRAM_LOGIN_MAX_AGE_SECONDS > 0:
+        try:
+            auth_date = int(data.get("auth_date"))
+        except (TypeError, ValueError):
+            return False
+        if time.time() - auth_date > settings.TELEGRAM_LOGIN_MAX_AGE_SECONDS:
+            return False
+    return hmac.compare_digest(received, telegram_login_hash(data))
+
+async def verify_telegram_login_async(data: Mapping[str, Any]) -> bool:
+    return await run_in_crypto_pool(verify_telegram_login, dict(data))
\ No newline at end of file
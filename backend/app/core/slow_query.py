@@ -0,0 +1,90 @@
+# app/core/slow_query.py
+# Журнал медленных SQL-запросов: каждый запрос дольше порога пишется одной JSON-строкой
+# (нормализованный SQL, типы параметров без значений, длительность, маршрут и план запроса) -
+# поля записи передаются в JSON-формат логов (app/core/logging.py).
+# EXPLAIN QUERY PLAN снимается один раз на форму запроса и кэшируется.
+import logging
+import time
+from collections.abc import Sized
+from itertools import islice
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import current_route
+from app.core.query_tracker import statement_shape
+
+logger = logging.getLogger("app.slow_query")
+
+# Сколько планов хранить (по одному на форму запроса)
+PLAN_CACHE_SIZE = 512
+_plan_cache: Dict[str, Optional[List[str]]] = {}
+
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+# Сколько наборов параметров executemany попадает в запись журнала (остальные - только их число)
+LOGGED_PARAMETER_SETS = 3
+
+def redact_parameters(parameters: Any, executemany: bool) -> Any:
+    """ Вместо значений - только их типы: в параметрах бывают telegram_id и персональные данные. """
+    if executemany:
+        # Без копии списка: в загрузке результатов это десятки тысяч наборов, нужны только первые
+        sample = [redact_parameters(row, False) for row in islice(parameters, LOGGED_PARAMETER_SETS)]
+        return {"rows": len(parameters) if isinstance(parameters, Sized) else None, "first": sample}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+def _explain(conn, statement: str, parameters: Any, executemany: bool) -> Optional[List[str]]:
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    if executemany:
+        parameters = next(iter(parameters), ())
+    # Отдельный курсор на том же DBAPI-соединении: не проходит через события движка и не трогает основной курсор
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in cursor.fetchall()] # Последняя колонка - описание шага плана
+    except Exception as e:
+        return [f"<explain failed: {e}>"]
+    finally:
+        cursor.close()
+
+def _query_plan(conn, shape: str, statement: str, parameters: Any, executemany: bool) -> Optional[List[str]]:
+    if shape in _plan_cache:
+        return _plan_cache[shape]
+    plan = _explain(conn, statement, parameters, executemany)
+    if len(_plan_cache) >= PLAN_CACHE_SIZE:
+        _plan_cache.pop(next(iter(_plan_cache)))
+    _plan_cache[shape] = plan
+    return plan
+
+def install_slow_query_log(sync_engine: Engine, *, threshold_ms: float, explain: bool = True) -> None:
+    """ Подписывает журнал медленных запросов на события движка. threshold_ms <= 0 - журнал выключен. """
+    if threshold_ms <= 0:
+        return
+    threshold = threshold_ms / 1000
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._slow_query_started
+        if elapsed < threshold:
+            return
+        shape = statement_shape(statement)
+        entry = {
+            "duration_ms": round(elapsed * 1000, 2),
+            "route": current_route(),
+            "statement": shape,
+            "parameters": redact_parameters(parameters, executemany),
+            "executemany": executemany,
+        }
+        if explain:
+            entry["plan"] = _query_plan(conn, shape, statement, parameters, executemany)
+        logger.warning("Slow query (%.1fms)", elapsed * 1000, extra={"data": entry})
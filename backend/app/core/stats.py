@@ -0,0 +1,34 @@
+# app/core/stats.py
+# Векторный расчет распределения результатов соревнования (NumPy).
+from typing import Dict
+
+import numpy as np
+
+# Перцентили, которые отдаем в статистике
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95, 99)
+
+def compute_distribution(values: np.ndarray, *, bins: int = 20) -> Dict[str, object]:
+    """
+    Считает min/max/mean/median/std, перцентили и гистограмму по массиву float64.
+    NaN (неразобранные значения) отбрасываются. Возвращает словарь под модель ResultStats.
+    """
+    numeric = values[~np.isnan(values)]
+    stats: Dict[str, object] = {"count": int(values.size), "numeric_count": int(numeric.size)}
+    if numeric.size == 0:
+        return stats
+
+    percentile_values = np.percentile(numeric, PERCENTILES)
+    counts, edges = np.histogram(numeric, bins=bins)
+    stats.update(
+        min=float(numeric.min()),
+        max=float(numeric.max()),
+        mean=float(numeric.mean()),
+        median=float(percentile_values[PERCENTILES.index(50)]),
+        std=float(numeric.std()),
+        percentiles={f"p{p}": float(v) for p, v in zip(PERCENTILES, percentile_values)},
+        histogram=[
+            {"lower": float(edges[i]), "upper": float(edges[i + 1]), "count": int(counts[i])}
+            for i in range(len(counts))
+        ],
+    )
+    return stats
@@ -1,8 +1,18 @@
-# app/crud/base.py (Опционально, можно обойтись без него для MVP)
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+# app/crud/base.py
+# Общий слой доступа к данным: выборка пачкой по списку ключей (IN), массовые upsert и удаление
+# кусками, и DataLoader в рамках запроса - get() разных корутин в одном такте цикла событий
+# сливаются в один IN-запрос, а повторный get() того же ключа не ходит в БД.
+import asyncio
+from typing import (
+    Any, Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple, Type,
+    TypeVar, Union,
+)
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import bindparam, delete, or_, tuple_
+from sqlalchemy.sql import Select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlmodel import SQLModel, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -11,22 +21,240 @@ ModelType = TypeVar("ModelType", bound=SQLModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
-# Базовый класс с общими операциями - пока не используется в примерах ниже
+# Ключ выборки: имя колонки или кортеж имен для составного ключа (например, ("user_id", "competition_id"))
+KeyColumns = Union[str, Tuple[str, ...]]
+
+# Сколько значений в одном IN / одном executemany: с запасом ниже лимита переменных SQLite
+CHUNK_SIZE = 500
+
+def _chunks(items: Sequence[Any], size: int) -> Iterable[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class DataLoader:
+    """
+    Собирает ключи, запрошенные в одном такте цикла событий, и загружает их одним вызовом batch_load.
+    Найденные объекты запоминаются до конца жизни загрузчика (то есть сессии запроса); отсутствие - нет,
+    чтобы объект, созданный позже в том же запросе, был найден.
+    """
+    def __init__(self, batch_load: Callable[[List[Hashable]], Awaitable[Mapping[Hashable, Any]]]):
+        self._batch_load = batch_load
+        self._cache: Dict[Hashable, asyncio.Future] = {}
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        # Сессия не допускает параллельных запросов - пачки выполняются по очереди
+        self._lock = asyncio.Lock()
+        self.batches = 0
+
+    def load(self, key: Hashable) -> Awaitable[Any]:
+        future = self._cache.get(key)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending:
+            # Пачка уходит после того, как отработают все корутины, готовые в этом такте
+            loop.call_soon(self._dispatch)
+        self._cache[key] = future
+        self._pending[key] = future
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        """ Запоминает уже загруженный объект (например, только что созданный). """
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._cache[key] = future
+
+    def clear(self, key: Optional[Hashable] = None) -> None:
+        """ Забывает ключ (или все ключи) - после записи в обход ORM или удаления. """
+        if key is None:
+            self._cache = {key: future for key, future in self._cache.items() if not future.done()}
+        elif key in self._cache and self._cache[key].done():
+            del self._cache[key]
+
+    def _dispatch(self) -> None:
+        batch, self._pending = self._pending, {}
+        asyncio.get_running_loop().create_task(self._flush(batch))
+
+    async def _flush(self, batch: Dict[Hashable, asyncio.Future]) -> None:
+        try:
+            async with self._lock:
+                self.batches += 1
+                found = await self._batch_load(list(batch))
+        except BaseException as e:
+            for key, future in batch.items():
+                self._cache.pop(key, None)
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        for key, future in batch.items():
+            value = found.get(key)
+            if value is None:
+                self._cache.pop(key, None)
+            if not future.done():
+                future.set_result(value)
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+    def __init__(self, model: Type[ModelType], *, load_options: Sequence[Any] = ()):
         self.model = model
+        # Опции загрузки для всех выборок get/get_many (например, selectinload связей)
+        self.load_options = tuple(load_options)
+        primary_key = tuple(column.name for column in model.__table__.primary_key.columns)
+        self.primary_key: KeyColumns = primary_key[0] if len(primary_key) == 1 else primary_key
+        # Готовые запросы get_many по ключу: один объект запроса на все вызовы, поэтому SQLAlchemy
+        # не пересчитывает ключ кэша компиляции (он запоминается в самом объекте)
+        self._get_many_statements: Dict[KeyColumns, Select] = {}
 
-    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
-        statement = select(self.model).where(self.model.id == id)
-        result = await db.execute(statement)
-        return result.scalar_one_or_none()
+    # --- Ключи ---
+
+    def _key_expression(self, by: KeyColumns):
+        if isinstance(by, tuple):
+            return tuple_(*(getattr(self.model, name) for name in by))
+        return getattr(self.model, by)
+
+    @staticmethod
+    def _key_of(obj: Any, by: KeyColumns) -> Hashable:
+        if isinstance(by, tuple):
+            return tuple(getattr(obj, name) for name in by)
+        return getattr(obj, by)
+
+    def _get_many_statement(self, by: KeyColumns) -> Select:
+        statement = self._get_many_statements.get(by)
+        if statement is None:
+            statement = self._get_many_statements[by] = (
+                select(self.model)
+                .where(self._key_expression(by).in_(bindparam("keys", expanding=True)))
+                .options(*self.load_options)
+            )
+        return statement
+
+    # --- Чтение ---
+
+    def loader(self, db: AsyncSession, *, by: Optional[KeyColumns] = None) -> DataLoader:
+        """ DataLoader модели по ключу by, общий для всей сессии (сессия живет один запрос). """
+        by = by or self.primary_key
+        cache_key = ("crud_loader", self.model, by)
+        loader = db.info.get(cache_key)
+        if loader is None:
+            loader = db.info[cache_key] = DataLoader(lambda keys: self.get_many(db, keys, by=by))
+        return loader
+
+    async def get(self, db: AsyncSession, id: Any, *, by: Optional[KeyColumns] = None) -> Optional[ModelType]:
+        """ Один объект по ключу (по умолчанию - первичному) через DataLoader сессии. """
+        return await self.loader(db, by=by).load(id)
+
+    async def get_many(
+        self, db: AsyncSession, keys: Iterable[Any], *, by: Optional[KeyColumns] = None
+    ) -> Dict[Any, ModelType]:
+        """ Объекты по списку ключей: словарь ключ -> объект, ненайденных ключей в нем нет. По IN-запросу на CHUNK_SIZE ключей. """
+        by = by or self.primary_key
+        keys = list(dict.fromkeys(keys))
+        found: Dict[Any, ModelType] = {}
+        statement = self._get_many_statement(by)
+        for chunk in _chunks(keys, CHUNK_SIZE):
+            for obj in (await db.execute(statement, {"keys": list(chunk)})).scalars():
+                found[self._key_of(obj, by)] = obj
+        return found
 
     async def get_multi(
         self, db: AsyncSession, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
-        statement = select(self.model).offset(skip).limit(limit)
+        statement = select(self.model).offset(skip).limit(limit).options(*self.load_options)
         result = await db.execute(statement)
-        return result.all()
+        return result.scalars().all()
+
+    # --- Запись ---
+
+    def _clear_loaders(self, db: AsyncSession) -> None:
+        for cache_key, loader in db.info.items():
+            if isinstance(cache_key, tuple) and cache_key[:2] == ("crud_loader", self.model):
+                loader.clear()
+
+    def _with_defaults(self, row: Mapping[str, Any]) -> Dict[str, Any]:
+        """ Core INSERT не знает о default_factory моделей - подставляем значения по умолчанию сами. """
+        values = dict(row)
+        for name, field in self.model.model_fields.items():
+            if name in values or name not in self.model.__table__.c:
+                continue
+            if field.default_factory is not None:
+                values[name] = field.default_factory()
+            elif field.default is not None and not field.is_required():
+                values[name] = field.default
+        return values
+
+    async def upsert_many(
+        self, db: AsyncSession, rows: Sequence[Mapping[str, Any]], *,
+        conflict: Sequence[str], update: Optional[Sequence[str]] = None, commit: bool = True,
+    ) -> int:
+        """
+        INSERT ... ON CONFLICT (conflict) DO UPDATE пачками по CHUNK_SIZE строк в одной транзакции.
+        update - колонки, которые перезаписываются у существующих строк (по умолчанию все переданные,
+        кроме ключа конфликта). Возвращает число обработанных строк.
+        """
+        if not rows:
+            return 0
+        rows = [self._with_defaults(row) for row in rows]
+        if update is None:
+            update = [name for name in rows[0] if name not in conflict and name != self.primary_key]
+        statement = sqlite_insert(self.model.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(conflict), set_={name: statement.excluded[name] for name in update},
+        )
+        for chunk in _chunks(rows, CHUNK_SIZE):
+            await db.execute(statement, list(chunk))
+        if commit:
+            await db.commit()
+        self._clear_loaders(db)
+        return len(rows)
+
+    async def upsert(
+        self, db: AsyncSession, values: Mapping[str, Any], *,
+        conflict: Sequence[str], update: Sequence[str], touch: Sequence[str] = (), commit: bool = True,
+    ) -> Optional[ModelType]:
+        """
+        Один атомарный INSERT ... ON CONFLICT (conflict) DO UPDATE ... WHERE <изменилась хотя бы одна колонка update>
+        RETURNING. Колонки touch (например, updated_at) пишутся только вместе с реальным обновлением.
+        Возвращает вставленную или обновленную строку; None - строка уже была и не изменилась (записи не было).
+        """
+        values = self._with_defaults(values)
+        table = self.model.__table__
+        statement = sqlite_insert(self.model).values(values)
+        if update:
+            statement = statement.on_conflict_do_update(
+                index_elements=list(conflict),
+                set_={name: statement.excluded[name] for name in (*update, *touch)},
+                where=or_(*(table.c[name].is_distinct_from(statement.excluded[name]) for name in update)),
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=list(conflict))
+        statement = statement.returning(self.model).execution_options(populate_existing=True)
+        obj = (await db.execute(statement)).scalars().one_or_none()
+        if commit:
+            await db.commit()
+        self._clear_loaders(db)
+        return obj
+
+    async def delete_many(
+        self, db: AsyncSession, keys: Iterable[Any], *, by: Optional[KeyColumns] = None, commit: bool = True,
+    ) -> int:
+        """ Удаляет строки по списку ключей (IN-запрос на CHUNK_SIZE ключей). Возвращает число удаленных строк. """
+        by = by or self.primary_key
+        keys = list(dict.fromkeys(keys))
+        deleted = 0
+        key_expression = self._key_expression(by)
+        for chunk in _chunks(keys, CHUNK_SIZE):
+            result = await db.execute(
+                delete(self.model).where(key_expression.in_(chunk)).execution_options(synchronize_session="fetch")
+            )
+            deleted += result.rowcount
+        if commit:
+            await db.commit()
+        self._clear_loaders(db)
+        return deleted
 
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
@@ -56,9 +284,10 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         await db.refresh(db_obj)
         return db_obj
 
-    async def remove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+    async def remove(self, db: AsyncSession, *, id: Any) -> Optional[ModelType]:
         obj = await self.get(db, id)
         if obj:
             await db.delete(obj)
             await db.commit()
-        return obj
\ No newline at end of file
+            self._clear_loaders(db)
+        return obj
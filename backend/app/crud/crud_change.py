@@ -0,0 +1,75 @@
+# app/crud/crud_change.py
+from datetime import timedelta
+from typing import Optional
+from sqlalchemy import delete, exists, func, insert
+from sqlalchemy.orm import aliased
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.clock import utcnow
+from app.core.change_feed import CHANGES_PENDING
+from app.models.change import ChangeEntity, ChangeFeed, ChangeLogEntry, ChangeOp, ChangeRead
+
+# Core INSERT без ORM-объекта: запись журнала не проходит через unit of work сессии
+_insert_statement = insert(ChangeLogEntry.__table__)
+
+async def record(
+    db: AsyncSession, entity: ChangeEntity, *, competition_id: int,
+    user_id: Optional[int] = None, op: ChangeOp = ChangeOp.UPSERT,
+) -> None:
+    """
+    Пишет запись журнала в текущую транзакцию сессии: она будет зафиксирована тем же коммитом,
+    что и само изменение (или откатится вместе с ним). Вызывать до commit().
+    """
+    await db.execute(_insert_statement, {
+        "entity": entity, "op": op, "competition_id": competition_id, "user_id": user_id, "created_at": utcnow(),
+    })
+    db.info[CHANGES_PENDING] = True
+
+_changes_statement = (
+    select(
+        ChangeLogEntry.seq, ChangeLogEntry.entity, ChangeLogEntry.op,
+        ChangeLogEntry.competition_id, ChangeLogEntry.user_id,
+    )
+    .order_by(ChangeLogEntry.seq)
+)
+
+async def get_changes_since(db: AsyncSession, *, since: int, limit: int = 500) -> ChangeFeed:
+    """ Изменения с seq > since по возрастанию, не больше limit (без ORM-объектов). """
+    rows = (await db.execute(_changes_statement.where(ChangeLogEntry.seq > since).limit(limit + 1))).all()
+    changes = [ChangeRead.model_validate(row._mapping) for row in rows[:limit]]
+    return ChangeFeed(changes=changes, last_seq=changes[-1].seq if changes else since, has_more=len(rows) > limit)
+
+async def get_last_seq(db: AsyncSession) -> int:
+    """ Номер последней записи журнала (0 - журнал пуст). """
+    return (await db.execute(select(func.max(ChangeLogEntry.seq)))).scalar() or 0
+
+async def get_entity_seq(db: AsyncSession, entity: ChangeEntity, *, competition_id: int) -> int:
+    """
+    Номер последней записи журнала об объекте без user_id (соревнование, результаты соревнования); 0 - записей нет.
+    Уплотнение последнюю запись объекта не удаляет, так что номер годится как версия данных для кэшей.
+    """
+    statement = select(func.max(ChangeLogEntry.seq)).where(
+        ChangeLogEntry.entity == entity, ChangeLogEntry.competition_id == competition_id, ChangeLogEntry.user_id.is_(None),
+    )
+    return (await db.execute(statement)).scalar() or 0
+
+async def compact(db: AsyncSession, *, retention_seconds: float) -> int:
+    """
+    Уплотняет журнал: записи старше retention_seconds удаляются, если у того же объекта
+    (entity, competition_id, user_id) есть более новая запись. Последняя запись каждого объекта остается,
+    поэтому клиент, давно не синхронизировавшийся, все равно получает итоговое состояние.
+    """
+    newer = aliased(ChangeLogEntry)
+    statement = delete(ChangeLogEntry).where(
+        ChangeLogEntry.created_at < utcnow() - timedelta(seconds=retention_seconds),
+        exists().where(
+            newer.entity == ChangeLogEntry.entity,
+            newer.competition_id == ChangeLogEntry.competition_id,
+            newer.user_id.is_not_distinct_from(ChangeLogEntry.user_id),
+            newer.seq > ChangeLogEntry.seq,
+        ),
+    ).execution_options(synchronize_session=False)
+    deleted = (await db.execute(statement)).rowcount
+    await db.commit()
+    return deleted
@@ -1,43 +1,70 @@
 # app/crud/crud_competition.py
-from typing import Optional, List, Sequence
+from typing import Any, Dict, Iterable, Optional, List, Sequence, Union
 from sqlmodel import select
+from sqlalchemy.sql import Select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import selectinload # Для жадной загрузки связей
 # Добавим datetime для фильтрации по дате, если нужно будет раскомментировать
 # from datetime import datetime 
 
 from app.models.user import User
+from app.models.change import ChangeEntity
 from app.models.competition import Competition, CompetitionCreate, CompetitionUpdate, CompetitionStatusEnum
+from . import crud_change
+from .base import CRUDBase
+
+class CRUDCompetition(CRUDBase[Competition, CompetitionCreate, CompetitionUpdate]):
+    pass
+
+# Загружаем организатора сразу, чтобы избежать доп. запросов (N+1 problem)
+competition = CRUDCompetition(Competition, load_options=(selectinload(Competition.organizer),))
+
+# Списки соревнований: ORM-объекты или, при fields, строки-словари только с этими колонками
+CompetitionRows = Union[Sequence[Competition], List[Dict[str, Any]]]
 
 async def get_competition(db: AsyncSession, competition_id: int) -> Optional[Competition]:
-    # Загружаем организатора сразу, чтобы избежать доп. запросов (N+1 problem)
-    statement = select(Competition).where(Competition.id == competition_id).options(selectinload(Competition.organizer))
-    # Используем execute и scalars().first() для AsyncSession
+    return await competition.get(db, competition_id)
+
+async def get_competition_status(db: AsyncSession, competition_id: int) -> Optional[CompetitionStatusEnum]:
+    """ Только статус соревнования, без загрузки объекта и организатора (None - соревнования нет) """
+    return (await db.execute(select(Competition.status).where(Competition.id == competition_id))).scalar_one_or_none()
+
+async def get_competitions_by_ids(db: AsyncSession, competition_ids: Iterable[int]) -> Dict[int, Competition]:
+    """ Соревнования (с организаторами) по списку id: id -> Competition """
+    return await competition.get_many(db, competition_ids)
+
+def _select_competitions(fields: Optional[Sequence[str]]) -> Select:
+    """ select(Competition) или, при fields, только эти колонки (разреженный ответ, без ORM-объектов) """
+    if fields:
+        return select(*(Competition.__table__.c[name] for name in fields))
+    return select(Competition)
+
+async def _fetch(db: AsyncSession, statement: Select, fields: Optional[Sequence[str]]) -> CompetitionRows:
     result = await db.execute(statement)
-    return result.scalar_one_or_none()
+    return [dict(row) for row in result.mappings()] if fields else result.scalars().all()
 
 async def get_competitions(
     db: AsyncSession, *, skip: int = 0, limit: int = 100,
     status: Optional[CompetitionStatusEnum] = None, # Пример фильтра
-    include_past: bool = False # Пример флага для фильтрации по дате
+    statuses: Optional[Sequence[CompetitionStatusEnum]] = None, # Фильтр по нескольким статусам
+    include_past: bool = False, # Пример флага для фильтрации по дате
+    fields: Optional[Sequence[str]] = None, # Только эти колонки: вместо объектов - строки-словари
     # TODO: Добавить сортировку по дате
-) -> Sequence[Competition]:
-    statement = select(Competition).offset(skip).limit(limit).order_by(Competition.comp_start_at) # Сортировка по дате начала
+) -> CompetitionRows:
+    statement = _select_competitions(fields).offset(skip).limit(limit).order_by(Competition.comp_start_at) # Сортировка по дате начала
     if status:
         statement = statement.where(Competition.status == status)
+    if statuses:
+        statement = statement.where(Competition.status.in_(statuses))
     # if not include_past: # Логика для фильтрации по дате (сравнение с datetime.utcnow())
     #    statement = statement.where(Competition.comp_end_at >= datetime.utcnow())
-    # Используем execute и scalars().all() для AsyncSession
-    result = await db.execute(statement)
-    return result.scalars().all()
+    return await _fetch(db, statement, fields)
 
 async def get_competitions_by_organizer(
-    db: AsyncSession, *, organizer_id: int, skip: int = 0, limit: int = 100
-) -> Sequence[Competition]:
-    statement = select(Competition).where(Competition.organizer_id == organizer_id).offset(skip).limit(limit).order_by(Competition.created_at.desc())
-    # Используем execute и scalars().all() для AsyncSession
-    result = await db.execute(statement)
-    return result.scalars().all()
+    db: AsyncSession, *, organizer_id: int, skip: int = 0, limit: int = 100, fields: Optional[Sequence[str]] = None,
+) -> CompetitionRows:
+    statement = _select_competitions(fields).where(Competition.organizer_id == organizer_id).offset(skip).limit(limit).order_by(Competition.created_at.desc())
+    return await _fetch(db, statement, fields)
 
 async def create_competition(db: AsyncSession, *, competition_in: CompetitionCreate, organizer_id: int) -> Competition:
     # Преобразуем данные из CompetitionCreate в словарь
@@ -47,6 +74,8 @@ async def create_competition(db: AsyncSession, *, competition_in: CompetitionCre
     # Создаем объект Competition с правильными данными
     db_obj = Competition(**competition_data)
     db.add(db_obj)
+    await db.flush() # Нужен id для журнала изменений
+    await crud_change.record(db, ChangeEntity.COMPETITION, competition_id=db_obj.id)
     await db.commit()
     await db.refresh(db_obj)
     return db_obj
@@ -60,6 +89,7 @@ async def update_competition(
     for key, value in update_data.items():
         setattr(db_obj, key, value)
     db.add(db_obj)
+    await crud_change.record(db, ChangeEntity.COMPETITION, competition_id=db_obj.id)
     await db.commit()
     await db.refresh(db_obj)
     return db_obj
@@ -71,6 +101,7 @@ async def update_competition_status(db: AsyncSession, competition_id: int, statu
     if db_competition:
         db_competition.status = status
         db.add(db_competition)
+        await crud_change.record(db, ChangeEntity.COMPETITION, competition_id=db_competition.id)
         await db.commit()
         await db.refresh(db_competition)
     return db_competition
\ No newline at end of file
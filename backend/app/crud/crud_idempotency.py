@@ -0,0 +1,82 @@
+# app/crud/crud_idempotency.py
+from datetime import timedelta
+from typing import Optional, Tuple
+from sqlalchemy import delete, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.clock import utcnow
+from app.models.idempotency import IdempotencyRecord
+from .base import CRUDBase
+
+# Префикс ключа, выведенного из содержимого запроса (когда клиент не прислал Idempotency-Key)
+CONTENT_KEY_PREFIX = "sha256:"
+
+class CRUDIdempotency(CRUDBase[IdempotencyRecord, IdempotencyRecord, IdempotencyRecord]):
+    pass
+
+idempotency = CRUDIdempotency(IdempotencyRecord)
+
+async def claim(
+    db: AsyncSession, *, user_id: int, scope: str, key: str, request_hash: str, lock_seconds: float
+) -> Tuple[IdempotencyRecord, bool]:
+    """
+    Атомарно занимает ключ: INSERT ... ON CONFLICT DO NOTHING. Возвращает (запись, True), если ключ
+    теперь наш и запрос нужно выполнить, или (существующая запись, False) - тогда запрос уже выполнен
+    или выполняется параллельно. Просроченная запись (истекший ответ или брошенная блокировка) не считается.
+    """
+    now = utcnow()
+    identity = (IdempotencyRecord.user_id == user_id, IdempotencyRecord.scope == scope, IdempotencyRecord.key == key)
+    await db.execute(delete(IdempotencyRecord).where(*identity, IdempotencyRecord.expires_at <= now))
+    claimed = await idempotency.upsert(
+        db,
+        {"user_id": user_id, "scope": scope, "key": key, "request_hash": request_hash,
+         "expires_at": now + timedelta(seconds=lock_seconds)},
+        conflict=("user_id", "scope", "key"), update=(),
+    )
+    if claimed is not None:
+        return claimed, True
+    existing = (await db.execute(select(IdempotencyRecord).where(*identity))).scalar_one()
+    return existing, False
+
+async def complete(
+    db: AsyncSession, *, record: IdempotencyRecord, status_code: int, response_body: str, ttl_seconds: float
+) -> bool:
+    """
+    Сохраняет ответ выполненного запроса на ttl_seconds. False - запись уже удалена параллельной загрузкой
+    (forget_content_keys): ответ устарел и не сохраняется, повтор выполнится заново.
+    """
+    statement = (
+        update(IdempotencyRecord).where(IdempotencyRecord.id == record.id)
+        .values(status_code=status_code, response_body=response_body, expires_at=utcnow() + timedelta(seconds=ttl_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    stored = (await db.execute(statement)).rowcount == 1
+    await db.commit()
+    return stored
+
+async def release(db: AsyncSession, *, record: IdempotencyRecord) -> None:
+    """ Снимает блокировку запроса, завершившегося ошибкой: повтор выполнится заново. """
+    record_id = record.id # После rollback атрибуты объекта просрочены
+    await db.rollback()
+    await idempotency.delete_many(db, [record_id])
+
+async def forget_content_keys(db: AsyncSession, *, scope: str, keep_id: Optional[int] = None) -> int:
+    """
+    Забывает ответы, сохраненные по хешу содержимого, в scope: после любого другого изменения данных
+    повтор прежнего файла должен снова примениться, а не вернуть старый ответ. Незавершенные записи
+    параллельных загрузок тоже удаляются - их ответ уже не будет сохранен (см. complete). Не коммитит.
+    Ответы по явному Idempotency-Key остаются - это повтор того же запроса клиента.
+    """
+    statement = delete(IdempotencyRecord).where(
+        IdempotencyRecord.scope == scope, IdempotencyRecord.key.startswith(CONTENT_KEY_PREFIX),
+    )
+    if keep_id is not None:
+        statement = statement.where(IdempotencyRecord.id != keep_id)
+    return (await db.execute(statement)).rowcount
+
+async def delete_expired(db: AsyncSession) -> int:
+    """ Удаляет записи с истекшим сроком (периодическая очистка, см. core/lifecycle.py). """
+    deleted = (await db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= utcnow()))).rowcount
+    await db.commit()
+    return deleted
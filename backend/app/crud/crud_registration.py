@@ -1,6 +1,7 @@
 # app/crud/crud_registration.py
 from typing import Optional, List, Sequence
 from sqlmodel import select
+from sqlalchemy.sql import Select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import selectinload # Для жадной загрузки
 from sqlalchemy.exc import IntegrityError # Для отлова дублей
@@ -9,6 +10,15 @@ from app.models.user import User
 from app.models.competition import Competition
 from app.models.registration import Registration, RegistrationCreate
 from app.models.result import Result
+from app.models.change import ChangeEntity, ChangeOp
+from . import crud_change
+from .base import CRUDBase
+
+class CRUDRegistration(CRUDBase[Registration, RegistrationCreate, RegistrationCreate]):
+    pass
+
+# Первичный ключ составной: ключ выборки - кортеж (user_id, competition_id)
+registration = CRUDRegistration(Registration)
 
 async def create_registration(db: AsyncSession, *, obj_in: RegistrationCreate) -> Optional[Registration]:
     """ Создает регистрацию. Возвращает None если уже существует. """
@@ -19,9 +29,11 @@ async def create_registration(db: AsyncSession, *, obj_in: RegistrationCreate) -
 
     db_obj = Registration.model_validate(obj_in)
     db.add(db_obj)
+    await crud_change.record(db, ChangeEntity.REGISTRATION, competition_id=obj_in.competition_id, user_id=obj_in.user_id)
     try:
         await db.commit()
         await db.refresh(db_obj)
+        registration.loader(db).prime((db_obj.user_id, db_obj.competition_id), db_obj)
         return db_obj
     except IntegrityError: # Ловим ошибку UNIQUE constraint
         await db.rollback()
@@ -30,12 +42,7 @@ async def create_registration(db: AsyncSession, *, obj_in: RegistrationCreate) -
 async def get_registration_by_user_and_competition(
     db: AsyncSession, *, user_id: int, competition_id: int
 ) -> Optional[Registration]:
-    statement = select(Registration).where(
-        Registration.user_id == user_id,
-        Registration.competition_id == competition_id
-    )
-    result = await db.execute(statement)
-    return result.scalar_one_or_none()
+    return await registration.get(db, (user_id, competition_id))
 
 async def get_registrations_by_competition(
     db: AsyncSession, *, competition_id: int, skip: int = 0, limit: int = 100
@@ -49,7 +56,19 @@ async def get_registrations_by_competition(
         .limit(limit)
     )
     result = await db.execute(statement)
-    return result.all()
+    return result.scalars().all()
+
+def export_registrations_statement(*, competition_id: int) -> Select:
+    """ Запрос для потоковой выгрузки участников соревнования (только колонки, без ORM-объектов) """
+    return (
+        select(
+            User.id.label("user_id"), User.telegram_id, User.username, User.first_name, User.last_name,
+            Registration.registered_at,
+        )
+        .join(User, User.id == Registration.user_id)
+        .where(Registration.competition_id == competition_id)
+        .order_by(Registration.registered_at.asc())
+    )
 
 async def get_registrations_by_user(
     db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100
@@ -63,13 +82,12 @@ async def get_registrations_by_user(
         .limit(limit)
     )
     result = await db.execute(statement)
-    return result.all()
+    return result.scalars().all()
 
 async def delete_registration(db: AsyncSession, *, user_id: int, competition_id: int) -> bool:
     """ Удаляет регистрацию """
-    reg = await get_registration_by_user_and_competition(db, user_id=user_id, competition_id=competition_id)
-    if reg:
-        await db.delete(reg)
-        await db.commit()
-        return True
-    return False
\ No newline at end of file
+    deleted = await registration.delete_many(db, [(user_id, competition_id)], commit=False) > 0
+    if deleted:
+        await crud_change.record(db, ChangeEntity.REGISTRATION, competition_id=competition_id, user_id=user_id, op=ChangeOp.DELETE)
+    await db.commit()
+    return deleted
\ No newline at end of file
@@ -1,63 +1,53 @@
 # app/crud/crud_user.py
-from typing import Optional
-from sqlmodel import select
+from typing import Dict, Iterable, Optional
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.user import User, UserCreate # UserUpdate пока не определен, но может понадобиться
+from .base import CRUDBase
+
+class CRUDUser(CRUDBase[User, UserCreate, UserCreate]):
+    pass
+
+user = CRUDUser(User)
 
 async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
-    statement = select(User).where(User.id == user_id)
-    result = await db.execute(statement)
-    return result.scalar_one_or_none()
+    return await user.get(db, user_id)
 
 async def get_user_by_telegram_id(db: AsyncSession, telegram_id: int) -> Optional[User]:
-    statement = select(User).where(User.telegram_id == telegram_id)
-    result = await db.execute(statement)
-    return result.scalar_one_or_none()
+    # Вызовы в одном такте (например, из asyncio.gather) сливаются в один IN-запрос
+    return await user.get(db, telegram_id, by="telegram_id")
+
+async def get_users_by_telegram_ids(db: AsyncSession, telegram_ids: Iterable[int]) -> Dict[int, User]:
+    """ Пользователи по списку telegram_id одним IN-запросом (на каждые CHUNK_SIZE значений): telegram_id -> User """
+    return await user.get_many(db, telegram_ids, by="telegram_id")
 
-# В нашем случае UserCreate может не использоваться, т.к. данные приходят от TG
-# Эта функция может быть для создания или обновления юзера после OAuth
+# Поля профиля, которые приходят от Telegram при каждом входе
+OAUTH_PROFILE_FIELDS = ("username", "first_name", "last_name", "avatar_url")
+
+# Создание или обновление пользователя после OAuth - одним атомарным upsert по telegram_id
 async def create_or_update_user_from_oauth(db: AsyncSession, *, user_data: dict) -> User:
-    # Ожидаем user_data с полями: telegram_id, username, first_name, last_name, avatar_url
-    existing_user = await get_user_by_telegram_id(db, user_data["telegram_id"])
-
-    if existing_user:
-        # Обновляем данные, если они изменились
-        update_data = user_data.copy()
-        updated = False
-        for key, value in update_data.items():
-            if hasattr(existing_user, key) and getattr(existing_user, key) != value:
-                setattr(existing_user, key, value)
-                updated = True
-        if updated:
-            db.add(existing_user)
-            await db.commit()
-            await db.refresh(existing_user)
-        return existing_user
+    """
+    Ожидаем user_data с полями: telegram_id и (необязательно) username, first_name, last_name, avatar_url.
+    INSERT ... ON CONFLICT(telegram_id) DO UPDATE ... WHERE <поле изменилось> RETURNING: одновременные входы
+    нового пользователя не падают на уникальном индексе, а повторный вход без изменений ничего не пишет.
+    """
+    changed_fields = [name for name in OAUTH_PROFILE_FIELDS if name in user_data]
+    db_user = await user.upsert(
+        db, user_data, conflict=("telegram_id",), update=changed_fields, touch=("updated_at",),
+    )
+    if db_user is None:
+        # Профиль не изменился - строка не возвращается, читаем ее
+        db_user = await get_user_by_telegram_id(db, user_data["telegram_id"])
     else:
-        # Создаем нового пользователя
-        # Можно использовать UserCreate или напрямую User
-        new_user = User(**user_data) # Предполагаем, что user_data содержит все нужные поля UserBase
-        db.add(new_user)
-        await db.commit()
-        await db.refresh(new_user)
-        return new_user
+        user.loader(db, by="telegram_id").prime(db_user.telegram_id, db_user)
+    return db_user
 
 async def set_organizer_role(db: AsyncSession, user_id: int, is_organizer: bool) -> Optional[User]:
     """ Устанавливает или снимает роль организатора """
-    user = await get_user(db, user_id)
-    if user:
-        user.is_organizer = is_organizer
-        db.add(user)
+    db_user = await get_user(db, user_id)
+    if db_user:
+        db_user.is_organizer = is_organizer
+        db.add(db_user)
         await db.commit()
-        await db.refresh(user)
-    return user
-
-# Добавь CRUDUser если используешь base.py
-# from .base import CRUDBase
-# from app.models.user import User, UserCreate, UserUpdate
-# class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
-#     # Дополнительные методы специфичные для User
-#     async def get_by_telegram_id(self, db: AsyncSession, *, telegram_id: int) -> Optional[User]:
-#         # ... реализация ...
-# user = CRUDUser(User)
\ No newline at end of file
+        await db.refresh(db_user)
+    return db_user
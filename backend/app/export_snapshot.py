@@ -0,0 +1,239 @@
+# app/export_snapshot.py
+# Выгрузка согласованного снимка БД в Parquet для аналитики.
+# Аналитики работают с Parquet-файлами, а не с копией users.db, и не конкурируют с приложением за блокировки.
+#
+# Полная выгрузка перезаписывает каталоги таблиц. Инкрементальная (--incremental) по таблицам:
+#   registration, result - партиции competition_id=<id> соревнований, изменившихся после прошлого запуска
+#       по журналу изменений (changelogentry), перезаписываются целиком. Так в них попадают исправления
+#       результатов (upsert, diff, пересчет мест не меняют submitted_at), удаления и отмены регистраций.
+#   competition - небольшая таблица, перезаписывается целиком.
+#   user - дописываются строки с updated_at не раньше прошлого водяного знака: каталог хранит версии
+#       строк, и одна версия может встретиться дважды. Актуальная строка пользователя - с наибольшим
+#       updated_at для id (дубли версии совпадают по (id, updated_at)). Удалений пользователей в API нет.
+# Изменения в обход приложения (ручной SQL, app.seed_db) в журнал не попадают - после них нужна полная выгрузка.
+#
+# Запуск: python -m app.export_snapshot --output ./analytics [--incremental] [--mode backup|transaction]
+import argparse
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from sqlalchemy import Boolean, DateTime, Integer, Table, TypeDecorator
+
+from app.core.config import settings
+from app.models.user import User
+from app.models.competition import Competition
+from app.models.registration import Registration
+from app.models.result import Result
+from app.models.change import ChangeEntity, ChangeLogEntry
+
+class TableExport(NamedTuple):
+    # Инкрементальная выгрузка: "versions" - дописать строки новее водяного знака watermark_column,
+    # "partitions" - перезаписать партиции соревнований с записями журнала change_entities, "full" - всю таблицу
+    incremental: str
+    partition_columns: Sequence[str] = ()
+    watermark_column: Optional[str] = None
+    change_entities: Sequence[ChangeEntity] = ()
+
+SNAPSHOT_TABLES = {
+    User.__table__: TableExport("versions", watermark_column="updated_at"),
+    Competition.__table__: TableExport("full"),
+    Registration.__table__: TableExport("partitions", ["competition_id"], change_entities=[ChangeEntity.REGISTRATION]),
+    Result.__table__: TableExport("partitions", ["competition_id"], change_entities=[ChangeEntity.RESULTS]),
+}
+
+BATCH_SIZE = 50_000
+WATERMARKS_FILE = "_watermarks.json"
+# Ключ водяного знака журнала изменений (последний выгруженный seq) в WATERMARKS_FILE
+CHANGE_LOG_WATERMARK = ChangeLogEntry.__table__.name
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError as e:
+        raise SystemExit("pyarrow is required for the analytics snapshot: pip install pyarrow") from e
+    return pyarrow
+
+def _arrow_schema(pa, table: Table):
+    """ Строит схему Arrow по метаданным SQLModel-таблицы. """
+    fields = []
+    for column in table.columns:
+        # SQLModel оборачивает часть типов в TypeDecorator (AutoString, UTCDateTime) - смотрим на базовый тип
+        column_type = column.type.impl_instance if isinstance(column.type, TypeDecorator) else column.type
+        if isinstance(column_type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column_type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column_type, DateTime):
+            arrow_type = pa.timestamp("us")
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type, nullable=column.nullable))
+    return pa.schema(fields)
+
+@contextmanager
+def open_snapshot(db_file: str, mode: str) -> Iterator[sqlite3.Connection]:
+    """
+    Открывает согласованный снимок БД.
+    backup: копия через SQLite online backup API во временный файл - живая БД блокируется только на время копирования.
+    transaction: чтение в одной read-транзакции прямо из живой БД - без копии, но дольше держит блокировку чтения.
+    """
+    # check_same_thread=False: pyarrow читает итератор батчей из своего потока (чтение строго последовательное)
+    source = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True, check_same_thread=False)
+    try:
+        if mode == "transaction":
+            source.execute("BEGIN") # Все SELECT ниже видят одно и то же состояние БД
+            try:
+                yield source
+            finally:
+                source.rollback()
+            return
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            snapshot = sqlite3.connect(os.path.join(tmp_dir, "snapshot.db"), check_same_thread=False)
+            try:
+                source.backup(snapshot)
+                logger.info("Snapshot of %s taken via online backup API", db_file)
+                yield snapshot
+            finally:
+                snapshot.close()
+    finally:
+        source.close()
+
+def _record_batches(pa, conn: sqlite3.Connection, table: Table, schema, where: str = "", params: Sequence = ()):
+    """ Читает таблицу (с условием where) курсором порциями по BATCH_SIZE и отдает RecordBatch'и. """
+    columns = [column.name for column in table.columns]
+    query = f'SELECT {", ".join(columns)} FROM "{table.name}"'
+    if where:
+        query += f" WHERE {where}"
+    cursor = conn.execute(query, params)
+    while True:
+        rows = cursor.fetchmany(BATCH_SIZE)
+        if not rows:
+            break
+        arrays = []
+        for index, field in enumerate(schema):
+            # Даты в SQLite хранятся строками, а bool - числами: читаем как есть и приводим средствами Arrow
+            source_type = field.type
+            if pa.types.is_timestamp(field.type):
+                source_type = pa.string()
+            elif pa.types.is_boolean(field.type):
+                source_type = pa.int64()
+            arrays.append(pa.array([row[index] for row in rows], type=source_type).cast(field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def _load_watermarks(output_dir: str) -> Dict[str, str]:
+    path = os.path.join(output_dir, WATERMARKS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _save_watermarks(output_dir: str, watermarks: Dict[str, str]) -> None:
+    path = os.path.join(output_dir, WATERMARKS_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(path + ".tmp", path) # Атомарная замена, чтобы не оставить битый файл при падении
+
+def _changed_competitions(conn: sqlite3.Connection, since_seq: int, entities: Sequence[ChangeEntity]) -> List[int]:
+    placeholders = ", ".join("?" for _ in entities)
+    rows = conn.execute(
+        f'SELECT DISTINCT competition_id FROM "{CHANGE_LOG_WATERMARK}" WHERE seq > ? AND entity IN ({placeholders})',
+        (since_seq, *(entity.name for entity in entities)),
+    ).fetchall()
+    return sorted(row[0] for row in rows)
+
+def _last_change_seq(conn: sqlite3.Connection) -> Optional[int]:
+    """ Последний seq журнала изменений в снимке; None - в базе нет журнала (создана до его появления). """
+    try:
+        return conn.execute(f'SELECT COALESCE(MAX(seq), 0) FROM "{CHANGE_LOG_WATERMARK}"').fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+
+def export_snapshot(db_file: str, output_dir: str, *, incremental: bool = False, mode: str = "backup") -> Dict[str, int]:
+    """
+    Выгружает таблицы user/competition/registration/result в Parquet (hive-партиции по competition_id).
+    Полная выгрузка заменяет каталоги таблиц; incremental - см. описание модуля. Каждый запуск пишет
+    файлы part-<run_id>-*.parquet. Возвращает число выгруженных строк по таблицам.
+    """
+    pa = _import_pyarrow()
+    os.makedirs(output_dir, exist_ok=True)
+    watermarks = _load_watermarks(output_dir) if incremental else {}
+    # До микросекунд: файлы двух запусков подряд не должны затирать друг друга
+    run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    exported: Dict[str, int] = {}
+
+    with open_snapshot(db_file, mode) as conn:
+        # Водяные знаки берем из того же снимка, до чтения строк
+        change_seq = _last_change_seq(conn)
+        since_seq = watermarks.get(CHANGE_LOG_WATERMARK)
+        for table, plan in SNAPSHOT_TABLES.items():
+            table_dir = os.path.join(output_dir, table.name)
+            where, params, description = "", (), "full"
+            if plan.incremental == "versions" and table.name in watermarks:
+                # Не строгое сравнение: строка с тем же updated_at, записанная после прошлого снимка, не теряется
+                where, params = f"{plan.watermark_column} >= ?", (watermarks[table.name],)
+                description = f"rows with {plan.watermark_column} >= {watermarks[table.name]}"
+            elif plan.incremental == "partitions" and since_seq is not None and change_seq is not None:
+                competition_ids = _changed_competitions(conn, since_seq, plan.change_entities)
+                for competition_id in competition_ids:
+                    shutil.rmtree(os.path.join(table_dir, f"competition_id={competition_id}"), ignore_errors=True)
+                where = "competition_id IN (SELECT value FROM json_each(?))"
+                params = (json.dumps(competition_ids),)
+                description = f"{len(competition_ids)} changed competition partition(s)"
+            else:
+                # Полная выгрузка таблицы заменяет прежние файлы, а не дописывается к ним
+                shutil.rmtree(table_dir, ignore_errors=True)
+            new_watermark = None
+            if plan.watermark_column is not None:
+                new_watermark = conn.execute(f'SELECT MAX({plan.watermark_column}) FROM "{table.name}"').fetchone()[0]
+            schema = _arrow_schema(pa, table)
+
+            count = 0
+            def counted_batches():
+                nonlocal count
+                for batch in _record_batches(pa, conn, table, schema, where, params):
+                    count += batch.num_rows
+                    yield batch
+
+            pa.dataset.write_dataset(
+                counted_batches(),
+                base_dir=table_dir,
+                schema=schema,
+                format="parquet",
+                partitioning=list(plan.partition_columns) or None,
+                partitioning_flavor="hive" if plan.partition_columns else None,
+                basename_template=f"part-{run_id}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            exported[table.name] = count
+            if new_watermark is not None:
+                watermarks[table.name] = new_watermark
+            logger.info("Exported %d row(s) from '%s' (%s)", count, table.name, description)
+        if change_seq is not None:
+            watermarks[CHANGE_LOG_WATERMARK] = change_seq
+
+    _save_watermarks(output_dir, watermarks)
+    return exported
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a consistent Parquet snapshot of the platform database")
+    parser.add_argument("--output", default="analytics", help="Output directory for Parquet datasets")
+    parser.add_argument("--incremental", action="store_true", help="Only export what changed since the last run (see the module comment)")
+    parser.add_argument("--mode", choices=["backup", "transaction"], default="backup", help="How to take the consistent snapshot")
+    parser.add_argument("--db", default=settings.SQLITE_DB_FILE, help="SQLite database file")
+    args = parser.parse_args()
+
+    logger.info("Starting analytics snapshot export...")
+    export_snapshot(args.db, args.output, incremental=args.incremental, mode=args.mode)
+    logger.info("Analytics snapshot export finished.")
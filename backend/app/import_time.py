@@ -0,0 +1,94 @@
+# app/import_time.py
+# Бенчмарк холодного старта: время импорта app.main и сборки приложения в чистом процессе (python -X importtime).
+# Цель задается как у uvicorn - модуль:атрибут; импорты внутри create_app() тоже попадают в замер.
+# Процесс запускается несколько раз, берется самый быстрый прогон (меньше всего шума от диска и планировщика).
+# Печатает общее время, самые тяжелые пакеты верхнего уровня и модули; при превышении бюджета
+# завершается с кодом 1 - команду можно ставить в CI рядом с app.benchmark.
+#
+# Запуск:
+#   python -m app.import_time --budget-ms 900
+#   python -m app.import_time --module app.main:app --runs 5 --top 25
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """ Разбирает stderr python -X importtime (строка заголовка и посторонний вывод пропускаются). """
+    records = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+def measure(target: str) -> List[ImportRecord]:
+    """ Импортирует target ("модуль" или "модуль:атрибут") в отдельном интерпретаторе и возвращает записи importtime. """
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    module, _, attribute = target.partition(":")
+    statement = f"from {module} import {attribute}" if attribute else f"import {module}"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=backend_dir, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{statement} failed:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+def total_ms(records: Sequence[ImportRecord]) -> float:
+    return sum(record.self_us for record in records) / 1000
+
+def by_package(records: Sequence[ImportRecord]) -> Dict[str, float]:
+    """ Собственное время модулей, сложенное по пакету верхнего уровня (app.* - по подпакету), в мс. """
+    totals: Dict[str, float] = defaultdict(float)
+    for record in records:
+        parts = record.module.split(".")
+        package = ".".join(parts[:2]) if parts[0] == "app" else parts[0]
+        totals[package] += record.self_us / 1000
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+def _print_report(records: Sequence[ImportRecord], *, top: int) -> None:
+    print(f"Total import time: {total_ms(records):.1f}ms ({len(records)} modules)\n")
+    print(f"{'package':<40}{'self ms':>10}")
+    for package, ms in list(by_package(records).items())[:top]:
+        print(f"{package:<40}{ms:>10.1f}")
+    print(f"\n{'module':<48}{'self ms':>10}{'cumul. ms':>11}")
+    for record in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:top]:
+        print(f"{record.module:<48}{record.self_us / 1000:>10.1f}{record.cumulative_us / 1000:>11.1f}")
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cold start import-time benchmark with a per-module breakdown")
+    parser.add_argument("--module", default="app.main:app", help="Module or module:attribute to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start; the fastest run is reported")
+    parser.add_argument("--top", type=int, default=20, help="Rows in each table")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the total import time exceeds this budget")
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(max(1, args.runs))]
+    best = min(runs, key=total_ms)
+    _print_report(best, top=args.top)
+
+    if args.budget_ms is not None:
+        elapsed = total_ms(best)
+        if elapsed > args.budget_ms:
+            print(f"\nImport time {elapsed:.1f}ms exceeds the budget of {args.budget_ms:.0f}ms")
+            return 1
+        print(f"\nImport time {elapsed:.1f}ms is within the budget of {args.budget_ms:.0f}ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
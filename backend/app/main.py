@@ -1,72 +1,124 @@
 # app/main.py
+# Приложение собирает create_app() при первом обращении к app.main.app (так его берет uvicorn app.main:app):
+# сам импорт модуля не читает настройки, не создает движок БД и не настраивает логирование.
+# Необязательные middleware и подсистемы импортируются, только если включены в настройках.
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-
-from .core.config import settings
-from .api.v1.api import api_router # Импортируем собранный роутер
-
-# Опционально: добавить обработку событий startup/shutdown
-# from app.core.db import create_db_and_tables # Если нужно создавать таблицы при старте
-# import asyncio
-
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json",
-    # docs_url=None, # Можно отключить Swagger UI
-    # redoc_url=None, # Можно отключить ReDoc
-)
-
-# --- НАСТРОЙКА CORS ---
-# Список источников (origins), которым разрешено делать запросы к API
-origins = [
-    "http://localhost:5173",  # Адрес вашего Frontend в режиме разработки
-    "http://localhost:5174",  # Добавим и этот, т.к. порт менялся
-    "http://127.0.0.1:5173", # На всякий случай
-    "http://127.0.0.1:5174", # На всякий случай
-    # При развертывании приложения добавьте сюда URL вашего рабочего фронтенда
-    # "https://your-production-frontend.com",
-]
-    
-# Настройка CORS
-if settings.BACKEND_CORS_ORIGINS:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[str(origin).rstrip("/") for origin in settings.all_cors_origins] + origins, # Используем all_cors_origins из config
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from .core import lifecycle
+    from .core.config import settings
+    from .core.logging import setup_logging, shutdown_logging
+
+    # Поток записи логов останавливается в конце каждого lifespan - запускаем на каждом старте
+    setup_logging()
+    # Проверка схемы, открытие пула и прогрев кэшей - до первого запроса
+    await lifecycle.startup()
+    profiling = None
+    if settings.PROFILE_BACKGROUND_HZ > 0:
+        from .core import profiling
+        profiling.start_background_sampling()
+    yield
+    if profiling is not None:
+        profiling.stop_background_sampling()
+    # Дорассылка уведомлений с дедлайном и закрытие соединений БД
+    await lifecycle.shutdown()
+    shutdown_logging()
+
+def create_app() -> FastAPI:
+    from fastapi.responses import PlainTextResponse
+
+    from .core.config import settings
+    from .core.logging import RequestIdMiddleware
+    from .api.v1.api import api_router # Импортируем собранный роутер
+    from .core.metrics import MetricsMiddleware, register_app_collectors, registry
+
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        lifespan=lifespan,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        # docs_url=None, # Можно отключить Swagger UI
+        # redoc_url=None, # Можно отключить ReDoc
     )
 
-# Подключаем роутер с префиксом /api/v1
-app.include_router(api_router, prefix=settings.API_V1_STR)
-
-# @app.on_event("startup")
-# async def on_startup():
-#     # Не рекомендуется создавать таблицы при каждом запуске в проде,
-#     # лучше использовать миграции или отдельный скрипт.
-#     # Но для разработки/MVP может быть удобно:
-#     # print("Creating database tables on startup...")
-#     # await create_db_and_tables()
-#     # print("Database tables created.")
-#     pass
-
-@app.get("/")
-async def root():
-    """ Простой эндпоинт для проверки работы """
-    return {"message": f"Welcome to {settings.PROJECT_NAME} API"}
-
-def rebuild_models():
-    """
-    Rebuilds models with circular references to fix Pydantic validation issues
-    """
-    from app.models.user import UserPublic
-    from app.models.competition import CompetitionReadWithOwner
-    from app.models.result import ResultReadWithUser
-    
-    # Force model rebuilding to fix circular references
-    CompetitionReadWithOwner.model_rebuild()
-    ResultReadWithUser.model_rebuild()
-
-print("Rebuilding models for forward references...")
-rebuild_models()
-print("Models rebuilt.")
\ No newline at end of file
+    # Контроль допуска - ближе всех к приложению: ответ 503 проходит через CORS, метрики и логи как обычный
+    if settings.ADMISSION_CONTROL_ENABLED:
+        from .core.admission import AdmissionControlMiddleware
+        app.add_middleware(AdmissionControlMiddleware)
+
+    # --- НАСТРОЙКА CORS ---
+    # Список источников (origins), которым разрешено делать запросы к API
+    origins = [
+        "http://localhost:5173",  # Адрес вашего Frontend в режиме разработки
+        "http://localhost:5174",  # Добавим и этот, т.к. порт менялся
+        "http://127.0.0.1:5173", # На всякий случай
+        "http://127.0.0.1:5174", # На всякий случай
+        # При развертывании приложения добавьте сюда URL вашего рабочего фронтенда
+        # "https://your-production-frontend.com",
+    ]
+
+    # Настройка CORS
+    if settings.BACKEND_CORS_ORIGINS:
+        from fastapi.middleware.cors import CORSMiddleware
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=[str(origin).rstrip("/") for origin in settings.all_cors_origins] + origins, # Используем all_cors_origins из config
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    # Число SQL-запросов и их время в заголовках ответа - только для разработки и стейджинга
+    if settings.ENVIRONMENT != "production":
+        from .core.query_tracker import QueryStatsHeadersMiddleware
+        app.add_middleware(QueryStatsHeadersMiddleware)
+
+    # Сжатие ответов (brotli/gzip по Accept-Encoding) - внутри метрик и логов, чтобы его время входило в задержку
+    if settings.COMPRESSION_ENABLED:
+        from .core.compression import CompressionMiddleware
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+            thread_minimum_size=settings.COMPRESSION_THREAD_MINIMUM_SIZE,
+        )
+
+    # Профилирование отдельных запросов по запросу организатора или бота
+    if settings.PROFILING_ENABLED:
+        from .core.profiling import ProfilingMiddleware
+        app.add_middleware(ProfilingMiddleware)
+
+    # request_id для логов - снаружи всех, кроме метрик, чтобы покрыть и логи остальных middleware
+    app.add_middleware(RequestIdMiddleware)
+
+    # Метрики добавляются последними, чтобы оборачивать весь стек (в том числе CORS)
+    app.add_middleware(MetricsMiddleware)
+    register_app_collectors()
+
+    # Подключаем роутер с префиксом /api/v1
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+
+    @app.get("/")
+    async def root():
+        """ Простой эндпоинт для проверки работы """
+        return {"message": f"Welcome to {settings.PROJECT_NAME} API"}
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """ Метрики в текстовом формате Prometheus """
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    return app
+
+def __getattr__(name: str):
+    # app.main.app собирается один раз, при первом обращении (uvicorn, тесты, app.import_time)
+    if name == "app":
+        globals()["app"] = application = create_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,576 @@
+# app/microbench.py
+# Микробенчмарки на засеянной базе (см. app/seed_db.py):
+#   statements - время одного вызова горячих CRUD-функций в текущей реализации против прежней, где
+#                конструкция select() собиралась заново на каждый вызов и SQLAlchemy каждый раз заново
+#                вычислял ключ кэша компиляции;
+#   crypto     - задержка обычных запросов во время всплеска входов с bcrypt: bcrypt прямо в цикле
+#                событий против пула потоков криптографии (app/core/security.py), и цена пула для JWT;
+#   batch      - детали N соревнований: N последовательных GET /competitions/{id} против одного
+#                GET /competitions/batch (задержка на стороне клиента, через ASGI);
+#   leaderboard - нагрузочный тест SSE-потока таблицы результатов: --iterations подписчиков на одно
+#                соревнование, несколько изменений результатов, задержка доставки обновления всем подписчикам
+#                и число чтений БД против опроса GET /results теми же клиентами. Изменяет базу (результат
+#                лидера, в конце значение возвращается).
+#   payload    - страница из 200 соревнований и 200 результатов: полный ответ против ?fields= (поля карточки
+#                списка), размер тела без сжатия / gzip / br, задержка запроса и время одной сериализации.
+#
+# Запуск:
+#   python -m app.microbench --db /tmp/bench.db statements --iterations 3000
+#   python -m app.microbench --db /tmp/bench.db crypto --iterations 2000
+#   python -m app.microbench --db /tmp/bench.db batch --iterations 200
+#   python -m app.microbench --db /tmp/bench.db leaderboard --iterations 5000
+#   python -m app.microbench --db /tmp/bench.db payload --iterations 200
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+# Как и в app.benchmark, модули app.* импортируются после того, как CLI выставит SQLITE_DB_FILE
+
+async def _time_calls(call: Callable[[Any, int], Awaitable[Any]], iterations: int) -> float:
+    """ Среднее время вызова в микросекундах; каждый вызов - в новой сессии, как в отдельном HTTP-запросе. """
+    from app.core.db import AsyncSessionFactory
+    started = time.perf_counter()
+    for i in range(iterations):
+        async with AsyncSessionFactory() as session:
+            await call(session, i)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+def _time_cache_key(build: Callable[[int], Any], iterations: int) -> float:
+    """ Время построения запроса и вычисления его ключа кэша компиляции, мкс. """
+    started = time.perf_counter()
+    for i in range(iterations):
+        build(i)._generate_cache_key()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+async def bench_statements(iterations: int) -> List[Dict[str, Any]]:
+    """ Горячие выборки: прежний вариант (select() на каждый вызов) против готовых запросов CRUD-слоя. """
+    from sqlalchemy import func
+    from sqlalchemy.orm import selectinload
+    from sqlmodel import select
+    from app.core.db import AsyncSessionFactory
+    from app.crud import crud_competition, crud_registration, crud_result, crud_user
+    from app.crud.base import CRUDBase
+    from app.models.competition import Competition
+    from app.models.registration import Registration
+    from app.models.result import Result
+    from app.models.user import User
+
+    async with AsyncSessionFactory() as session:
+        telegram_ids = (await session.execute(select(User.telegram_id).limit(1000))).scalars().all()
+        competition_ids = (await session.execute(select(Competition.id).limit(1000))).scalars().all()
+        registrations = (await session.execute(select(Registration.user_id, Registration.competition_id).limit(1000))).all()
+        busiest = (await session.execute(
+            select(Result.competition_id).group_by(Result.competition_id).order_by(func.count().desc()).limit(10)
+        )).scalars().all()
+    if not (telegram_ids and competition_ids and registrations and busiest):
+        raise SystemExit("The database has no data for the statement benchmark, seed it first")
+
+    # Прежняя реализация: конструкция запроса собирается на каждый вызов
+    def old_user(i):
+        return select(User).where(User.telegram_id == telegram_ids[i % len(telegram_ids)])
+    def old_competition(i):
+        return select(Competition).where(Competition.id == competition_ids[i % len(competition_ids)]).options(selectinload(Competition.organizer))
+    def old_registration(i):
+        user_id, competition_id = registrations[i % len(registrations)]
+        return select(Registration).where(Registration.user_id == user_id, Registration.competition_id == competition_id)
+    def old_results_page(i):
+        return (
+            select(Result).where(Result.competition_id == busiest[i % len(busiest)])
+            .options(selectinload(Result.user)).order_by(Result.rank.asc(), Result.submitted_at.asc()).offset(0).limit(100)
+        )
+
+    def run_old(build):
+        async def call(session, i):
+            return (await session.execute(build(i))).scalars().all()
+        return call
+
+    cases = [
+        ("get_user_by_telegram_id", old_user,
+         lambda s, i: crud_user.get_user_by_telegram_id(s, telegram_ids[i % len(telegram_ids)]),
+         lambda i: crud_user.user._get_many_statement("telegram_id")),
+        ("get_competition", old_competition,
+         lambda s, i: crud_competition.get_competition(s, competition_ids[i % len(competition_ids)]),
+         lambda i: crud_competition.competition._get_many_statement("id")),
+        ("get_registration_by_user_and_competition", old_registration,
+         lambda s, i: crud_registration.get_registration_by_user_and_competition(
+             s, user_id=registrations[i % len(registrations)][0], competition_id=registrations[i % len(registrations)][1]),
+         lambda i: crud_registration.registration._get_many_statement(("user_id", "competition_id"))),
+        ("get_results_by_competition", old_results_page,
+         lambda s, i: crud_result.get_results_by_competition(s, competition_id=busiest[i % len(busiest)]),
+         lambda i: crud_result._results_page_statement),
+    ]
+    rows = []
+    for name, old_build, new_call, new_statement in cases:
+        # Прогрев: компиляция обоих вариантов попадает в кэш до замера
+        await _time_calls(run_old(old_build), 20)
+        await _time_calls(new_call, 20)
+        old_us = await _time_calls(run_old(old_build), iterations)
+        new_us = await _time_calls(new_call, iterations)
+        rows.append({
+            "name": name,
+            "old_call_us": old_us,
+            "new_call_us": new_us,
+            "old_cache_key_us": _time_cache_key(old_build, iterations),
+            "new_cache_key_us": _time_cache_key(new_statement, iterations),
+        })
+    return rows
+
+def _print_statements(rows: Sequence[Dict[str, Any]]) -> None:
+    print(f"{'function':<42}{'old us':>9}{'new us':>9}{'saved':>8}{'key old us':>12}{'key new us':>12}")
+    for r in rows:
+        saved = 1 - r["new_call_us"] / r["old_call_us"]
+        print(f"{r['name']:<42}{r['old_call_us']:>9.0f}{r['new_call_us']:>9.0f}{saved:>8.0%}"
+              f"{r['old_cache_key_us']:>12.1f}{r['new_cache_key_us']:>12.1f}")
+
+# Сколько проверок пароля в одном всплеске входов и сколько из них идет одновременно
+CRYPTO_BURST_LOGINS = 32
+CRYPTO_BURST_CONCURRENCY = 16
+
+async def bench_crypto(iterations: int) -> List[Dict[str, Any]]:
+    """
+    Пока идет всплеск проверок пароля, отдельная корутина последовательно запрашивает /users/me
+    через ASGI; ее задержки и есть то, что видят остальные клиенты во время всплеска. Запрос
+    с авторизацией: проверка JWT не должна ждать в очереди пула за bcrypt.
+    """
+    import bcrypt
+    import httpx
+    import numpy as np
+    from sqlmodel import select
+    from app.core import security
+    from app.core.db import AsyncSessionFactory
+    from app.main import app
+    from app.models.user import User
+
+    async with AsyncSessionFactory() as session:
+        telegram_id = (await session.execute(select(User.telegram_id).limit(1))).scalar()
+    if telegram_id is None:
+        raise SystemExit("The database has no data for the crypto benchmark, seed it first")
+    # passlib вызывает тот же bcrypt.checkpw; здесь он напрямую, чтобы не зависеть от совместимости passlib и bcrypt
+    password = b"benchmark-password"
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=12))
+
+    async def check_inline():
+        return bcrypt.checkpw(password, hashed)
+    async def check_in_pool():
+        return await security.run_in_crypto_pool(bcrypt.checkpw, password, hashed)
+
+    rows = []
+    token = security.create_access_token(subject=telegram_id)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://microbench",
+        headers={"Authorization": f"Bearer {token}"},
+    ) as client:
+        url = "/api/v1/users/me"
+        for _ in range(20):
+            assert (await client.get(url)).status_code == 200
+
+        for name, check in (("bcrypt inline", check_inline), ("bcrypt in pool", check_in_pool)):
+            latencies: List[float] = []
+            logins = iter(range(CRYPTO_BURST_LOGINS))
+            burst_done = asyncio.Event()
+
+            async def login_worker():
+                for _ in logins:
+                    await check()
+                    await asyncio.sleep(0) # Как обработчик: после проверки пароля есть и другая работа
+
+            async def burst():
+                try:
+                    await asyncio.gather(*(login_worker() for _ in range(CRYPTO_BURST_CONCURRENCY)))
+                finally:
+                    burst_done.set()
+
+            async def probe():
+                while not burst_done.is_set():
+                    started = time.perf_counter()
+                    await client.get(url)
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(burst(), probe())
+            elapsed = time.perf_counter() - started
+            p50, p99, worst = np.percentile(latencies, [50, 99, 100]) * 1000
+            rows.append({"name": name, "burst_s": elapsed, "probe_requests": len(latencies),
+                         "p50_ms": p50, "p99_ms": p99, "max_ms": worst})
+
+    for name, decode in (("jwt decode inline", security.decode_access_token), ("jwt decode in pool", None)):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            if decode is not None:
+                decode(token)
+            else:
+                await security.run_in_crypto_pool(security.decode_access_token, token)
+        rows.append({"name": name, "call_us": (time.perf_counter() - started) / iterations * 1e6})
+    return rows
+
+def _print_crypto(rows: Sequence[Dict[str, Any]]) -> None:
+    print(f"Login burst: {CRYPTO_BURST_LOGINS} bcrypt checks, {CRYPTO_BURST_CONCURRENCY} at a time; "
+          "probe = sequential authenticated GET /users/me during the burst")
+    print(f"{'mode':<20}{'burst s':>9}{'probes':>8}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for r in rows:
+        if "burst_s" in r:
+            print(f"{r['name']:<20}{r['burst_s']:>9.2f}{r['probe_requests']:>8}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}")
+    for r in rows:
+        if "call_us" in r:
+            print(f"{r['name']:<20}{r['call_us']:>9.1f} us/call")
+
+# Размеры пакета для сравнения с поштучными запросами
+BATCH_SIZES = (10, 50, 100)
+
+async def bench_batch(iterations: int) -> List[Dict[str, Any]]:
+    """ iterations раз для каждого N: N последовательных запросов деталей против одного пакетного. """
+    import httpx
+    import numpy as np
+    from sqlmodel import select
+    from app.core.db import AsyncSessionFactory
+    from app.main import app
+    from app.models.competition import Competition
+
+    async with AsyncSessionFactory() as session:
+        competition_ids = (await session.execute(select(Competition.id).order_by(Competition.id).limit(max(BATCH_SIZES)))).scalars().all()
+    if len(competition_ids) < max(BATCH_SIZES):
+        raise SystemExit(f"The batch benchmark needs at least {max(BATCH_SIZES)} competitions, seed the database first")
+
+    rows = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://microbench") as client:
+        for _ in range(20):
+            await client.get(f"/api/v1/competitions/{competition_ids[0]}")
+            await client.get("/api/v1/competitions/batch", params=[("ids", competition_ids[0])])
+        for size in BATCH_SIZES:
+            ids = competition_ids[:size]
+            sequential, batched = np.zeros(iterations), np.zeros(iterations)
+            for i in range(iterations):
+                started = time.perf_counter()
+                for competition_id in ids:
+                    await client.get(f"/api/v1/competitions/{competition_id}")
+                sequential[i] = time.perf_counter() - started
+                started = time.perf_counter()
+                response = await client.get("/api/v1/competitions/batch", params=[("ids", competition_id) for competition_id in ids])
+                batched[i] = time.perf_counter() - started
+            rows.append({
+                "size": size, "sequential_p50_ms": float(np.median(sequential)) * 1000,
+                "batch_p50_ms": float(np.median(batched)) * 1000, "batch_queries": int(response.headers.get("x-db-query-count", -1)),
+            })
+    return rows
+
+def _print_batch(rows: Sequence[Dict[str, Any]]) -> None:
+    print(f"{'ids':>5}{'sequential p50 ms':>19}{'batch p50 ms':>14}{'speedup':>9}{'batch queries':>15}")
+    for r in rows:
+        print(f"{r['size']:>5}{r['sequential_p50_ms']:>19.1f}{r['batch_p50_ms']:>14.1f}"
+              f"{r['sequential_p50_ms'] / r['batch_p50_ms']:>8.1f}x{r['batch_queries']:>15}")
+
+# Изменений результатов за прогон и доля "зависших" подписчиков, которые перестают читать поток
+LEADERBOARD_ROUNDS = 12
+LEADERBOARD_STALLED_SHARE = 0.01
+
+class _SseClient:
+    """
+    SSE-подписчик, вызывающий ASGI-приложение напрямую: httpx.ASGITransport собирает тело ответа целиком
+    и бесконечный поток не отдает. Каждый send с телом - один кадр (одно событие генератора).
+    """
+    def __init__(self, app, path: str, *, stalled: bool = False):
+        self.app = app
+        self.path = path
+        self.stalled = stalled
+        self.status: Optional[int] = None
+        self.events: List[tuple] = [] # (событие, время получения)
+        self.received = asyncio.Event() # Пришло очередное событие
+        self.resume = asyncio.Event()   # Зависший клиент снова читает
+        self._disconnect = asyncio.Event()
+        self._request_sent = False
+
+    async def run(self) -> None:
+        scope = {
+            "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": self.path, "raw_path": self.path.encode(), "root_path": "",
+            "query_string": b"", "headers": [(b"host", b"microbench")], "client": ("127.0.0.1", 0), "server": ("microbench", 80),
+        }
+        await self.app(scope, self._receive, self._send)
+
+    def disconnect(self) -> None:
+        self.resume.set()
+        self._disconnect.set()
+
+    async def _receive(self):
+        if not self._request_sent:
+            self._request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message) -> None:
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            return
+        body = message.get("body", b"")
+        if body.startswith(b"event: "):
+            self.events.append((body[7:body.index(b"\n")].decode(), time.perf_counter()))
+            self.received.set()
+            if self.stalled and len(self.events) == 1:
+                # Как клиент, переставший читать сокет: send (запись в сокет) не возвращается
+                await self.resume.wait()
+
+async def bench_leaderboard(iterations: int) -> List[Dict[str, Any]]:
+    """
+    iterations подписчиков на самую большую опубликованную таблицу. LEADERBOARD_ROUNDS раз меняется результат
+    лидера, и для каждого изменения меряется время от коммита до получения update всеми читающими подписчиками.
+    Зависшие подписчики не читают поток до конца прогона: их очередь переполняется, и после возобновления
+    они должны получить один актуальный снимок вместо пропущенных обновлений.
+    """
+    import resource
+    import httpx
+    import numpy as np
+    from sqlalchemy import func
+    from sqlmodel import select
+    from app.core.db import AsyncSessionFactory
+    from app.core.leaderboard import leaderboard_hub, leaderboard_refreshes, leaderboard_resyncs
+    from app.core.config import settings
+    from app.crud import crud_result
+    from app.main import app
+    from app.models.competition import Competition, CompetitionStatusEnum
+    from app.models.result import Result, ResultCreate
+
+    async with AsyncSessionFactory() as session:
+        competition_id = (await session.execute(
+            select(Result.competition_id).join(Competition, Competition.id == Result.competition_id)
+            .where(Competition.status == CompetitionStatusEnum.RESULTS_PUBLISHED)
+            .group_by(Result.competition_id).order_by(func.count().desc()).limit(1)
+        )).scalar()
+        if competition_id is None:
+            raise SystemExit("The database has no published results for the leaderboard benchmark, seed it first")
+        leader = (await crud_result.get_results_by_competition(session, competition_id=competition_id, limit=1))[0]
+        leader_in = ResultCreate(user_id=leader.user_id, competition_id=competition_id, result_value=leader.result_value, rank=leader.rank)
+
+    path = f"/api/v1/competitions/{competition_id}/results/stream"
+    stalled_count = int(iterations * LEADERBOARD_STALLED_SHARE)
+    clients = [_SseClient(app, path, stalled=i < stalled_count) for i in range(iterations)]
+    readers = clients[stalled_count:]
+    refreshes_before = leaderboard_refreshes._values.get((), 0.0)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(client.run()) for client in clients]
+    while sum(1 for client in clients if client.events) < iterations:
+        if time.perf_counter() - started > 120:
+            raise SystemExit("Subscribers did not receive the initial snapshot within 120 s")
+        await asyncio.sleep(0.01)
+    connect_s = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    latencies: List[float] = []
+    missed = 0
+    for round_number in range(LEADERBOARD_ROUNDS):
+        # Пауза между изменениями не меньше интервала обновления вещателя - каждое изменение дает свое событие
+        await asyncio.sleep(settings.LEADERBOARD_MIN_REFRESH_INTERVAL_SECONDS)
+        for client in readers:
+            client.received.clear()
+        expected = len(clients[-1].events) + 1
+        value = f"{leader.result_value}" if round_number == LEADERBOARD_ROUNDS - 1 else f"bench-{round_number}"
+        async with AsyncSessionFactory() as session:
+            await crud_result.create_result(session, obj_in=leader_in.model_copy(update={"result_value": value}))
+        committed = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.gather(*(c.received.wait() for c in readers if len(c.events) < expected)), 10)
+        except asyncio.TimeoutError:
+            pass
+        for client in readers:
+            if len(client.events) >= expected and client.events[expected - 1][0] == "update":
+                latencies.append(client.events[expected - 1][1] - committed)
+            else:
+                missed += 1
+
+    # Зависшие клиенты снова читают: первым после паузы должен прийти снимок, заменивший пропущенные обновления
+    for client in clients[:stalled_count]:
+        client.resume.set()
+    await asyncio.sleep(0.1)
+    resynced = sum(1 for client in clients[:stalled_count] if len(client.events) > 1 and client.events[1][0] == "snapshot")
+    refreshes = leaderboard_refreshes._values.get((), 0.0) - refreshes_before
+
+    # Для сравнения: тот же объем чтения, если бы каждый подписчик после изменения перезапрашивал страницу
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://microbench") as client:
+        url = f"/api/v1/competitions/{competition_id}/results"
+        params = {"limit": settings.LEADERBOARD_STREAM_SIZE}
+        for _ in range(20):
+            await client.get(url, params=params)
+        polls = min(iterations, 500)
+        poll_started = time.perf_counter()
+        for _ in range(polls):
+            await client.get(url, params=params)
+        poll_ms = (time.perf_counter() - poll_started) / polls * 1000
+
+    for client in clients:
+        client.disconnect()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    p50, p99, worst = np.percentile(latencies, [50, 99, 100]) * 1000 if latencies else (0.0, 0.0, 0.0)
+    return [{
+        "subscribers": iterations, "stalled": stalled_count, "rounds": LEADERBOARD_ROUNDS,
+        "connect_s": connect_s, "rss_kb_per_subscriber": (rss_after - rss_before) / iterations,
+        "p50_ms": p50, "p99_ms": p99, "max_ms": worst, "missed": missed,
+        "resynced": resynced, "resyncs_metric": leaderboard_resyncs._values.get((), 0.0),
+        "db_refreshes": refreshes, "poll_ms": poll_ms,
+        "open_after_disconnect": leaderboard_hub.subscribers, "broadcasters_after_disconnect": leaderboard_hub.broadcasters,
+    }]
+
+def _print_leaderboard(rows: Sequence[Dict[str, Any]]) -> None:
+    r = rows[0]
+    print(f"{r['subscribers']} subscribers ({r['stalled']} stalled) connected and got a snapshot in {r['connect_s']:.2f}s, "
+          f"~{r['rss_kb_per_subscriber']:.1f} KB RSS each")
+    print(f"{r['rounds']} result changes: commit -> update delivered to every reading subscriber "
+          f"p50 {r['p50_ms']:.0f} ms, p99 {r['p99_ms']:.0f} ms, max {r['max_ms']:.0f} ms; missed {r['missed']}")
+    print(f"Stalled subscribers resynced with a single snapshot: {r['resynced']}/{r['stalled']} "
+          f"(leaderboard_resyncs_total {r['resyncs_metric']:.0f})")
+    print(f"Leaderboard reads from the DB: {r['db_refreshes']:.0f}; polling instead: "
+          f"{r['subscribers'] * r['rounds']} GET /results at {r['poll_ms']:.1f} ms each = "
+          f"{r['subscribers'] * r['rounds'] * r['poll_ms'] / 1000:.0f} s of server time")
+    print(f"After disconnect: {r['open_after_disconnect']} open streams, {r['broadcasters_after_disconnect']} broadcasters")
+
+# Размер страницы и поля, которые запрашивают списки фронтенда
+PAYLOAD_PAGE_SIZE = 200
+PAYLOAD_COMPETITION_FIELDS = "title,reg_start_at,reg_end_at,comp_start_at,comp_end_at,status,type"
+PAYLOAD_RESULT_FIELDS = "rank,result_value,user"
+
+async def bench_payload(iterations: int) -> List[Dict[str, Any]]:
+    """ Полный ответ против разреженного: байты по кодировкам, p50 запроса и время сериализации страницы. """
+    from typing import List as ListType
+
+    import httpx
+    import numpy as np
+    from pydantic import TypeAdapter
+    from sqlmodel import func, select
+    from app.api import sparse_fields
+    from app.api.v1.endpoints.competitions import _to_result_read_with_user
+    from app.core.db import AsyncSessionFactory
+    from app.crud import crud_competition, crud_result
+    from app.main import app
+    from app.models.competition import Competition, CompetitionPublic, CompetitionStatusEnum
+    from app.models.result import Result, ResultReadWithUser
+
+    async with AsyncSessionFactory() as session:
+        competition_id = (await session.execute(
+            select(Result.competition_id).join(Competition, Competition.id == Result.competition_id)
+            .where(Competition.status == CompetitionStatusEnum.RESULTS_PUBLISHED)
+            .group_by(Result.competition_id).order_by(func.count().desc()).limit(1)
+        )).scalar()
+    if competition_id is None:
+        raise SystemExit("The payload benchmark needs a competition with published results, seed the database first")
+
+    def fields_tuple(model, fields: str) -> tuple:
+        return tuple(name for name in model.model_fields if name in set(fields.split(",")) | {"id"})
+
+    # Сериализация в том же виде, что и в эндпоинтах: полная модель проверяется из ORM-объектов и
+    # сериализуется схемой ответа, разреженная - строки БД сразу схемой выбранных полей
+    async with AsyncSessionFactory() as session:
+        competitions = await crud_competition.get_competitions(session, limit=PAYLOAD_PAGE_SIZE)
+        competition_fields = fields_tuple(CompetitionPublic, PAYLOAD_COMPETITION_FIELDS)
+        competition_rows = await crud_competition.get_competitions(session, limit=PAYLOAD_PAGE_SIZE, fields=competition_fields)
+        results = await crud_result.get_results_by_competition(session, competition_id=competition_id, limit=PAYLOAD_PAGE_SIZE)
+        result_fields = fields_tuple(ResultReadWithUser, PAYLOAD_RESULT_FIELDS)
+        result_rows = await crud_result.get_result_rows_by_competition(
+            session, competition_id=competition_id, fields=result_fields, skip=0, limit=PAYLOAD_PAGE_SIZE)
+    competition_adapter = TypeAdapter(ListType[CompetitionPublic])
+    result_adapter = TypeAdapter(ListType[ResultReadWithUser])
+    serializers = {
+        ("competitions", "full"): lambda: competition_adapter.dump_json(
+            competition_adapter.validate_python(competitions, from_attributes=True)),
+        ("competitions", "fields"): lambda: sparse_fields.sparse_response(
+            CompetitionPublic, competition_fields, competition_rows).body,
+        ("results", "full"): lambda: result_adapter.dump_json(
+            result_adapter.validate_python([_to_result_read_with_user(res) for res in results], from_attributes=True)),
+        ("results", "fields"): lambda: sparse_fields.sparse_response(
+            ResultReadWithUser, result_fields, result_rows).body,
+    }
+
+    cases = [
+        ("competitions", "full", "/api/v1/competitions", {}),
+        ("competitions", "fields", "/api/v1/competitions", {"fields": PAYLOAD_COMPETITION_FIELDS}),
+        ("results", "full", f"/api/v1/competitions/{competition_id}/results", {}),
+        ("results", "fields", f"/api/v1/competitions/{competition_id}/results", {"fields": PAYLOAD_RESULT_FIELDS}),
+    ]
+    rows = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://microbench") as client:
+        for endpoint, variant, url, params in cases:
+            params = {**params, "limit": PAYLOAD_PAGE_SIZE}
+            row = {"endpoint": endpoint, "variant": variant}
+            for encoding in ("identity", "gzip", "br"):
+                response = await client.get(url, params=params, headers={"Accept-Encoding": encoding})
+                row[f"{encoding}_bytes"] = int(response.headers["content-length"])
+                row[f"{encoding}_encoding"] = response.headers.get("content-encoding", "identity")
+                for _ in range(10):
+                    await client.get(url, params=params, headers={"Accept-Encoding": encoding})
+                timings = np.zeros(iterations)
+                for i in range(iterations):
+                    started = time.perf_counter()
+                    await client.get(url, params=params, headers={"Accept-Encoding": encoding})
+                    timings[i] = time.perf_counter() - started
+                row[f"{encoding}_p50_ms"] = float(np.median(timings)) * 1000
+            row["items"] = len(response.json())
+            serialize = serializers[(endpoint, variant)]
+            timings = np.zeros(iterations)
+            for i in range(iterations):
+                started = time.perf_counter()
+                serialize()
+                timings[i] = time.perf_counter() - started
+            row["serialize_us"] = float(np.median(timings)) * 1e6
+            rows.append(row)
+    return rows
+
+def _print_payload(rows: Sequence[Dict[str, Any]]) -> None:
+    print(f"{'endpoint':<14}{'variant':<8}{'items':>6}{'identity B':>12}{'gzip B':>9}{'br B':>8}"
+          f"{'p50 identity':>14}{'p50 gzip':>10}{'p50 br':>9}{'serialize':>12}")
+    for r in rows:
+        # Кодировка, которую сервер реально выбрал, если она отличается от запрошенной
+        encodings = "".join(f" ({e}: {r[f'{e}_encoding']})" for e in ("gzip", "br") if r[f"{e}_encoding"] != e)
+        print(f"{r['endpoint']:<14}{r['variant']:<8}{r['items']:>6}{r['identity_bytes']:>12}{r['gzip_bytes']:>9}"
+              f"{r['br_bytes']:>8}{r['identity_p50_ms']:>11.1f} ms{r['gzip_p50_ms']:>7.1f} ms{r['br_p50_ms']:>6.1f} ms"
+              f"{r['serialize_us'] / 1000:>9.2f} ms{encodings}")
+
+async def _engine_cache_summary() -> str:
+    from app.core.db import async_engine
+    from app.core.metrics import sqlalchemy_compiled_cache_lookups
+    cache = async_engine.sync_engine._compiled_cache
+    lookups = ", ".join(f"{labels[0]}={int(value)}" for labels, value in sqlalchemy_compiled_cache_lookups._values.items())
+    return f"Engine compiled cache: {len(cache)}/{cache.capacity} entries; lookups: {lookups}"
+
+MICROBENCHMARKS: Dict[str, tuple] = {
+    "statements": (bench_statements, _print_statements),
+    "crypto": (bench_crypto, _print_crypto),
+    "batch": (bench_batch, _print_batch),
+    "leaderboard": (bench_leaderboard, _print_leaderboard),
+    "payload": (bench_payload, _print_payload),
+}
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks of hot CRUD functions against a seeded SQLite database")
+    parser.add_argument("benchmark", choices=sorted(MICROBENCHMARKS))
+    parser.add_argument("--db", default="benchmark.db", help="Seeded SQLite file (see app.benchmark / app.seed_db)")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"{args.db} does not exist; seed it with python -m app.benchmark --db {args.db} first")
+        return 1
+    os.environ["SQLITE_DB_FILE"] = os.path.abspath(args.db)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-" + "0" * 32)
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+
+    run, report = MICROBENCHMARKS[args.benchmark]
+
+    async def run_and_summarize():
+        # Базы, засеянные до появления новых таблиц, дополняются ими (как в app.benchmark)
+        from app.core.db import create_db_and_tables
+        await create_db_and_tables()
+        rows = await run(args.iterations)
+        return rows, await _engine_cache_summary()
+
+    rows, summary = asyncio.run(run_and_summarize())
+    report(rows)
+    print(summary)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+# app/models/__init__.py
+# Все модели загружаются здесь в фиксированном порядке, с какого бы модуля ни начался импорт:
+# мапперы SQLAlchemy (связи по строковым именам "User", "Competition") и SQLModel.metadata видят полный набор таблиц.
+# После загрузки один раз достраиваются схемы, у которых остались неразрешенные ссылки вперед.
+from sqlmodel import SQLModel
+
+from . import user, competition, registration, result, idempotency, change
+
+def _rebuild_incomplete_models() -> None:
+    for module in (user, competition, registration, result, idempotency, change):
+        for value in vars(module).values():
+            if (
+                isinstance(value, type) and issubclass(value, SQLModel)
+                and value.__module__ == module.__name__ and not value.__pydantic_complete__
+            ):
+                value.model_rebuild()
+
+_rebuild_incomplete_models()
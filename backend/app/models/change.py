@@ -0,0 +1,47 @@
+# app/models/change.py
+# Журнал изменений для инкрементальной синхронизации (бот, фронтенд): запись на каждое изменение
+# соревнования, регистрации или результатов, с монотонно растущим номером seq.
+from enum import Enum
+from typing import List, Optional
+from sqlmodel import Field, SQLModel, Index
+from datetime import datetime
+from app.core.clock import utcnow
+
+class ChangeEntity(str, Enum):
+    COMPETITION = 'competition'
+    REGISTRATION = 'registration'  # Ключ - (competition_id, user_id)
+    RESULTS = 'results'            # Результаты соревнования целиком: загрузки меняют их пачками
+
+class ChangeOp(str, Enum):
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+
+class ChangeLogEntry(SQLModel, table=True):
+    # AUTOINCREMENT: номера не переиспользуются, даже если удалить самые новые записи
+    __table_args__ = (
+        # Поиск более новой записи того же объекта при уплотнении журнала
+        Index("ix_changelogentry_key_seq", "entity", "competition_id", "user_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq: Optional[int] = Field(default=None, primary_key=True)
+    entity: ChangeEntity = Field(nullable=False)
+    op: ChangeOp = Field(default=ChangeOp.UPSERT, nullable=False)
+    competition_id: int = Field(nullable=False) # Без внешнего ключа: журнал переживает удаление объекта
+    user_id: Optional[int] = Field(default=None)
+    created_at: datetime = Field(default_factory=utcnow, nullable=False, index=True)
+
+# Одно изменение в ответе /changes: что изменилось, без данных - клиент перечитывает объект
+class ChangeRead(SQLModel):
+    seq: int
+    entity: ChangeEntity
+    op: ChangeOp
+    competition_id: int
+    user_id: Optional[int] = None
+
+class ChangeFeed(SQLModel):
+    changes: List[ChangeRead] = []
+    # Передать как since в следующем запросе
+    last_seq: int
+    # Изменений больше, чем limit - следующую порцию можно забрать сразу
+    has_more: bool = False
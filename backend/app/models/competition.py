@@ -2,6 +2,7 @@
 from typing import Optional, List, TYPE_CHECKING, Literal, ForwardRef, Union, Any
 from sqlmodel import Field, SQLModel, Relationship
 from datetime import datetime
+from app.core.clock import utcnow
 from enum import Enum
 import json # Для external_links_json
 
@@ -14,6 +15,7 @@ if TYPE_CHECKING:
     from .registration import Registration
     from .result import Result, ResultReadWithUser
 
+
 # Возможные статусы соревнования
 class CompetitionStatusEnum(str, Enum):
     UPCOMING = 'upcoming'
@@ -51,8 +53,8 @@ class CompetitionBase(SQLModel):
 class Competition(CompetitionBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     organizer_id: int = Field(foreign_key="user.id", nullable=False, index=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-    updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow}, nullable=False)
+    created_at: datetime = Field(default_factory=utcnow, nullable=False)
+    updated_at: datetime = Field(default_factory=utcnow, sa_column_kwargs={"onupdate": utcnow}, nullable=False)
 
     # Связи
     organizer: 'User' = Relationship(back_populates="organized_competitions")
@@ -86,6 +88,12 @@ class CompetitionRead(CompetitionBase):
 class CompetitionReadWithOwner(CompetitionRead):
     organizer: Optional[UserPublic] = None # Включаем публичные данные организатора
 
+# Элемент ответа пакетного чтения /competitions/batch: соревнование или ошибка именно этого id
+class CompetitionBatchItem(SQLModel):
+    status_code: int
+    competition: Optional[CompetitionReadWithOwner] = None
+    detail: Optional[str] = None
+
 # Модель для публичного отображения соревнования (список, детали для юзера)
 class CompetitionPublic(CompetitionBase):
     id: int
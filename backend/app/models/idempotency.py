@@ -0,0 +1,25 @@
+# app/models/idempotency.py
+# Сохраненные итоги идемпотентных запросов (сейчас - загрузки результатов организатором).
+# Повтор того же запроса возвращает сохраненный ответ, не выполняя работу заново.
+from typing import Optional
+from sqlmodel import Field, SQLModel, UniqueConstraint
+from datetime import datetime
+from app.core.clock import utcnow
+
+class IdempotencyRecord(SQLModel, table=True):
+    __table_args__ = (UniqueConstraint("user_id", "scope", "key", name="uq_idempotency_user_scope_key"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", nullable=False)
+    # Операция и ее объект, например "results_upload:42"
+    scope: str = Field(nullable=False)
+    # Заголовок Idempotency-Key или "sha256:<хеш содержимого>", если заголовка нет
+    key: str = Field(nullable=False)
+    # Хеш содержимого и параметров запроса: тот же ключ с другим содержимым - ошибка клиента
+    request_hash: str = Field(nullable=False)
+    # Пока запрос выполняется, ответа нет (status_code is None)
+    status_code: Optional[int] = Field(default=None)
+    response_body: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=utcnow, nullable=False)
+    # Для незавершенной записи - срок блокировки, для завершенной - срок хранения ответа
+    expires_at: datetime = Field(nullable=False, index=True)
@@ -2,6 +2,7 @@
 from typing import Optional, TYPE_CHECKING
 from sqlmodel import Field, SQLModel, Relationship, UniqueConstraint
 from datetime import datetime
+from app.core.clock import utcnow
 
 # Import models needed at runtime
 from .user import UserPublic
@@ -11,6 +12,7 @@ if TYPE_CHECKING:
     from .user import User
     from .competition import Competition
 
+
 class RegistrationBase(SQLModel):
     user_id: int = Field(foreign_key="user.id", primary_key=True, index=True) # Составной ПК
     competition_id: int = Field(foreign_key="competition.id", primary_key=True, index=True) # Составной ПК
@@ -19,7 +21,7 @@ class Registration(RegistrationBase, table=True):
     # Определяем составной первичный ключ и уникальность пары
     __table_args__ = (UniqueConstraint("user_id", "competition_id", name="uq_user_competition_registration"),)
 
-    registered_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    registered_at: datetime = Field(default_factory=utcnow, nullable=False)
 
     # Связи
     user: 'User' = Relationship(back_populates="registrations")
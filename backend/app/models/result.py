@@ -1,19 +1,25 @@
 # app/models/result.py
-from typing import Optional, TYPE_CHECKING
-from sqlmodel import Field, SQLModel, Relationship, UniqueConstraint
+from enum import Enum
+from typing import Optional, List, Dict, TYPE_CHECKING
+from sqlmodel import Field, SQLModel, Relationship, UniqueConstraint, Index
 from datetime import datetime
+from app.core.clock import utcnow
 
 # Import UserPublic directly for runtime usage
 from .user import UserPublic
+from .message import Message
 
 if TYPE_CHECKING:
     from .user import User
     from .competition import Competition
 
+
 class ResultBase(SQLModel):
     # user_id и competition_id будут частью составного ключа ниже
     result_value: Optional[str] = Field(default=None) # Используем TEXT для гибкости
-    rank: Optional[int] = Field(default=None, index=True) # Место
+    # Место. Отдельный индекс по rank не нужен: выборки всегда идут внутри соревнования
+    # и используют составной индекс ix_result_competition_rank_submitted
+    rank: Optional[int] = Field(default=None)
 
 class Result(ResultBase, table=True):
     # Составной первичный ключ или просто уникальное ограничение?
@@ -21,10 +27,15 @@ class Result(ResultBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id", index=True, nullable=False)
     competition_id: int = Field(foreign_key="competition.id", index=True, nullable=False)
-    submitted_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    submitted_at: datetime = Field(default_factory=utcnow, nullable=False)
 
     # Уникальность пары пользователь-соревнование
-    __table_args__ = (UniqueConstraint("user_id", "competition_id", name="uq_user_competition_result"),)
+    # Составной индекс под сортировку таблицы результатов (rank, submitted_at) внутри соревнования.
+    # SQLite неявно дописывает rowid (id) в конец индекса, поэтому он покрывает и tie-break по id.
+    __table_args__ = (
+        UniqueConstraint("user_id", "competition_id", name="uq_user_competition_result"),
+        Index("ix_result_competition_rank_submitted", "competition_id", "rank", "submitted_at"),
+    )
 
     # Связи
     user: 'User' = Relationship(back_populates="results")
@@ -45,4 +56,70 @@ class ResultRead(ResultBase):
 
 # Модель для отображения результата с данными пользователя (в таблице результатов)
 class ResultReadWithUser(ResultRead):
-    user: Optional[UserPublic] = None
\ No newline at end of file
+    user: Optional[UserPublic] = None
+
+# Модель для "окрестности" участника в таблице результатов (свой результат + соседи сверху и снизу)
+class ResultsAroundUser(SQLModel):
+    above: List[ResultReadWithUser] = []
+    me: ResultReadWithUser
+    below: List[ResultReadWithUser] = []
+
+# События потока живой таблицы (GET /competitions/{id}/results/stream, SSE).
+# version - номер записи журнала изменений, до которой включительно таблица актуальна (он же id события)
+class LeaderboardSnapshot(SQLModel):
+    competition_id: int
+    version: int
+    published: bool  # До публикации таблица пустая, как и в GET /results
+    results: List[ResultReadWithUser] = []
+
+# Изменения верхней части таблицы с прошлого события: строки заменяются по user_id, клиент пересортировывает по rank
+class LeaderboardUpdate(SQLModel):
+    competition_id: int
+    version: int
+    changed: List[ResultReadWithUser] = []
+    removed: List[int] = []  # user_id строк, выбывших из таблицы
+
+# Итог серверного пересчета мест
+class ResultRankingSummary(SQLModel):
+    ranked: int = 0    # Результатов с местом
+    unranked: int = 0  # Результатов без разбираемого значения (место сброшено)
+    updated: int = 0   # Строк, у которых место изменилось
+
+# Как применять загрузку результатов
+class ResultUploadMode(str, Enum):
+    UPSERT = 'upsert'  # Записать все строки файла
+    DIFF = 'diff'      # Записать только новые и изменившиеся строки (сравнение с сохраненными)
+
+# Итог применения загрузки в режиме diff
+class ResultDiffSummary(SQLModel):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0   # Только при delete_missing
+
+# Ответ на загрузку результатов: сообщение и счетчики (в режиме upsert - только processed)
+class ResultUploadResponse(Message):
+    processed: int = 0
+    errors: int = 0
+    inserted: Optional[int] = None
+    updated: Optional[int] = None
+    unchanged: Optional[int] = None
+    deleted: Optional[int] = None
+
+# Столбец гистограммы распределения результатов
+class ResultHistogramBin(SQLModel):
+    lower: float
+    upper: float
+    count: int
+
+# Статистика распределения result_value по соревнованию
+class ResultStats(SQLModel):
+    count: int = 0          # Всего результатов
+    numeric_count: int = 0  # Из них с разбираемым значением
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    std: Optional[float] = None
+    percentiles: Dict[str, float] = {}
+    histogram: List[ResultHistogramBin] = []
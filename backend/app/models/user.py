@@ -2,6 +2,7 @@
 from typing import Optional, List, TYPE_CHECKING
 from sqlmodel import Field, SQLModel, Relationship
 from datetime import datetime
+from app.core.clock import utcnow
 
 # Импортируем связанные модели для Relationship type hints
 if TYPE_CHECKING:
@@ -10,6 +11,7 @@ if TYPE_CHECKING:
     from .registration import Registration
     from .result import Result
 
+
 class UserBase(SQLModel):
     telegram_id: int = Field(index=True, unique=True, sa_column_kwargs={"nullable": False})
     username: Optional[str] = Field(default=None, index=True)
@@ -20,8 +22,8 @@ class UserBase(SQLModel):
 
 class User(UserBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-    updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow}, nullable=False)
+    created_at: datetime = Field(default_factory=utcnow, nullable=False)
+    updated_at: datetime = Field(default_factory=utcnow, sa_column_kwargs={"onupdate": utcnow}, nullable=False)
 
     # Связи (для ORM)
     organized_competitions: List['Competition'] = Relationship(back_populates="organizer")
@@ -0,0 +1,315 @@
+# app/seed_db.py
+# Генератор синтетических данных для нагрузочного тестирования.
+# Пользователи, организаторы, соревнования во всех статусах, регистрации и результаты
+# с Zipf-распределением популярности соревнований. Один и тот же --seed дает один и тот же датасет.
+#
+# Запуск: python -m app.seed_db --users 1000000 --competitions 20000 --results 10000000 --reset
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+import numpy as np
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import SQLModel
+
+from app.core.db import get_engine
+from app.core.ranking import RankDirection, compute_ranks
+from app.models.user import User
+from app.models.competition import Competition, CompetitionStatusEnum
+from app.models.registration import Registration
+from app.models.result import Result
+
+# Сколько строк вставлять одним executemany
+INSERT_CHUNK_SIZE = 20_000
+# telegram_id синтетических пользователей начинаются отсюда, чтобы не пересекаться с реальными
+TELEGRAM_ID_OFFSET = 7_000_000_000
+
+FIRST_NAMES = ["Alex", "Maria", "Ivan", "Olga", "Dmitry", "Anna", "Sergey", "Elena", "Pavel", "Nina"]
+COMPETITION_TYPES = ["olympiad", "hackathon", "contest", "marathon", "quiz"]
+STATUSES = list(CompetitionStatusEnum)
+# Статусы, в которых уже есть регистрации / результаты
+REGISTRATION_STATUSES = {s for s in STATUSES if s != CompetitionStatusEnum.UPCOMING}
+RESULT_STATUSES = {CompetitionStatusEnum.CLOSED, CompetitionStatusEnum.FINISHED, CompetitionStatusEnum.RESULTS_PUBLISHED}
+
+async def _insert_chunked(conn: AsyncConnection, model: type[SQLModel], rows: Iterable[Dict]) -> int:
+    """ Вставляет строки порциями по INSERT_CHUNK_SIZE одним executemany на порцию. """
+    statement = insert(model.__table__)
+    total = 0
+    chunk: List[Dict] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= INSERT_CHUNK_SIZE:
+            await conn.execute(statement, chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        await conn.execute(statement, chunk)
+        total += len(chunk)
+    return total
+
+async def _insert_raw(conn: AsyncConnection, model: type[SQLModel], columns: List[str], rows: List[tuple]) -> int:
+    """
+    Вставка уже готовых кортежей напрямую через драйвер, минуя обработку типов SQLAlchemy.
+    Для самых больших таблиц: значения (в т.ч. даты) должны быть подготовлены в формате хранения SQLite.
+    """
+    statement = (
+        f'INSERT INTO "{model.__table__.name}" ({", ".join(columns)}) '
+        f'VALUES ({", ".join("?" for _ in columns)})'
+    )
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        await conn.exec_driver_sql(statement, rows[start:start + INSERT_CHUNK_SIZE])
+    return len(rows)
+
+def _sqlite_datetimes(start: datetime, offsets_seconds: np.ndarray) -> List[str]:
+    """ Даты start + offset в том же строковом формате, в котором их хранит SQLAlchemy ('YYYY-MM-DD HH:MM:SS.ffffff'). """
+    base = np.datetime64(start.astimezone(timezone.utc).replace(tzinfo=None), "us")
+    values = base + offsets_seconds.astype("timedelta64[s]")
+    return [value.replace("T", " ") for value in np.datetime_as_string(values, unit="us")]
+
+def _zipf_weights(rng: np.random.Generator, n: int, exponent: float) -> np.ndarray:
+    """ Веса популярности 1/k^s, перемешанные, чтобы популярность не совпадала с id. """
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+def _allocate(rng: np.random.Generator, total: int, weights: np.ndarray, eligible: np.ndarray, cap: int) -> np.ndarray:
+    """
+    Раскладывает total строк по соревнованиям пропорционально весам (только eligible), не больше cap на соревнование.
+    Излишек над cap переносится на соревнования с запасом, так что строк ровно total (емкость проверяет seed()).
+    """
+    counts = np.zeros(len(weights), dtype=np.int64)
+    if total == 0 or not eligible.any():
+        return counts
+    p = np.where(eligible, weights, 0.0)
+    counts = np.minimum(rng.multinomial(total, p / p.sum()), cap)
+    while (overflow := total - int(counts.sum())) > 0:
+        room = np.where(counts < cap, p, 0.0)
+        counts = np.minimum(counts + rng.multinomial(overflow, room / room.sum()), cap)
+    return counts
+
+def _check_capacity(*, users: int, competitions: int, registrations: int, results: int) -> None:
+    """
+    В соревновании не больше users результатов и регистраций: если запрошено больше, чем помещается
+    во все подходящие по статусу соревнования, - ValueError до записи, а не датасет меньше запрошенного.
+    """
+    for name, total, allowed in (("results", results, RESULT_STATUSES), ("registrations", registrations, REGISTRATION_STATUSES)):
+        eligible = sum(1 for i in range(competitions) if STATUSES[i % len(STATUSES)] in allowed)
+        if total > eligible * users:
+            raise ValueError(
+                f"Cannot seed {total} {name}: {eligible} eligible competition(s) x {users} user(s) hold at most {eligible * users}"
+            )
+
+async def seed(
+    *, users: int, organizers: int, competitions: int, registrations: int, results: int,
+    seed: int = 42, zipf_exponent: float = 1.1, base_date: datetime = datetime(2025, 1, 1, tzinfo=timezone.utc), reset: bool = False,
+) -> Dict[str, int]:
+    _check_capacity(users=users, competitions=competitions, registrations=registrations, results=results)
+    rng = np.random.default_rng(seed)
+    organizers = max(1, min(organizers, users))
+
+    async with get_engine().begin() as conn:
+        if reset:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    # Вся заливка идет одной транзакцией на одном соединении: PRAGMA действуют на соединение,
+    # а датасет всегда можно пересоздать, поэтому жертвуем надежностью записи ради скорости
+    async with get_engine().connect() as conn:
+        await conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        await conn.exec_driver_sql("PRAGMA cache_size=-262144") # 256 MB
+        counts = await _seed_rows(
+            conn, rng, users=users, organizers=organizers, competitions=competitions,
+            registrations=registrations, results=results, zipf_exponent=zipf_exponent, base_date=base_date,
+        )
+        await conn.commit()
+    return counts
+
+async def _seed_rows(
+    conn: AsyncConnection, rng: np.random.Generator, *, users: int, organizers: int, competitions: int,
+    registrations: int, results: int, zipf_exponent: float, base_date: datetime,
+) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    started = time.perf_counter()
+
+    # --- Пользователи (первые organizers - организаторы) ---
+    first_names = rng.integers(0, len(FIRST_NAMES), users)
+    created_offsets = rng.integers(0, 365 * 24 * 3600, users)
+    def user_rows():
+        for i in range(users):
+            created_at = base_date - timedelta(seconds=int(created_offsets[i]))
+            yield {
+                "id": i + 1,
+                "telegram_id": TELEGRAM_ID_OFFSET + i + 1,
+                "username": f"user{i + 1}",
+                "first_name": FIRST_NAMES[first_names[i]],
+                "last_name": None,
+                "avatar_url": None,
+                "is_organizer": i < organizers,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+    counts["user"] = await _insert_chunked(conn, User, user_rows())
+    logger.info("Inserted %d user(s) in %.1fs", counts["user"], time.perf_counter() - started)
+
+    # --- Соревнования: статусы по кругу, организатор и популярность - по Zipf ---
+    statuses = [STATUSES[i % len(STATUSES)] for i in range(competitions)]
+    # Даты согласованы со статусом: завершенные - в прошлом, предстоящие - в будущем
+    status_shift_days = {
+        CompetitionStatusEnum.UPCOMING: 30, CompetitionStatusEnum.REGISTRATION_OPEN: 10,
+        CompetitionStatusEnum.ONGOING: -1, CompetitionStatusEnum.CLOSED: -10,
+        CompetitionStatusEnum.FINISHED: -20, CompetitionStatusEnum.RESULTS_PUBLISHED: -30,
+    }
+    comp_starts = [base_date + timedelta(days=status_shift_days[status] + i % 7) for i, status in enumerate(statuses)]
+    organizer_ids = rng.choice(organizers, size=competitions, p=_zipf_weights(rng, organizers, zipf_exponent)) + 1
+    types = rng.integers(0, len(COMPETITION_TYPES), competitions)
+    def competition_rows():
+        for i, status in enumerate(statuses):
+            comp_start_at = comp_starts[i]
+            yield {
+                "id": i + 1,
+                "title": f"Competition #{i + 1}",
+                "description": f"Synthetic {COMPETITION_TYPES[types[i]]} for scale testing",
+                "type": COMPETITION_TYPES[types[i]],
+                "reg_start_at": comp_start_at - timedelta(days=20),
+                "reg_end_at": comp_start_at - timedelta(days=1),
+                "comp_start_at": comp_start_at,
+                "comp_end_at": comp_start_at + timedelta(hours=3),
+                "status": status,
+                "external_links_json": "{}",
+                "organizer_id": int(organizer_ids[i]),
+                "created_at": comp_start_at - timedelta(days=40),
+                "updated_at": comp_start_at - timedelta(days=40),
+            }
+    counts["competition"] = await _insert_chunked(conn, Competition, competition_rows())
+    logger.info("Inserted %d competition(s) in %.1fs", counts["competition"], time.perf_counter() - started)
+
+    # --- Регистрации и результаты по популярности ---
+    popularity = _zipf_weights(rng, competitions, zipf_exponent)
+    status_array = np.array([s.value for s in statuses])
+    result_counts = _allocate(rng, results, popularity, np.isin(status_array, [s.value for s in RESULT_STATUSES]), users)
+    registration_counts = _allocate(rng, registrations, popularity, np.isin(status_array, [s.value for s in REGISTRATION_STATUSES]), users)
+    # Все, у кого есть результат, зарегистрированы
+    registration_counts = np.maximum(registration_counts, result_counts)
+
+    counts["registration"] = counts["result"] = 0
+    for competition_index in np.flatnonzero(registration_counts):
+        competition_id = int(competition_index) + 1
+        comp_start_at = comp_starts[competition_index]
+        participants = rng.choice(users, size=int(registration_counts[competition_index]), replace=False) + 1
+        registered_offsets = rng.integers(0, 20 * 24 * 3600, participants.size)
+        n_results = int(result_counts[competition_index])
+        values = np.round(rng.normal(100.0, 15.0, n_results), 2)
+        ranks = compute_ranks(values, direction=RankDirection.DESC)
+        submitted_offsets = rng.integers(0, 3 * 3600, n_results)
+
+        counts["registration"] += await _insert_raw(
+            conn, Registration, ["user_id", "competition_id", "registered_at"],
+            list(zip(participants.tolist(), [competition_id] * participants.size, _sqlite_datetimes(comp_start_at, -registered_offsets))),
+        )
+        counts["result"] += await _insert_raw(
+            conn, Result, ["user_id", "competition_id", "result_value", "rank", "submitted_at"],
+            list(zip(
+                participants[:n_results].tolist(), [competition_id] * n_results, [f"{value:.2f}" for value in values.tolist()],
+                ranks.tolist(), _sqlite_datetimes(comp_start_at, submitted_offsets),
+            )),
+        )
+
+    logger.info(
+        "Inserted %d registration(s) and %d result(s) in %.1fs",
+        counts["registration"], counts["result"], time.perf_counter() - started,
+    )
+    return counts
+
+async def seed_large_competition(
+    *, results: int, seed: int = 42, base_date: datetime = datetime(2025, 1, 1, tzinfo=timezone.utc),
+) -> int:
+    """
+    Опубликованное соревнование ровно на results результатов (для бенчмарков статистики и таблиц на
+    миллионе строк - Zipf-распределение основного засева столько в одно соревнование не кладет).
+    Недостающие пользователи досоздаются. Повторный вызов на той же базе возвращает уже созданное соревнование.
+    """
+    title = f"Large competition ({results} results)"
+    rng = np.random.default_rng(seed)
+    async with get_engine().begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        existing = (await conn.execute(select(Competition.id).where(Competition.title == title))).scalar()
+        if existing is not None:
+            return existing
+
+    started = time.perf_counter()
+    async with get_engine().connect() as conn:
+        await conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        max_user_id, max_telegram_id, users = (await conn.execute(
+            select(func.coalesce(func.max(User.id), 0), func.coalesce(func.max(User.telegram_id), TELEGRAM_ID_OFFSET), func.count(User.id))
+        )).one()
+        missing = max(0, results - users)
+        if missing:
+            created_at = _sqlite_datetimes(base_date, np.zeros(1, dtype=np.int64))[0]
+            await _insert_raw(
+                conn, User, ["id", "telegram_id", "username", "first_name", "is_organizer", "created_at", "updated_at"],
+                [(max_user_id + k, max_telegram_id + k, f"user{max_user_id + k}", FIRST_NAMES[k % len(FIRST_NAMES)], False, created_at, created_at)
+                 for k in range(1, missing + 1)],
+            )
+        organizer_id = (await conn.execute(select(func.min(User.id)).where(User.is_organizer))).scalar() or 1
+
+        comp_start_at = base_date - timedelta(days=30)
+        competition_id = (await conn.execute(insert(Competition.__table__).values(
+            title=title, description="Synthetic competition for large-table benchmarks", type="marathon",
+            reg_start_at=comp_start_at - timedelta(days=20), reg_end_at=comp_start_at - timedelta(days=1),
+            comp_start_at=comp_start_at, comp_end_at=comp_start_at + timedelta(hours=3),
+            status=CompetitionStatusEnum.RESULTS_PUBLISHED, external_links_json="{}", organizer_id=organizer_id,
+            created_at=comp_start_at - timedelta(days=40), updated_at=comp_start_at - timedelta(days=40),
+        ))).inserted_primary_key[0]
+
+        participants = (await conn.execute(select(User.id).order_by(User.id).limit(results))).scalars().all()
+        values = np.round(rng.normal(100.0, 15.0, results), 2)
+        ranks = compute_ranks(values, direction=RankDirection.DESC)
+        await _insert_raw(
+            conn, Registration, ["user_id", "competition_id", "registered_at"],
+            list(zip(participants, [competition_id] * results, _sqlite_datetimes(comp_start_at, -rng.integers(0, 20 * 24 * 3600, results)))),
+        )
+        await _insert_raw(
+            conn, Result, ["user_id", "competition_id", "result_value", "rank", "submitted_at"],
+            list(zip(
+                participants, [competition_id] * results, [f"{value:.2f}" for value in values.tolist()],
+                ranks.tolist(), _sqlite_datetimes(comp_start_at, rng.integers(0, 3 * 3600, results)),
+            )),
+        )
+        await conn.commit()
+    logger.info(
+        "Seeded competition %d with %d result(s) (%d new user(s)) in %.1fs",
+        competition_id, results, missing, time.perf_counter() - started,
+    )
+    return competition_id
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed the database with a deterministic synthetic dataset")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--organizers", type=int, default=100)
+    parser.add_argument("--competitions", type=int, default=500)
+    parser.add_argument("--registrations", type=int, default=None, help="Defaults to 1.2x --results")
+    parser.add_argument("--results", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--zipf-exponent", type=float, default=1.1, help="Popularity skew (higher = more skewed)")
+    parser.add_argument("--reset", action="store_true", help="Drop all tables before seeding")
+    args = parser.parse_args()
+
+    registrations = args.registrations if args.registrations is not None else int(args.results * 1.2)
+    try:
+        _check_capacity(users=args.users, competitions=args.competitions, registrations=registrations, results=args.results)
+    except ValueError as e:
+        parser.error(str(e))
+
+    logger.info("Seeding database...")
+    asyncio.run(seed(
+        users=args.users, organizers=args.organizers, competitions=args.competitions,
+        registrations=registrations, results=args.results, seed=args.seed, zipf_exponent=args.zipf_exponent, reset=args.reset,
+    ))
+    logger.info("Seeding finished.")
@@ -0,0 +1,81 @@
+# tests/conftest.py
+# Общие фикстуры: приложение на временной SQLite-базе, засеянной app.seed_db, и HTTP-клиент через ASGI.
+# Окружение выставляется до импорта app.*: настройки читаются при импорте app.core.config.
+#
+# Запуск (из backend/): python -m pytest -q
+import os
+import shutil
+import tempfile
+
+_DB_DIR = tempfile.mkdtemp(prefix="course1-tests-")
+os.environ["SQLITE_DB_FILE"] = os.path.join(_DB_DIR, "test.db")
+os.environ["SECRET_KEY"] = "test-secret-key-" + "0" * 32
+os.environ["ENVIRONMENT"] = "local" # Заголовок X-DB-Query-Count есть только вне production
+os.environ["ADMISSION_CONTROL_ENABLED"] = "false"
+os.environ["SLOW_QUERY_THRESHOLD_MS"] = "0"
+os.environ["LOG_LEVEL"] = "WARNING"
+
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List
+
+import httpx
+import pytest
+from sqlalchemy import insert, text
+from sqlmodel import select
+
+from app.core.db import AsyncSessionFactory, async_engine
+from app.core.security import create_access_token
+from app.models.competition import Competition
+from app.models.user import User
+from app.seed_db import TELEGRAM_ID_OFFSET, seed
+
+# Участников в "больших" соревнованиях тестов (таблицы результатов на 100k строк)
+LARGE_COMPETITION_SIZE = 100_000
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+async def seeded_db() -> AsyncIterator[Dict[str, int]]:
+    """ Небольшой детерминированный датасет на всю сессию тестов. """
+    counts = await seed(users=500, organizers=5, competitions=20, registrations=2000, results=3000, reset=True)
+    yield counts
+    await async_engine.dispose()
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+@pytest.fixture
+async def client(seeded_db) -> AsyncIterator[httpx.AsyncClient]:
+    from app.main import app
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http_client:
+        yield http_client
+
+@pytest.fixture
+async def session(seeded_db):
+    async with AsyncSessionFactory() as db:
+        yield db
+
+def auth_headers(user: User) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token(subject=user.telegram_id)}"}
+
+@pytest.fixture
+async def organizer_competition(session):
+    """ (организатор, одно из его соревнований) """
+    competition = (await session.execute(select(Competition).order_by(Competition.id).limit(1))).scalar_one()
+    organizer = (await session.execute(select(User).where(User.id == competition.organizer_id))).scalar_one()
+    return organizer, competition
+
+@pytest.fixture(scope="session")
+async def large_user_ids(seeded_db) -> List[int]:
+    """ LARGE_COMPETITION_SIZE дополнительных пользователей - участники больших соревнований (вставка через Core). """
+    created = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    async with AsyncSessionFactory() as session:
+        first_user_id = (await session.execute(text("SELECT COALESCE(MAX(id), 0) + 1 FROM user"))).scalar()
+    user_ids = list(range(first_user_id, first_user_id + LARGE_COMPETITION_SIZE))
+    async with async_engine.begin() as conn:
+        await conn.execute(insert(User.__table__), [
+            {"id": user_id, "telegram_id": TELEGRAM_ID_OFFSET + 10_000_000 + user_id, "username": f"large{user_id}",
+             "first_name": "Large", "is_organizer": False, "created_at": created, "updated_at": created}
+            for user_id in user_ids
+        ])
+    return user_ids
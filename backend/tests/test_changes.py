@@ -0,0 +1,137 @@
+# tests/test_changes.py
+# Журнал изменений (user-047): каждая запись через CRUD оставляет ровно одну запись журнала, откат - ни одной,
+# а long-poll /changes просыпается после коммита, в том числе случившегося, пока запрос читал журнал.
+import time
+
+import anyio
+import pytest
+from sqlmodel import select
+
+from app.core.change_feed import CHANGES_PENDING, change_notifier
+from app.core.config import settings
+from app.core.ranking import RankValueType
+from app.crud import crud_change, crud_competition, crud_registration, crud_result
+from app.models.change import ChangeEntity, ChangeOp
+from app.models.competition import CompetitionCreate, CompetitionStatusEnum, CompetitionUpdate
+from app.models.registration import RegistrationCreate
+from app.models.result import ResultCreate
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+def _results(competition, user_ids, values):
+    return [ResultCreate(user_id=user_id, competition_id=competition.id, result_value=value) for user_id, value in zip(user_ids, values)]
+
+async def _register(session, competition, user_ids):
+    await crud_registration.create_registration(session, obj_in=RegistrationCreate(user_id=user_ids[0], competition_id=competition.id))
+
+async def _upload(session, competition, user_ids):
+    await crud_result.bulk_create_results(session, results_in=_results(competition, user_ids, ["3", "1", "2"]), competition_id=competition.id)
+
+# Имя -> (подготовка, проверяемая запись, сущность и операция записи журнала)
+WRITES = {
+    "update_competition": (None, lambda s, c, u: crud_competition.update_competition(
+        s, db_obj=c, obj_in=CompetitionUpdate(title="Renamed")), ChangeEntity.COMPETITION, ChangeOp.UPSERT),
+    "update_competition_status": (None, lambda s, c, u: crud_competition.update_competition_status(
+        s, c.id, CompetitionStatusEnum.ONGOING), ChangeEntity.COMPETITION, ChangeOp.UPSERT),
+    "create_registration": (None, _register, ChangeEntity.REGISTRATION, ChangeOp.UPSERT),
+    "delete_registration": (_register, lambda s, c, u: crud_registration.delete_registration(
+        s, user_id=u[0], competition_id=c.id), ChangeEntity.REGISTRATION, ChangeOp.DELETE),
+    "create_result": (None, lambda s, c, u: crud_result.create_result(
+        s, obj_in=_results(c, u, ["7"])[0]), ChangeEntity.RESULTS, ChangeOp.UPSERT),
+    "bulk_create_results": (None, _upload, ChangeEntity.RESULTS, ChangeOp.UPSERT),
+    "apply_results_diff": (_upload, lambda s, c, u: crud_result.apply_results_diff(
+        s, results_in=_results(c, u, ["3", "5"]), competition_id=c.id, delete_missing=True), ChangeEntity.RESULTS, ChangeOp.UPSERT),
+    "rerank_results": (_upload, lambda s, c, u: crud_result.rerank_results(
+        s, competition_id=c.id, value_type=RankValueType.NUMBER), ChangeEntity.RESULTS, ChangeOp.UPSERT),
+}
+
+async def _last_seq(session) -> int:
+    return await crud_change.get_last_seq(session)
+
+@pytest.fixture
+async def participants(session):
+    return (await session.execute(select(User.id).where(User.is_organizer == False).order_by(User.id).limit(3))).scalars().all()
+
+@pytest.fixture
+async def new_competition(session, organizer_competition):
+    organizer, _ = organizer_competition
+    since = await _last_seq(session)
+    competition = await crud_competition.create_competition(
+        session, competition_in=CompetitionCreate(title="Change log"), organizer_id=organizer.id,
+    )
+    feed = await crud_change.get_changes_since(session, since=since)
+    assert [(c.entity, c.competition_id) for c in feed.changes] == [(ChangeEntity.COMPETITION, competition.id)]
+    return competition
+
+@pytest.mark.parametrize("name", WRITES)
+async def test_crud_write_logs_one_entry(session, new_competition, participants, name):
+    prepare, write, entity, op = WRITES[name]
+    if prepare is not None:
+        await prepare(session, new_competition, participants)
+    since = await _last_seq(session)
+    generation = change_notifier.generation
+
+    await write(session, new_competition, participants)
+
+    feed = await crud_change.get_changes_since(session, since=since)
+    assert [(c.entity, c.op, c.competition_id) for c in feed.changes] == [(entity, op, new_competition.id)]
+    assert change_notifier.generation == generation + 1
+
+async def test_rollback_logs_nothing(session, new_competition):
+    since = await _last_seq(session)
+    generation = change_notifier.generation
+    await crud_change.record(session, ChangeEntity.COMPETITION, competition_id=new_competition.id)
+    await session.rollback()
+
+    assert CHANGES_PENDING not in session.info
+    assert await _last_seq(session) == since
+    # Следующий коммит без журнала никого не будит
+    await session.commit()
+    assert change_notifier.generation == generation
+
+async def _poll(client, since: int):
+    started = time.monotonic()
+    response = await client.get("/api/v1/changes", params={"since": since, "wait": 5})
+    assert response.status_code == 200
+    return response.json(), time.monotonic() - started
+
+async def test_long_poll_wakes_after_commit(client, session, new_competition, monkeypatch):
+    # Интервал опроса больше ожидания: ответ раньше 5 секунд возможен только по пробуждению
+    monkeypatch.setattr(settings, "CHANGES_POLL_INTERVAL_SECONDS", 10.0)
+    since = await _last_seq(session)
+    polled = {}
+
+    async def poll():
+        polled["feed"], polled["elapsed"] = await _poll(client, since)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(poll)
+        while change_notifier.waiters == 0:
+            await anyio.sleep(0.01)
+        await crud_competition.update_competition_status(session, new_competition.id, CompetitionStatusEnum.ONGOING)
+
+    assert [c["competition_id"] for c in polled["feed"]["changes"]] == [new_competition.id]
+    assert polled["elapsed"] < 2
+
+async def test_long_poll_sees_commit_during_read(client, session, new_competition, monkeypatch):
+    # Коммит между чтением журнала и ожиданием (пока закрывается сессия): событие еще не создано,
+    # поэтому запрос должен сверить номер уведомления, а не ждать интервал опроса
+    monkeypatch.setattr(settings, "CHANGES_POLL_INTERVAL_SECONDS", 10.0)
+    since = await _last_seq(session)
+    get_changes_since = crud_change.get_changes_since
+    calls = []
+
+    async def read_then_commit(db, **kwargs):
+        feed = await get_changes_since(db, **kwargs)
+        if not calls:
+            await crud_competition.update_competition_status(session, new_competition.id, CompetitionStatusEnum.ONGOING)
+        calls.append(feed)
+        return feed
+
+    monkeypatch.setattr(crud_change, "get_changes_since", read_then_commit)
+    feed, elapsed = await _poll(client, since)
+
+    assert [c["competition_id"] for c in feed["changes"]] == [new_competition.id]
+    assert len(calls) == 2
+    assert elapsed < 2
@@ -0,0 +1,35 @@
+# tests/test_compression.py
+# Сжатие ответов brotli (user-050): большие тела сжимаются в потоке, маленькие - в цикле событий,
+# результат в обоих случаях один и тот же поток brotli.
+import threading
+
+import pytest
+
+from app.core import compression
+
+pytestmark = pytest.mark.anyio
+
+brotli = pytest.importorskip("brotli")
+
+async def _compress(body: bytes, *, thread_minimum_size: int, monkeypatch):
+    threads = []
+    responder = compression.BrotliResponder(None, 0, quality=4, thread_minimum_size=thread_minimum_size)
+    compress_body = responder._compress_body
+    def recording(*args):
+        threads.append(threading.current_thread())
+        return compress_body(*args)
+    monkeypatch.setattr(responder, "_compress_body", recording)
+    compressed = await responder.apply_compression(body, more_body=False)
+    return compressed, threads
+
+@pytest.mark.parametrize("thread_minimum_size, in_thread", [(1024, True), (10 * 1024 * 1024, False)])
+async def test_large_bodies_compress_off_the_event_loop(monkeypatch, thread_minimum_size, in_thread):
+    body = b'{"rank": 1, "result_value": "12.5"},' * 10_000
+    compressed, threads = await _compress(body, thread_minimum_size=thread_minimum_size, monkeypatch=monkeypatch)
+    assert brotli.decompress(compressed) == body
+    assert (threads[0] is not threading.main_thread()) == in_thread
+
+async def test_brotli_response_through_middleware(client):
+    response = await client.get("/api/v1/competitions", params={"limit": 100}, headers={"Accept-Encoding": "br"})
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == "br"
@@ -0,0 +1,122 @@
+# tests/test_crud_batching.py
+# Число SQL-запросов пакетного слоя CRUDBase (user-041): не зависит от числа ключей/строк в пределах CHUNK_SIZE.
+import asyncio
+
+import pytest
+from sqlmodel import func, select
+
+from app.core.query_tracker import assert_max_queries, track_queries
+from app.crud import crud_competition, crud_result, crud_user
+from app.crud.base import CHUNK_SIZE
+from app.models.competition import Competition
+from app.models.result import Result
+from app.models.user import User
+
+from .conftest import auth_headers
+
+pytestmark = pytest.mark.anyio
+
+def _shape_count(stats, fragment: str) -> int:
+    return sum(count for shape, count in stats.shapes.items() if fragment in shape)
+
+async def _user_telegram_ids(session, n: int):
+    return (await session.execute(select(User.telegram_id).order_by(User.id).limit(n))).scalars().all()
+
+@pytest.mark.parametrize("n", [1, 50, CHUNK_SIZE])
+async def test_get_many_is_one_query(session, n):
+    ids = (await session.execute(select(User.id).order_by(User.id).limit(n))).scalars().all()
+    with assert_max_queries(1) as stats:
+        found = await crud_user.user.get_many(session, ids)
+    assert stats.queries == 1
+    assert sorted(found) == sorted(ids)
+
+async def test_get_many_chunks_keys(session):
+    ids = list(range(1, CHUNK_SIZE + 2)) # На один ключ больше куска - два IN-запроса
+    with track_queries() as stats:
+        await crud_user.user.get_many(session, ids)
+    assert stats.queries == 2
+
+async def test_concurrent_gets_coalesce_into_one_query(session):
+    telegram_ids = await _user_telegram_ids(session, 20)
+    with track_queries() as stats:
+        users = await asyncio.gather(*(crud_user.get_user_by_telegram_id(session, tg) for tg in telegram_ids))
+        # Повторный get того же ключа берется из загрузчика сессии
+        again = await crud_user.get_user_by_telegram_id(session, telegram_ids[0])
+    assert stats.queries == 1
+    assert [u.telegram_id for u in users] == list(telegram_ids)
+    assert again is users[0]
+
+async def test_competitions_with_organizers_is_two_queries(session):
+    ids = (await session.execute(select(Competition.id))).scalars().all()
+    with track_queries() as stats:
+        competitions = await crud_competition.get_competitions_by_ids(session, ids)
+        organizers = [competition.organizer.id for competition in competitions.values()]
+    # Соревнования одним IN и организаторы одним selectinload
+    assert stats.queries == 2
+    assert len(organizers) == len(ids)
+
+async def test_upsert_many_and_delete_many_are_one_statement(session, organizer_competition):
+    _, competition = organizer_competition
+    user_ids = (await session.execute(
+        select(User.id).where(User.id.not_in(select(Result.user_id).where(Result.competition_id == competition.id)))
+        .order_by(User.id).limit(300)
+    )).scalars().all()
+    rows = [{"user_id": user_id, "competition_id": competition.id, "result_value": str(i), "rank": i + 1}
+            for i, user_id in enumerate(user_ids)]
+
+    with track_queries() as stats:
+        processed = await crud_result.result.upsert_many(
+            session, rows, conflict=("user_id", "competition_id"), update=("result_value", "rank"), commit=False,
+        )
+    # executemany на кусок: одна команда на все строки
+    assert stats.queries == 1
+    assert processed == len(rows)
+
+    # Повторный upsert тех же ключей обновляет, а не дублирует
+    with track_queries() as stats:
+        await crud_result.result.upsert_many(
+            session, [{**row, "rank": row["rank"] + 1} for row in rows],
+            conflict=("user_id", "competition_id"), update=("result_value", "rank"), commit=False,
+        )
+    assert stats.queries == 1
+    count = select(func.count()).where(Result.competition_id == competition.id, Result.user_id.in_(user_ids))
+    assert (await session.execute(count)).scalar() == len(rows)
+
+    keys = [(user_id, competition.id) for user_id in user_ids]
+    with track_queries() as stats:
+        deleted = await crud_result.result.delete_many(session, keys, by=("user_id", "competition_id"), commit=False)
+    assert stats.queries == 1
+    assert deleted == len(rows)
+    await session.rollback()
+
+async def _upload_csv(client, organizer, competition, telegram_ids):
+    lines = ["telegram_id,result_value,rank"]
+    lines += [f"{tg},{100 + i},{i + 1}" for i, tg in enumerate(telegram_ids)]
+    # Неизвестный пользователь: ошибка строки, но не лишний запрос
+    lines.append("1,1,1")
+    with track_queries() as stats:
+        response = await client.post(
+            f"/api/v1/organizer/competitions/{competition.id}/results",
+            headers=auth_headers(organizer),
+            files={"results_file": ("results.csv", "\n".join(lines).encode(), "text/csv")},
+        )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["processed"] == len(telegram_ids)
+    assert body["errors"] == 1
+    return stats
+
+async def test_csv_upload_query_count_does_not_depend_on_rows(client, session, organizer_competition):
+    organizer, competition = organizer_competition
+    telegram_ids = await _user_telegram_ids(session, 400)
+
+    small = await _upload_csv(client, organizer, competition, telegram_ids[:10])
+    large = await _upload_csv(client, organizer, competition, telegram_ids)
+
+    # Текущий пользователь, соревнование и его организатор, захват ключа идемпотентности (2),
+    # пользователи файла, запись журнала изменений, upsert результатов, сброс ключей по содержимому, итог загрузки
+    assert small.queries == large.queries == 10
+    # Все пользователи файла - одним IN-запросом (текущий пользователь - отдельный IN (?)),
+    # все результаты - одним executemany
+    assert _shape_count(large, "WHERE user.telegram_id IN (?, ...)") == 1
+    assert _shape_count(large, "INSERT INTO result") == 1
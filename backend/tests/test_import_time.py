@@ -0,0 +1,50 @@
+# tests/test_import_time.py
+# Холодный старт (user-038): импорт app.main и сборка приложения укладываются в бюджет, а сам импорт
+# модуля не читает настройки, не создает движок БД и не трогает логирование.
+import os
+import subprocess
+import sys
+
+from app import import_time
+
+# Бюджет на "from app.main import app" (сумма собственного времени модулей, лучший из прогонов).
+# На машине разработки ~800 мс; запас - на медленные CI-машины
+IMPORT_TIME_BUDGET_MS = 1500
+RUNS = 3
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _run(code: str) -> str:
+    completed = subprocess.run([sys.executable, "-c", code], cwd=_BACKEND_DIR, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    return completed.stdout.strip()
+
+def test_app_import_within_budget():
+    best = min((import_time.measure("app.main:app") for _ in range(RUNS)), key=import_time.total_ms)
+    elapsed = import_time.total_ms(best)
+    heaviest = ", ".join(f"{package} {ms:.0f}ms" for package, ms in list(import_time.by_package(best).items())[:5])
+    assert elapsed <= IMPORT_TIME_BUDGET_MS, (
+        f"import time {elapsed:.0f}ms exceeds the budget of {IMPORT_TIME_BUDGET_MS}ms ({heaviest})"
+    )
+
+def test_module_import_has_no_side_effects():
+    output = _run(
+        "import logging, sys\n"
+        "import app.main\n"
+        "print(sorted(m for m in ('app.core.config', 'app.core.db', 'sqlalchemy') if m in sys.modules),"
+        " logging.getLogger().handlers)"
+    )
+    assert output == "[] []"
+
+def test_app_is_built_without_engine_or_optional_subsystems():
+    output = _run(
+        "import os, sys\n"
+        "os.environ['ADMISSION_CONTROL_ENABLED'] = 'false'\n"
+        "os.environ['COMPRESSION_ENABLED'] = 'false'\n"
+        "os.environ['PROFILING_ENABLED'] = 'false'\n"
+        "from app.main import app\n"
+        "from app.core import db\n"
+        "print(db._engine, sorted(m for m in ('app.core.admission', 'app.core.compression', 'app.core.profiling')"
+        " if m in sys.modules))"
+    )
+    assert output == "None []"
@@ -0,0 +1,100 @@
+# tests/test_leaderboard.py
+# Живая таблица результатов по SSE (user-048): снимок при подключении, обновление после изменения результатов,
+# heartbeat по времени с последнего кадра подписчика и уборка вещателя после отключения последнего подписчика.
+import anyio
+import pytest
+from sqlalchemy import func
+from sqlmodel import select
+
+from app.core.config import settings
+from app.core.leaderboard import LeaderboardHub
+from app.crud import crud_result
+from app.models.competition import Competition, CompetitionStatusEnum
+from app.models.result import Result, ResultCreate
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def hub(seeded_db, monkeypatch):
+    monkeypatch.setattr(settings, "LEADERBOARD_MIN_REFRESH_INTERVAL_SECONDS", 0.0)
+    leaderboard = LeaderboardHub()
+    yield leaderboard
+    await leaderboard.close()
+
+@pytest.fixture
+async def published_competition_id(session) -> int:
+    """ Опубликованное соревнование с результатами (из засеянной базы). """
+    return (await session.execute(
+        select(Competition.id).join(Result, Result.competition_id == Competition.id)
+        .where(Competition.status == CompetitionStatusEnum.RESULTS_PUBLISHED)
+        .group_by(Competition.id).having(func.count() > 0).limit(1)
+    )).scalar_one()
+
+async def _next_frame(stream) -> str:
+    with anyio.fail_after(5):
+        return (await stream.__anext__()).decode()
+
+async def test_snapshot_then_update(hub, session, published_competition_id):
+    stream = hub.stream(published_competition_id)
+    leader = None
+    try:
+        assert (await _next_frame(stream)).startswith("retry:")
+        snapshot = await _next_frame(stream)
+        assert snapshot.startswith("event: snapshot\n") and '"published":true' in snapshot
+
+        leader = (await session.execute(
+            select(Result).where(Result.competition_id == published_competition_id).order_by(Result.rank).limit(1)
+        )).scalar_one()
+        original_value = leader.result_value
+        await crud_result.create_result(session, obj_in=ResultCreate(
+            user_id=leader.user_id, competition_id=published_competition_id, result_value="updated-value", rank=leader.rank,
+        ))
+        update = await _next_frame(stream)
+        assert update.startswith("event: update\n")
+        assert '"result_value":"updated-value"' in update and f'"user_id":{leader.user_id}' in update
+    finally:
+        await stream.aclose()
+        if leader is not None:
+            await crud_result.create_result(session, obj_in=ResultCreate(
+                user_id=leader.user_id, competition_id=published_competition_id, result_value=original_value, rank=leader.rank,
+            ))
+
+async def test_heartbeat_is_not_postponed_by_changes_without_frames(hub, published_competition_id, monkeypatch):
+    monkeypatch.setattr(settings, "LEADERBOARD_HEARTBEAT_SECONDS", 0.3)
+    stream = hub.stream(published_competition_id)
+    try:
+        await _next_frame(stream) # retry
+        await _next_frame(stream) # snapshot
+        broadcaster = hub._broadcasters[published_competition_id]
+
+        async def churn():
+            # Изменения, не меняющие верх таблицы, чаще интервала heartbeat: кадров по ним нет
+            while True:
+                broadcaster.mark_dirty(broadcaster.version + 1)
+                await anyio.sleep(0.05)
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(churn)
+            with anyio.fail_after(2):
+                frame = (await stream.__anext__()).decode()
+            tg.cancel_scope.cancel()
+        assert frame == ": heartbeat\n\n"
+    finally:
+        await stream.aclose()
+
+async def test_unsubscribe_cleans_up(hub, published_competition_id):
+    streams = [hub.stream(published_competition_id) for _ in range(2)]
+    for stream in streams:
+        await _next_frame(stream)
+    assert (hub.subscribers, hub.broadcasters) == (2, 1)
+    broadcaster = hub._broadcasters[published_competition_id]
+
+    await streams[0].aclose()
+    assert (hub.subscribers, hub.broadcasters) == (1, 1)
+    await streams[1].aclose()
+    assert (hub.subscribers, hub.broadcasters) == (0, 0)
+    # Задача вещателя остановлена вместе с последним подписчиком
+    with anyio.fail_after(1):
+        while not broadcaster._task.done():
+            await anyio.sleep(0.01)
+    assert broadcaster._task.cancelled()
@@ -0,0 +1,54 @@
+# tests/test_lifecycle.py
+# Схема БД при старте (user-039): проверка сравнивает и индексы, а недостающие таблицы и индексы
+# досоздаются до проверки (STARTUP_CREATE_MISSING), поэтому старая база не мешает старту.
+# Прогрев считает только кэшируемую статистику результатов.
+import pytest
+
+from app.core import lifecycle
+from app.core.db import async_engine
+
+pytestmark = pytest.mark.anyio
+
+INDEX_NAME = "ix_result_competition_rank_submitted"
+
+async def test_verify_schema_reports_missing_index(seeded_db):
+    async with async_engine.begin() as conn:
+        await conn.exec_driver_sql(f"DROP INDEX {INDEX_NAME}")
+    with pytest.raises(RuntimeError, match=INDEX_NAME):
+        await lifecycle.verify_schema(async_engine)
+
+    # Старт досоздает индекс и затем проходит проверку
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        async with async_engine.connect() as conn:
+            assert await conn.run_sync(lifecycle._schema_mismatches) == []
+
+async def test_startup_creates_missing_tables(seeded_db):
+    async with async_engine.begin() as conn:
+        await conn.exec_driver_sql("DROP TABLE idempotencyrecord")
+    async with async_engine.connect() as conn:
+        assert "missing table 'idempotencyrecord'" in await conn.run_sync(lifecycle._schema_mismatches)
+
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        async with async_engine.connect() as conn:
+            assert await conn.run_sync(lifecycle._schema_mismatches) == []
+
+async def test_warmup_fills_only_the_stats_cache(seeded_db, monkeypatch):
+    from app.core.cache import results_cache
+    from app.core.config import settings
+    from app.core.query_tracker import track_queries
+
+    results_cache.clear()
+    monkeypatch.setattr(settings, "STARTUP_WARM_STATS", 0)
+    with track_queries() as stats:
+        await lifecycle.warm_caches()
+    assert stats.queries == 0
+
+    monkeypatch.setattr(settings, "STARTUP_WARM_STATS", 2)
+    with track_queries() as stats:
+        await lifecycle.warm_caches()
+    assert len(results_cache) == 2
+    # Выбор соревнований и на каждое - версия результатов и статистика; ни лент соревнований, ни страниц результатов
+    assert stats.queries == 5
+    assert [shape.split(" FROM ")[1].split()[0] for shape in stats.shapes] == ["competition", "changelogentry", "result"]
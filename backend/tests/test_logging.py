@@ -0,0 +1,25 @@
+# tests/test_logging.py
+# Логирование между запусками lifespan (user-037): поток записи очереди запускается заново при каждом старте,
+# а после остановки записи идут в stdout напрямую, а не в очередь, которую никто не разбирает.
+import logging
+import logging.handlers
+
+import pytest
+
+from app.core import logging as app_logging
+
+pytestmark = pytest.mark.anyio
+
+def _queue_handlers():
+    return [h for h in logging.getLogger().handlers if isinstance(h, logging.handlers.QueueHandler)]
+
+async def test_logging_survives_repeated_lifespans(seeded_db):
+    from app.main import app
+    for _ in range(2):
+        async with app.router.lifespan_context(app):
+            listener = app_logging._listener
+            assert listener is not None
+            assert [h.queue for h in _queue_handlers()] == [listener.queue]
+        assert app_logging._listener is None
+        assert not _queue_handlers()
+    app_logging.setup_logging()
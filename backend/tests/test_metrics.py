@@ -0,0 +1,18 @@
+# tests/test_metrics.py
+# Метка route в метриках HTTP (user-033): шаблон сработавшего маршрута, а не конкретный путь.
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def test_route_label_is_route_template(client, organizer_competition):
+    _, competition = organizer_competition
+    assert (await client.get(f"/api/v1/competitions/{competition.id}")).status_code == 200
+    assert (await client.get(f"/api/v1/competitions/{competition.id}/results")).status_code == 200
+    assert (await client.get("/api/v1/no-such-route")).status_code == 404
+
+    text = (await client.get("/metrics")).text
+    requests = [line for line in text.splitlines() if line.startswith("http_requests_total{")]
+    assert any('route="/api/v1/competitions/{competition_id}"' in line for line in requests)
+    assert any('route="/api/v1/competitions/{competition_id}/results"' in line for line in requests)
+    assert any('route="<unmatched>"' in line for line in requests)
+    assert not any(f"/competitions/{competition.id}" in line for line in requests)
@@ -0,0 +1,63 @@
+# tests/test_profiling.py
+# Профилирование запросов (user-036): одновременно профилируется один запрос, даже если проверка доступа
+# медленная; флаг освобождается при отказе в доступе, а профиль записывается в PROFILE_DIR.
+import os
+
+import anyio
+import pytest
+
+from app.core import profiling
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+async def _ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+async def _request(middleware) -> dict:
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/ping", "headers": [(b"x-profile", b"1")], "query_string": b""}
+    started = {}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            started.update(dict(message["headers"]))
+
+    await middleware(scope, None, send)
+    return started
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+async def test_concurrent_requests_are_profiled_once(profile_dir, monkeypatch):
+    async def slow_authorized(headers):
+        await anyio.sleep(0.05)
+        return True
+
+    monkeypatch.setattr(profiling, "is_profiling_authorized", slow_authorized)
+    middleware = profiling.ProfilingMiddleware(_ok_app)
+    responses = []
+
+    async def run():
+        responses.append(await _request(middleware))
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(2):
+            tg.start_soon(run)
+
+    profile_ids = [headers[b"x-profile-id"].decode() for headers in responses if b"x-profile-id" in headers]
+    assert len(profile_ids) == 1
+    assert os.listdir(profile_dir) == profile_ids
+    assert not middleware._busy
+
+async def test_unauthorized_request_releases_the_flag(profile_dir, monkeypatch):
+    async def denied(headers):
+        return False
+
+    monkeypatch.setattr(profiling, "is_profiling_authorized", denied)
+    middleware = profiling.ProfilingMiddleware(_ok_app)
+    assert b"x-profile-id" not in await _request(middleware)
+    assert not middleware._busy
+    assert os.listdir(profile_dir) == []
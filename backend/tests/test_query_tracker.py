@@ -0,0 +1,22 @@
+# tests/test_query_tracker.py
+# Детектор N+1 (user-034): предупреждение о повторах запроса называет шаблон маршрута, а не конкретный путь.
+import logging
+
+import pytest
+
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+async def test_repeated_query_warning_uses_route_template(client, organizer_competition, caplog, monkeypatch):
+    _, competition = organizer_competition
+    monkeypatch.setattr(settings, "QUERY_REPEAT_THRESHOLD", 0) # Любой запрос считается повтором
+    with caplog.at_level(logging.WARNING, logger="app.core.query_tracker"):
+        response = await client.get(f"/api/v1/competitions/{competition.id}")
+    assert response.status_code == 200
+    assert response.headers["x-db-repeated-statements"] != "0"
+
+    warnings = [record for record in caplog.records if record.message.startswith("Possible N+1")]
+    assert warnings
+    assert {record.data["route"] for record in warnings} == {"/api/v1/competitions/{competition_id}"}
+    assert not any(f"/competitions/{competition.id}" in record.message for record in warnings)
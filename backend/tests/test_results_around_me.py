@@ -0,0 +1,97 @@
+# tests/test_results_around_me.py
+# "Вокруг меня" на соревновании со 100k результатов (user-026): соседи ищутся seek-запросами по индексу
+# ix_result_competition_rank_submitted, поэтому число запросов и план не зависят от позиции и размера.
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, insert
+from sqlmodel import select
+
+from app.core.db import AsyncSessionFactory, async_engine, create_db_and_tables
+from app.models.competition import Competition, CompetitionStatusEnum
+from app.models.result import Result
+from app.models.user import User
+
+from .conftest import LARGE_COMPETITION_SIZE, auth_headers
+
+pytestmark = pytest.mark.anyio
+
+RESULTS = LARGE_COMPETITION_SIZE
+INDEX_NAME = "ix_result_competition_rank_submitted"
+
+@pytest.fixture(scope="module")
+async def big_competition(large_user_ids):
+    """ Опубликованное соревнование на RESULTS участников; места парами делят одно значение (ничьи). """
+    started = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    async with AsyncSessionFactory() as session:
+        organizer = (await session.execute(select(User).where(User.is_organizer).limit(1))).scalar_one()
+        competition = Competition(
+            title="Around me 100k", type="marathon", organizer_id=organizer.id,
+            status=CompetitionStatusEnum.RESULTS_PUBLISHED, reg_start_at=started, reg_end_at=started,
+            comp_start_at=started, comp_end_at=started,
+        )
+        session.add(competition)
+        await session.commit()
+        competition_id = competition.id
+
+    user_ids = large_user_ids[:RESULTS]
+    async with async_engine.begin() as conn:
+        await conn.execute(insert(Result.__table__), [
+            {"user_id": user_id, "competition_id": competition_id, "result_value": str(i // 2),
+             "rank": i // 2 + 1, "submitted_at": started + timedelta(seconds=i)}
+            for i, user_id in enumerate(user_ids)
+        ])
+    # Порядок таблицы: rank, submitted_at, id - совпадает с порядком вставки
+    return competition_id, user_ids
+
+@pytest.mark.parametrize("position", [0, 1, RESULTS // 2, RESULTS - 2, RESULTS - 1])
+async def test_neighbours_match_table_order(client, big_competition, position):
+    competition_id, user_ids = big_competition
+    n = 5
+    async with AsyncSessionFactory() as session:
+        user = (await session.execute(select(User).where(User.id == user_ids[position]))).scalar_one()
+    response = await client.get(
+        f"/api/v1/competitions/{competition_id}/results/around-me", params={"n": n}, headers=auth_headers(user),
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["me"]["user_id"] == user_ids[position]
+    assert [row["user_id"] for row in body["above"]] == user_ids[max(0, position - n):position]
+    assert [row["user_id"] for row in body["below"]] == user_ids[position + 1:position + 1 + n]
+    # Текущий пользователь, соревнование и его организатор, свой результат, соседи сверху и снизу
+    assert response.headers["x-db-query-count"] == "6"
+
+async def test_neighbour_seeks_use_the_index(client, big_competition):
+    competition_id, user_ids = big_competition
+    async with AsyncSessionFactory() as session:
+        user = (await session.execute(select(User).where(User.id == user_ids[RESULTS // 2]))).scalar_one()
+
+    executed = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM result" in statement:
+            executed.append((statement, parameters))
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        response = await client.get(
+            f"/api/v1/competitions/{competition_id}/results/around-me", headers=auth_headers(user),
+        )
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    assert response.status_code == 200
+
+    seeks = [(statement, parameters) for statement, parameters in executed if "rank" in statement.split("WHERE", 1)[-1]]
+    assert len(seeks) == 2
+    async with async_engine.connect() as conn:
+        for statement, parameters in seeks:
+            plan = " | ".join(row[-1] for row in await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+            assert INDEX_NAME in plan, plan
+            assert "SCAN result" not in plan, plan
+
+async def test_create_db_adds_index_to_existing_table(seeded_db):
+    async with async_engine.begin() as conn:
+        await conn.exec_driver_sql(f"DROP INDEX {INDEX_NAME}")
+    # Таблица result уже есть - create_all ее пропускает, индекс досоздается отдельно
+    await create_db_and_tables()
+    async with async_engine.connect() as conn:
+        names = (await conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'result'")).scalars().all()
+    assert INDEX_NAME in names
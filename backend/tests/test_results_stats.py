@@ -0,0 +1,48 @@
+# tests/test_results_stats.py
+# Кэш статистики результатов (user-028): запись хранит версию результатов соревнования (номер записи журнала
+# изменений), поэтому изменение, сделанное другим процессом (без сброса кэша в этом), сразу видно.
+import pytest
+from sqlalchemy import func, update
+from sqlmodel import select
+
+from app.core.cache import results_cache
+from app.core.query_tracker import track_queries
+from app.crud import crud_change, crud_result
+from app.models.change import ChangeEntity
+from app.models.competition import Competition, CompetitionStatusEnum
+from app.models.result import Result
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def competition_id(session) -> int:
+    return (await session.execute(
+        select(Competition.id).join(Result, Result.competition_id == Competition.id)
+        .where(Competition.status == CompetitionStatusEnum.RESULTS_PUBLISHED)
+        .group_by(Competition.id).having(func.count() > 1).order_by(Competition.id.desc()).limit(1)
+    )).scalar_one()
+
+async def test_stats_are_cached_until_results_change_elsewhere(session, competition_id):
+    results_cache.clear()
+    first = await crud_result.get_results_stats(session, competition_id=competition_id)
+    with track_queries() as stats:
+        assert await crud_result.get_results_stats(session, competition_id=competition_id) == first
+    # Из кэша: только проверка версии, значения не перечитываются
+    assert stats.queries == 1
+
+    # Запись "другого процесса": результаты и журнал меняются, а кэш этого процесса не сбрасывается
+    result_id = (await session.execute(select(Result.id).where(Result.competition_id == competition_id).limit(1))).scalar_one()
+    original = (await session.execute(select(Result.result_value).where(Result.id == result_id))).scalar_one()
+    await session.execute(update(Result).where(Result.id == result_id).values(result_value=None))
+    await crud_change.record(session, ChangeEntity.RESULTS, competition_id=competition_id)
+    await session.commit()
+    try:
+        assert len(results_cache) == 1
+        changed = await crud_result.get_results_stats(session, competition_id=competition_id)
+        assert changed.count == first.count
+        assert changed != first
+    finally:
+        await session.execute(update(Result).where(Result.id == result_id).values(result_value=original))
+        await crud_change.record(session, ChangeEntity.RESULTS, competition_id=competition_id)
+        await session.commit()
+    assert await crud_result.get_results_stats(session, competition_id=competition_id) == first
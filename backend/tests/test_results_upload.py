@@ -0,0 +1,44 @@
+# tests/test_results_upload.py
+# Загрузка результатов с пересчетом мест (user-046): запись и пересчет - один коммит и одна запись журнала;
+# в режиме upsert ответ не содержит счетчиков diff.
+import pytest
+from sqlmodel import func, select
+
+from app.models.change import ChangeEntity, ChangeLogEntry
+from app.models.user import User
+
+from .conftest import auth_headers
+
+pytestmark = pytest.mark.anyio
+
+async def _upload(client, organizer, competition, telegram_ids, values, **params):
+    lines = ["telegram_id,result_value"] + [f"{tg},{value}" for tg, value in zip(telegram_ids, values)]
+    return await client.post(
+        f"/api/v1/organizer/competitions/{competition.id}/results", params={"rank_by": "number", **params},
+        headers=auth_headers(organizer),
+        files={"results_file": ("results.csv", "\n".join(lines).encode(), "text/csv")},
+    )
+
+async def _change_entries(session, competition_id: int) -> int:
+    statement = select(func.count()).where(
+        ChangeLogEntry.entity == ChangeEntity.RESULTS, ChangeLogEntry.competition_id == competition_id,
+    )
+    return (await session.execute(statement)).scalar()
+
+@pytest.mark.parametrize("mode", ["diff", "upsert"])
+async def test_upload_with_rank_by_commits_once(client, session, organizer_competition, mode):
+    organizer, competition = organizer_competition
+    telegram_ids = (await session.execute(select(User.telegram_id).order_by(User.id.desc()).limit(50))).scalars().all()
+    # Значения отличаются от прежних загрузок - меняются и сами результаты, и места
+    values = [f"{7000 + i}.{len(mode)}" for i in range(len(telegram_ids))]
+
+    before = await _change_entries(session, competition.id)
+    response = await _upload(client, organizer, competition, telegram_ids, values, mode=mode)
+    assert response.status_code == 200, response.text
+    assert await _change_entries(session, competition.id) == before + 1
+
+    body = response.json()
+    if mode == "upsert":
+        assert not {"inserted", "updated", "unchanged", "deleted"} & body.keys()
+    else:
+        assert body["inserted"] + body["updated"] + body["unchanged"] == len(telegram_ids)
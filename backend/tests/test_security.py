@@ -0,0 +1,33 @@
+# tests/test_security.py
+# Проверка данных входа через Telegram (user-044): подпись и возраст auth_date.
+import time
+
+import pytest
+
+from app.core import security
+from app.core.config import settings
+
+def _signed(auth_date) -> dict:
+    data = {"id": 42, "first_name": "Test", "auth_date": auth_date}
+    return {**data, "hash": security.telegram_login_hash(data)}
+
+def test_fresh_signed_login_is_accepted():
+    assert security.verify_telegram_login(_signed(int(time.time())))
+
+def test_tampered_login_is_rejected():
+    data = _signed(int(time.time()))
+    data["id"] = 43
+    assert not security.verify_telegram_login(data)
+
+def test_stale_login_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "TELEGRAM_LOGIN_MAX_AGE_SECONDS", 60)
+    assert not security.verify_telegram_login(_signed(int(time.time()) - 61))
+    assert security.verify_telegram_login(_signed(int(time.time()) - 30))
+
+def test_login_age_check_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "TELEGRAM_LOGIN_MAX_AGE_SECONDS", 0)
+    assert security.verify_telegram_login(_signed(0))
+
+@pytest.mark.parametrize("auth_date", [None, "yesterday"])
+def test_login_without_valid_auth_date_is_rejected(auth_date):
+    assert not security.verify_telegram_login(_signed(auth_date))
@@ -0,0 +1,23 @@
+# tests/test_seed_db.py
+# Генератор датасета (user-031): ограничение "не больше пользователей на соревнование" не урезает датасет молча -
+# излишек переносится на другие соревнования, а невыполнимый запрос отклоняется до записи.
+import numpy as np
+import pytest
+
+from app import seed_db
+
+def test_allocation_redistributes_overflow_over_the_cap():
+    rng = np.random.default_rng(1)
+    weights = np.array([0.9, 0.05, 0.03, 0.02])
+    eligible = np.array([True, True, False, True])
+    counts = seed_db._allocate(rng, 25, weights, eligible, cap=10)
+
+    assert counts.sum() == 25
+    assert counts.max() <= 10
+    assert counts[2] == 0
+
+def test_seed_rejects_more_rows_than_competitions_can_hold():
+    with pytest.raises(ValueError, match="results"):
+        seed_db._check_capacity(users=10, competitions=6, registrations=0, results=31)
+    # Ровно по емкости - можно: 3 из 6 статусов допускают результаты
+    seed_db._check_capacity(users=10, competitions=6, registrations=0, results=30)
@@ -0,0 +1,25 @@
+# tests/test_slow_query.py
+# Журнал медленных запросов (user-035): у executemany в запись попадают типы только первых наборов параметров.
+from app.core import slow_query
+
+class _Rows(list):
+    """ Список, считающий обращения к элементам: redact_parameters не должен перебирать все наборы. """
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.visited = 0
+
+    def __iter__(self):
+        for row in super().__iter__():
+            self.visited += 1
+            yield row
+
+def test_executemany_parameters_are_sampled():
+    rows = _Rows({"user_id": i, "result_value": str(i)} for i in range(10_000))
+    redacted = slow_query.redact_parameters(rows, True)
+
+    assert redacted == {"rows": 10_000, "first": [{"user_id": "int", "result_value": "str"}] * slow_query.LOGGED_PARAMETER_SETS}
+    assert rows.visited == slow_query.LOGGED_PARAMETER_SETS
+
+def test_single_parameter_set_shows_types_only():
+    assert slow_query.redact_parameters((42, "secret"), False) == ["int", "str"]
+    assert slow_query.redact_parameters(_Rows(), True) == {"rows": 0, "first": []}
@@ -0,0 +1,24 @@
+# tests/test_sparse_fields.py
+# Разреженные наборы полей (user-050): ?fields= выбирает колонки, пустой параметр равен его отсутствию,
+# неизвестное поле - 400.
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def test_fields_select_columns(client):
+    response = await client.get("/api/v1/competitions", params={"fields": "title,status", "limit": 5})
+    assert response.status_code == 200
+    assert {tuple(sorted(row)) for row in response.json()} == {("id", "status", "title")}
+
+@pytest.mark.parametrize("fields", ["", ",", " , "])
+async def test_empty_fields_return_the_full_model(client, fields):
+    full = await client.get("/api/v1/competitions", params={"limit": 5})
+    response = await client.get("/api/v1/competitions", params={"fields": fields, "limit": 5})
+    assert response.status_code == 200
+    assert response.json() == full.json()
+    assert "description" in response.json()[0]
+
+async def test_unknown_field_is_rejected(client):
+    response = await client.get("/api/v1/competitions", params={"fields": "title,secret"})
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
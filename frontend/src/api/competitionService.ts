@@ -1,10 +1,15 @@
 import apiClient from './client';
 import { Competition, CompetitionDetail, CompetitionResult, Participant, ResultsUploadPayload } from '@/types/api';
 
+// Fields of the Competition list type: list endpoints return only these (?fields=), not the full model
+const COMPETITION_LIST_FIELDS = 'title,reg_start_at,reg_end_at,comp_start_at,comp_end_at,status,type';
+
 export const competitionService = {
   // Get all competitions
   getAllCompetitions: async (): Promise<Competition[]> => {
-    const response = await apiClient.get<Competition[]>('/competitions');
+    const response = await apiClient.get<Competition[]>('/competitions', {
+      params: { fields: COMPETITION_LIST_FIELDS },
+    });
     return response.data;
   },
 
@@ -30,7 +35,9 @@ export const competitionService = {
 
   // Get competitions created by the organizer
   getOrganizerCompetitions: async (): Promise<Competition[]> => {
-    const response = await apiClient.get<Competition[]>('/organizer/competitions');
+    const response = await apiClient.get<Competition[]>('/organizer/competitions', {
+      params: { fields: COMPETITION_LIST_FIELDS },
+    });
     return response.data;
   },
 